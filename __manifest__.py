@@ -12,7 +12,15 @@
     'depends': ['sale'],
     'data': [
         'security/ir.model.access.csv',
+        'data/ir_cron.xml',
+        'data/sale_import_profile_data.xml',
         'views/sale_import_views.xml',
+        'views/sale_import_profile_views.xml',
+        'views/sale_import_job_views.xml',
+        'views/sale_import_log_views.xml',
+        'views/sale_confirm_job_views.xml',
+        'views/sale_buyer_identity_views.xml',
+        'views/sale_settlement_summary_views.xml',
         'views/inherit_sale_order.xml',
         'wizard/sale_import_wizard.xml',
         'wizard/sale_export_wizard.xml',
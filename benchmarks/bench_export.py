@@ -0,0 +1,49 @@
+"""
+Benchmark format export: CSV dibandingkan dengan XLSX streaming
+(tools/writers.py), pada throughput dan pertumbuhan memori puncak.
+
+    python benchmarks/bench_export.py [jumlah_baris]
+"""
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import measure  # noqa: E402
+from tools import writers  # noqa: E402
+
+# Header sama dengan SaleExportWizard (41 kolom)
+HEADER = ['Kolom %d' % index for index in range(41)]
+
+
+def iter_export_rows(lines, seed=42):
+    """Yield rows shaped like the export: 32 order columns then 9 line columns"""
+    rng = random.Random(seed)
+    start = datetime(2024, 9, 1, 8, 0)
+    for index in range(lines):
+        created = start + timedelta(minutes=index)
+        yield [
+            '2409%010d' % (index // 2), 'Selesai', False, 'SPXID%012d' % index,
+            'SPX Standard', 'pickup', created + timedelta(days=2), created,
+            created + timedelta(minutes=5), 'ShopeePay',
+        ] + [float(rng.randrange(0, 50) * 1000) for _ in range(14)] + [
+            False, 'buyer%05d' % rng.randrange(10000), 'BUYER', '628123456789',
+            'Jl. Contoh No. 1', 'KOTA SURABAYA', 'Jawa Timur', created + timedelta(days=4),
+            'SKU', 'SKU-%04d' % rng.randrange(500), 'Produk', 'Merah',
+            float(rng.randrange(10, 500) * 1000), float(rng.randrange(10, 500) * 1000),
+            float(rng.randrange(1, 4)), 0.25, 0.5,
+        ]
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    for file_format in ('csv', 'xlsx'):
+        writer = writers.WRITERS[file_format]
+        measure('export %s' % file_format,
+                lambda: sum(1 for chunk in writer(HEADER, iter_export_rows(lines))) and lines)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""
+Benchmark import dan export end-to-end pada database Odoo.
+
+Import menjalankan sale.import.job pada file export Shopee sintetis, export
+menjalankan sale.export.wizard pada pesanan hasil import tersebut. Waktu per
+fase, jumlah query dan memori diambil dari log eksekusi job (sale.import.log).
+Sebagai pembanding, query per baris pencarian per baris pada import lama
+(satu search per kunci per baris) diukur pada baris pertama skenario yang sama.
+Semua dijalankan dalam satu transaksi (registry dalam test mode, commit per
+chunk dilewati) yang di-rollback di akhir, sehingga setiap run mulai dari
+data yang sama dan hasilnya dapat dibandingkan antar run.
+
+Database harus sudah berisi modul ini beserta payment mode 'BC Online' dan
+workflow 'Automatic'.
+
+    python benchmarks/bench_import.py -c odoo.conf -d bench_db --scenario 50k --format xlsx
+    python benchmarks/bench_import.py -c odoo.conf -d bench_db --scenario 50k --output results.jsonl
+    python benchmarks/bench_import.py -c odoo.conf -d bench_db --scenario 50k --baseline results.jsonl
+    python benchmarks/bench_import.py -c odoo.conf -d bench_db --scenario 500k --load-mode copy --chunk-size 5000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.shopee_export import (  # noqa: E402
+    CSV_ENCODINGS, FILE_FORMATS, SCENARIOS, SHOPEE_HEADERS, build_scenario, iter_shopee_rows,
+)
+from tools.telemetry import PHASES  # noqa: E402
+
+# Metrik yang dibandingkan dengan baseline, nilai lebih besar berarti lebih lambat
+COMPARED_METRICS = ['seconds', 'queries', 'queries_per_row', 'peak_rss_mb', 'export_seconds', *PHASES]
+# Jumlah baris yang dipakai untuk mengukur query per baris import lama (per baris konstan)
+PER_ROW_BASELINE_ROWS = 1000
+
+
+def run_import(env, data, file_format, parse_workers=1, load_mode='orm', chunk_size=500):
+    """Import the file through a job and return its metrics"""
+    Job = env['sale.import.job']
+    job = Job._create_job({
+        'name': 'benchmark.%s' % file_format,
+        'file_type': file_format,
+        'chunk_size': chunk_size,
+        'parse_workers': parse_workers,
+        'load_mode': load_mode,
+    }, raw=data)
+
+    job._run()
+    # Telemetri eksekusi dicatat oleh job pada sale.import.log
+    log = job.log_ids[:1]
+    result = {
+        'rows': log.row_count,
+        'orders': job.order_count,
+        'errors': log.error_count,
+        'seconds': round(log.duration, 3),
+        'rows_per_second': round(log.rows_per_second),
+        'queries': log.query_count,
+        'queries_per_row': round(log.query_count / (log.row_count or 1), 2),
+        'peak_rss_mb': round(log.memory_growth, 1),
+    }
+    for phase in PHASES:
+        result[phase] = round(log['%s_time' % phase], 3)
+    return job, result
+
+
+def run_per_row_baseline(env, scenario, seed=42):
+    """
+    Replay the lookups of the import before keys were resolved per file:
+    for each row, one search per key (order, payment mode, workflow,
+    buyer, province, shipping option, SKU). Only the searches are run, so
+    the result is a lower bound of the queries per row of that import
+    """
+    params = dict(SCENARIOS[scenario], lines=min(SCENARIOS[scenario]['lines'], PER_ROW_BASELINE_ROWS))
+    rows = [dict(zip(SHOPEE_HEADERS, row)) for row in iter_shopee_rows(seed=seed, **params)]
+    query_count = env.cr.sql_log_count
+    for row in rows:
+        env['sale.order'].search([('nomor_pesanan', '=', row['No. Pesanan'])], limit=1)
+        env['account.payment.mode'].search([('name', '=', 'BC Online')], limit=1)
+        env['sale.workflow.process'].search([('name', '=', 'Automatic')], limit=1)
+        env['res.partner'].search([('name', '=', row['Username (Pembeli)'])], limit=1)
+        env['res.country.state'].search([('name', '=', row['Provinsi'])], limit=1)
+        env['delivery.carrier'].search([('name', '=', row['Opsi Pengiriman'])], limit=1)
+        env['product.product'].search([('default_code', '=', row['Nomor Referensi SKU'])], limit=1)
+    return {
+        'baseline_rows': len(rows),
+        'baseline_queries_per_row': round((env.cr.sql_log_count - query_count) / (len(rows) or 1), 2),
+    }
+
+
+def run_export(env, job, file_format):
+    """Export the orders of the job and return the export metrics"""
+    orders = env['sale.order'].search([('import_job_id', '=', job.id)])
+    dates = orders.mapped('date_order')
+    if not dates:
+        return {}
+    wizard = env['sale.export.wizard'].create({
+        'date_from': min(dates).date(),
+        'date_to': max(dates).date(),
+        'file_format': 'xlsx' if file_format == 'xlsx' else 'csv',
+    })
+    query_count = env.cr.sql_log_count
+    started = time.perf_counter()
+    size = sum(len(chunk) for chunk in wizard._iter_export_file())
+    elapsed = time.perf_counter() - started
+    return {
+        'export_seconds': round(elapsed, 3),
+        'export_queries': env.cr.sql_log_count - query_count,
+        'export_bytes': size,
+    }
+
+
+def find_baseline(path, key):
+    """Return the last result of the same scenario in a JSON lines file"""
+    baseline = None
+    with open(path) as results:
+        for line in results:
+            result = json.loads(line)
+            if all(result.get(name) == value for name, value in key.items()):
+                baseline = result
+    return baseline
+
+
+def print_result(result, baseline=None):
+    for name, value in result.items():
+        line = '%-18s %s' % (name, value)
+        if baseline and name in COMPARED_METRICS and baseline.get(name):
+            line += '  (%+.1f%% vs baseline)' % (100.0 * (value - baseline[name]) / baseline[name])
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sale import and export on an Odoo database")
+    parser.add_argument('-c', '--config', help="Odoo configuration file")
+    parser.add_argument('-d', '--database', required=True)
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), default='1k')
+    parser.add_argument('--format', choices=FILE_FORMATS, default='csv', dest='file_format')
+    parser.add_argument('--encoding', choices=CSV_ENCODINGS, default='utf-8')
+    parser.add_argument('--parse-workers', type=int, default=1,
+                        help="Processes converting the rows, 0 uses every CPU core")
+    parser.add_argument('--chunk-size', type=int, default=500, help="Orders per commit")
+    parser.add_argument('--load-mode', choices=['orm', 'copy'], default='orm',
+                        help="ORM writes or bulk SQL through COPY staging tables")
+    parser.add_argument('--no-export', action='store_true', help="Only benchmark the import")
+    parser.add_argument('--no-per-row-baseline', action='store_true',
+                        help="Skip the queries per row of the former per-row lookups")
+    parser.add_argument('--output', help="Append the result to this JSON lines file")
+    parser.add_argument('--baseline', help="Compare with the last result of the same scenario in this file")
+    args = parser.parse_args()
+
+    import odoo
+    from odoo.tools import config
+    config.parse_config(['-c', args.config] if args.config else [])
+    registry = odoo.modules.registry.Registry(args.database)
+
+    key = {'scenario': args.scenario, 'format': args.file_format, 'encoding': args.encoding,
+           'parse_workers': args.parse_workers, 'load_mode': args.load_mode, 'chunk_size': args.chunk_size}
+    data = build_scenario(args.scenario, args.file_format, args.encoding)
+    result = dict(key, file_mb=round(len(data) / 1024 / 1024, 2))
+
+    with registry.cursor() as cr:
+        # Test mode: commit per chunk dilewati, semuanya di-rollback di akhir
+        registry.enter_test_mode(cr)
+        try:
+            env = odoo.api.Environment(cr, odoo.SUPERUSER_ID, {})
+            # Diukur sebelum import, saat pesanan, pembeli, carrier dan produk belum ada
+            if not args.no_per_row_baseline:
+                result.update(run_per_row_baseline(env, args.scenario))
+            job, metrics = run_import(env, data, args.file_format, args.parse_workers, args.load_mode,
+                                       args.chunk_size)
+            result.update(metrics)
+            if not args.no_export:
+                result.update(run_export(env, job, args.file_format))
+        finally:
+            registry.leave_test_mode()
+            cr.rollback()
+
+    print_result(result, find_baseline(args.baseline, key) if args.baseline else None)
+    if args.output:
+        with open(args.output, 'a') as output:
+            output.write(json.dumps(result) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark pembaca XLSX/XLS: reader streaming (tools/readers.py) dibandingkan
+dengan reader lama berbasis file temporary dan mode penuh openpyxl.
+
+    python benchmarks/bench_readers.py [jumlah_baris]
+"""
+import io
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import measure  # noqa: E402
+from benchmarks.shopee_export import build_xls, build_xlsx, iter_shopee_rows  # noqa: E402
+from tools import readers  # noqa: E402
+
+
+def legacy_parse_xlsx(data):
+    """Reader XLSX sebelum streaming: file temporary + load_workbook mode penuh"""
+    import openpyxl
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as temp_file:
+        temp_file.write(data)
+    try:
+        workbook = openpyxl.load_workbook(temp_file.name, data_only=True)
+        sheet = workbook.active
+        headers = [str(cell.value) for cell in next(sheet.rows)]
+        result = []
+        for row in sheet.iter_rows(min_row=2, values_only=True):
+            row_dict = {}
+            for header, value in zip(headers, row):
+                if isinstance(value, (int, float)):
+                    if isinstance(value, float) and value.is_integer():
+                        value = str(int(value))
+                    else:
+                        value = str(value)
+                row_dict[header] = str(value) if value is not None else ''
+            result.append(row_dict)
+        return result
+    finally:
+        os.unlink(temp_file.name)
+
+
+def legacy_parse_xls(data):
+    """Reader XLS sebelum streaming: file temporary + sheet.cell per sel"""
+    import xlrd
+    with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+        temp_file.write(data)
+    try:
+        book = xlrd.open_workbook(temp_file.name)
+        sheet = book.sheet_by_index(0)
+        headers = [str(cell.value) for cell in sheet.row(0)]
+        result = []
+        for row_idx in range(1, sheet.nrows):
+            row = {}
+            for col_idx, header in enumerate(headers):
+                cell_value = sheet.cell(row_idx, col_idx).value
+                if isinstance(cell_value, float):
+                    if cell_value.is_integer():
+                        cell_value = str(int(cell_value))
+                    else:
+                        cell_value = str(cell_value)
+                row[header] = str(cell_value) if cell_value else ''
+            result.append(row)
+        return result
+    finally:
+        os.unlink(temp_file.name)
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    xlsx_data = build_xlsx(iter_shopee_rows(lines))
+    measure('xlsx legacy', lambda: len(legacy_parse_xlsx(xlsx_data)))
+    measure('xlsx streaming', lambda: sum(1 for row in readers.iter_xlsx_rows(io.BytesIO(xlsx_data))))
+
+    # Format XLS dibatasi 65535 baris per sheet
+    xls_data = build_xls(iter_shopee_rows(min(lines, 65535)))
+    measure('xls legacy', lambda: len(legacy_parse_xls(xls_data)))
+    measure('xls streaming', lambda: sum(1 for row in readers.iter_xls_rows(io.BytesIO(xls_data))))
+
+
+if __name__ == '__main__':
+    main()
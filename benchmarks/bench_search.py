@@ -0,0 +1,137 @@
+"""
+Benchmark latensi pencarian pesanan Shopee pada database Odoo.
+
+Script mengisi sale_order dan sale_order_line dengan pesanan sintetis lewat
+SQL (salinan satu pesanan contoh), lalu mengukur pencarian yang dipakai
+customer service: potongan nomor resi, nomor pesanan, username pembeli,
+status per marketplace dan SKU. Untuk setiap pencarian dicetak median
+latensi dan node scan dari rencana query, sehingga terlihat apakah indeks
+dipakai. Semua dijalankan dalam satu transaksi yang di-rollback di akhir.
+
+Database harus sudah berisi modul ini dan minimal satu produk.
+
+    python benchmarks/bench_search.py -c odoo.conf -d bench_db --orders 2000000
+"""
+import argparse
+import re
+import statistics
+import time
+
+# Nama pesanan sintetis, dipakai juga untuk mengisi baris pesanan
+BENCH_PREFIX = 'BENCH/'
+
+
+def clone_rows(cr, table, template_id, values, source, where='TRUE'):
+    """
+    Insert rows copied from a template row, with the given column
+    expressions evaluated over the rows of the source relation
+    """
+    cr.execute("""
+        SELECT column_name FROM information_schema.columns
+         WHERE table_name = %s AND column_name <> 'id'
+    """, [table])
+    copied = [name for name, in cr.fetchall() if name not in values]
+    columns = ', '.join('"%s"' % name for name in copied + list(values))
+    expressions = ', '.join(['template."%s"' % name for name in copied] + list(values.values()))
+    cr.execute("INSERT INTO %s (%s) SELECT %s FROM %s template, %s WHERE template.id = %%s AND %s" % (
+        table, columns, expressions, table, source, where), [template_id])
+    return cr.rowcount
+
+
+def seed(env, orders, buyers, skus):
+    """Create a template order through the ORM, then clone it in SQL"""
+    product = env['product.product'].search([('sale_ok', '=', True)], limit=1)
+    partner = env['res.partner'].create({'name': 'Benchmark Buyer'})
+    marketplace = env['market.place'].search([], limit=1)
+    template = env['sale.order'].create({
+        'partner_id': partner.id,
+        'order_line': [(0, 0, {'product_id': product.id, 'product_uom_qty': 1})],
+    })
+    env.flush_all()
+    cr = env.cr
+    clone_rows(cr, 'sale_order', template.id, {
+        'name': "'%s' || n" % BENCH_PREFIX,
+        'nomor_pesanan': "'2409' || lpad(n::text, 10, '0') || 'AB'",
+        'tracking_number': "'SPXID' || lpad(mod(n * 7919, 1000000007)::text, 12, '0')",
+        'buyer_username': "'buyer' || mod(n, %d)" % buyers,
+        'order_status': "(ARRAY['Belum Bayar', 'Perlu Dikirim', 'Sedang Dikirim', 'Selesai', 'Batal'])[mod(n, 5) + 1]",
+        'sale_marketplace': str(marketplace.id) if marketplace else 'NULL',
+    }, 'generate_series(1, %d) n' % orders)
+    cr.execute("SELECT id FROM sale_order_line WHERE order_id = %s LIMIT 1", [template.id])
+    clone_rows(cr, 'sale_order_line', cr.fetchone()[0], {
+        'order_id': 'sale.id',
+        'sku_reference': "'SKU-' || lpad(mod(sale.id, %d)::text, 4, '0')" % skus,
+    }, 'sale_order sale', "starts_with(sale.name, '%s')" % BENCH_PREFIX)
+    cr.execute("ANALYZE sale_order")
+    cr.execute("ANALYZE sale_order_line")
+    env.invalidate_all()
+    return marketplace
+
+
+def lookups(marketplace):
+    """The searches of the customer service, by label"""
+    return [
+        ('resi substring', 'sale.order', [('tracking_number', 'ilike', '0004711')]),
+        ('resi exact', 'sale.order', [('tracking_number', '=', 'SPXID000000471100')]),
+        ('order number substring', 'sale.order', [('nomor_pesanan', 'ilike', '0000123')]),
+        ('order number exact', 'sale.order', [('nomor_pesanan', '=', '24090000012345AB')]),
+        ('buyer exact', 'sale.order', [('buyer_username', '=', 'buyer4711')]),
+        ('buyer substring', 'sale.order', [('buyer_username', 'ilike', 'yer471')]),
+        ('status per marketplace', 'sale.order', [('order_status', '=', 'Batal'),
+                                                  ('sale_marketplace', '=', marketplace.id)]),
+        ('sku exact', 'sale.order.line', [('sku_reference', '=', 'SKU-0042')]),
+    ]
+
+
+def scan_nodes(env, model, domain, limit):
+    """Return the scan nodes of the query plan of a search"""
+    from odoo.tools import SQL
+    query = env[model]._search(domain, limit=limit)
+    env.cr.execute(SQL("EXPLAIN %s", query.select()))
+    plan = '\n'.join(line for line, in env.cr.fetchall())
+    return sorted(set(re.findall(r'((?:Parallel )?(?:Seq|Index Only|Index|Bitmap Index|Bitmap Heap) Scan)(?: using (\w+))?', plan)))
+
+
+def measure(env, model, domain, limit, repeat):
+    """Median wall time of a search in ms, without the record cache"""
+    timings = []
+    for _ in range(repeat):
+        env.invalidate_all()
+        started = time.perf_counter()
+        env[model].search(domain, limit=limit)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the order lookups of the customer service")
+    parser.add_argument('-c', '--config', help="Odoo configuration file")
+    parser.add_argument('-d', '--database', required=True)
+    parser.add_argument('--orders', type=int, default=200000)
+    parser.add_argument('--buyers', type=int, default=50000)
+    parser.add_argument('--skus', type=int, default=500)
+    parser.add_argument('--limit', type=int, default=80, help="Rows per search, as in a list view")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    import odoo
+    from odoo.tools import config
+    config.parse_config(['-c', args.config] if args.config else [])
+    registry = odoo.modules.registry.Registry(args.database)
+
+    with registry.cursor() as cr:
+        try:
+            env = odoo.api.Environment(cr, odoo.SUPERUSER_ID, {})
+            started = time.perf_counter()
+            marketplace = seed(env, args.orders, args.buyers, args.skus)
+            print("seeded %d orders in %.1f s" % (args.orders, time.perf_counter() - started))
+            for label, model, domain in lookups(marketplace):
+                latency = measure(env, model, domain, args.limit, args.repeat)
+                scans = ', '.join(' '.join(filter(None, node)) for node in scan_nodes(env, model, domain, args.limit))
+                print("%-24s %9.2f ms  %s" % (label, latency, scans))
+        finally:
+            cr.rollback()
+
+
+if __name__ == '__main__':
+    main()
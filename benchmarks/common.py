@@ -0,0 +1,28 @@
+"""
+Utilitas pengukuran bersama untuk script benchmark.
+"""
+import multiprocessing
+import resource
+import time
+
+
+def _run(func, queue):
+    """Run func in a forked process, reporting its row count, time and RSS growth"""
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((count, elapsed, max(peak - baseline, 0)))
+
+
+def measure(label, func):
+    """Measure func in a fresh process so peak memory of one reader does not hide the next"""
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    process = context.Process(target=_run, args=(func, queue))
+    process.start()
+    count, elapsed, peak_kb = queue.get()
+    process.join()
+    print("%-22s %8d rows %8.2f s %10.0f rows/s %8.1f MB peak RSS growth" % (
+        label, count, elapsed, count / elapsed if elapsed else 0, peak_kb / 1024))
@@ -0,0 +1,187 @@
+"""
+Generator file export Shopee sintetis untuk benchmark.
+
+Data dibuat secara deterministik (seed tetap) sehingga hasil benchmark dapat
+dibandingkan antar run. Modul ini tidak bergantung pada Odoo.
+
+File export dapat ditulis langsung untuk diimport lewat wizard:
+
+    python benchmarks/shopee_export.py orders.csv --scenario 50k --encoding windows-1252
+"""
+import argparse
+import csv
+import io
+import random
+from datetime import datetime, timedelta
+
+SHOPEE_HEADERS = [
+    'No. Pesanan', 'Status Pesanan', 'Status Pembatalan/ Pengembalian', 'No. Resi',
+    'Opsi Pengiriman', 'Antar ke counter/ pick-up',
+    'Pesanan Harus Dikirimkan Sebelum (Menghindari keterlambatan)', 'Waktu Pesanan Dibuat',
+    'Waktu Pembayaran Dilakukan', 'Metode Pembayaran', 'SKU Induk', 'Nama Produk',
+    'Nomor Referensi SKU', 'Nama Variasi', 'Harga Awal', 'Harga Setelah Diskon', 'Jumlah',
+    'Returned quantity', 'Diskon Dari Penjual', 'Diskon Dari Shopee', 'Berat Produk',
+    'Total Berat', 'Voucher Ditanggung Penjual', 'Cashback Koin', 'Voucher Ditanggung Shopee',
+    'Paket Diskon', 'Paket Diskon (Diskon dari Shopee)', 'Paket Diskon (Diskon dari Penjual)',
+    'Potongan Koin Shopee', 'Diskon Kartu Kredit', 'Ongkos Kirim Dibayar oleh Pembeli',
+    'Estimasi Potongan Biaya Pengiriman', 'Ongkos Kirim Pengembalian Barang',
+    'Perkiraan Ongkos Kirim', 'Catatan dari Pembeli', 'Username (Pembeli)', 'Nama Penerima',
+    'No. Telepon', 'Alamat Pengiriman', 'Kota/Kabupaten', 'Provinsi', 'Waktu Pesanan Selesai',
+]
+
+STATUSES = ['Perlu Dikirim', 'Sedang Dikirim', 'Selesai', 'Selesai', 'Selesai', 'Batal']
+CARRIERS = ['J&T Express', 'SPX Standard', 'SiCepat REG', 'JNE Reguler', 'Anteraja Reguler']
+PROVINCES = ['DKI Jakarta', 'Jawa Barat', 'Jawa Tengah', 'Jawa Timur', 'Banten', 'Bali']
+CITIES = ['KOTA JAKARTA SELATAN', 'KAB. BANDUNG', 'KOTA SEMARANG', 'KOTA SURABAYA', 'KOTA TANGERANG']
+# Teks non-ASCII yang masih dapat ditulis dalam windows-1252, untuk menguji encoding
+NON_ASCII_WORDS = ['Café', 'Crème', 'Jalan Ñusa', 'Über', 'Señora']
+
+# Skenario standar: buyers menentukan seberapa sering pembeli berulang,
+# skus menentukan kardinalitas produk
+SCENARIOS = {
+    '1k': {'lines': 1000, 'lines_per_order': 2, 'buyers': 400, 'skus': 200},
+    '50k': {'lines': 50000, 'lines_per_order': 2, 'buyers': 15000, 'skus': 2000},
+    '500k': {'lines': 500000, 'lines_per_order': 2, 'buyers': 120000, 'skus': 10000},
+}
+FILE_FORMATS = ('csv', 'xls', 'xlsx')
+CSV_ENCODINGS = ('utf-8', 'utf-8-sig', 'windows-1252')
+# Batas baris data satu sheet XLS
+XLS_MAX_ROWS = 65535
+
+
+def iter_shopee_rows(lines=1000, lines_per_order=2, seed=42, buyers=None, skus=500, non_ascii=False):
+    """
+    Yield synthetic Shopee export rows as lists ordered like SHOPEE_HEADERS.
+    buyers is the number of distinct buyers (fewer buyers, more repeat
+    orders), skus the number of distinct products, and non_ascii adds
+    accented words to the free-text columns
+    """
+    rng = random.Random(seed)
+    buyers = buyers or lines // 3 + 1
+    start = datetime(2024, 9, 1, 8, 0)
+    order_index = 0
+    produced = 0
+    while produced < lines:
+        order_index += 1
+        created = start + timedelta(minutes=order_index * 7)
+        status = rng.choice(STATUSES)
+        username = 'buyer%05d' % rng.randrange(buyers)
+        header = {
+            'No. Pesanan': '2409%010d' % order_index,
+            'Status Pesanan': status,
+            'Status Pembatalan/ Pengembalian': '',
+            'No. Resi': 'SPXID%012d' % order_index,
+            'Opsi Pengiriman': rng.choice(CARRIERS),
+            'Antar ke counter/ pick-up': rng.choice(['Antar Ke Counter', 'Pick-up']),
+            'Pesanan Harus Dikirimkan Sebelum (Menghindari keterlambatan)': (created + timedelta(days=2)).strftime('%Y-%m-%d %H:%M'),
+            'Waktu Pesanan Dibuat': created.strftime('%Y-%m-%d %H:%M'),
+            'Waktu Pembayaran Dilakukan': (created + timedelta(minutes=5)).strftime('%Y-%m-%d %H:%M'),
+            'Metode Pembayaran': rng.choice(['ShopeePay', 'COD', 'Transfer Bank']),
+            'Username (Pembeli)': username,
+            'Nama Penerima': username.upper(),
+            'No. Telepon': '628%09d' % rng.randrange(10 ** 9),
+            'Alamat Pengiriman': 'Jl. %s No. %d' % (
+                NON_ASCII_WORDS[order_index % len(NON_ASCII_WORDS)] if non_ascii else 'Contoh', rng.randrange(1, 200)),
+            'Kota/Kabupaten': rng.choice(CITIES),
+            'Provinsi': rng.choice(PROVINCES),
+            'Waktu Pesanan Selesai': (created + timedelta(days=4)).strftime('%Y-%m-%d %H:%M') if status == 'Selesai' else '',
+        }
+        for line_index in range(lines_per_order):
+            if produced >= lines:
+                break
+            produced += 1
+            sku = 'SKU-%05d' % rng.randrange(skus)
+            price = rng.randrange(10, 500) * 1000
+            quantity = rng.randrange(1, 4)
+            row = dict(header)
+            row.update({
+                'SKU Induk': sku.split('-')[0],
+                'Nama Produk': '%s %s' % (NON_ASCII_WORDS[int(sku[4:]) % len(NON_ASCII_WORDS)] if non_ascii else 'Produk', sku),
+                'Nomor Referensi SKU': sku,
+                'Nama Variasi': rng.choice(['', 'Merah', 'Biru', 'XL']),
+                'Harga Awal': str(price),
+                'Harga Setelah Diskon': str(price - rng.randrange(0, 5) * 1000),
+                'Jumlah': str(quantity),
+                'Returned quantity': '0',
+                'Berat Produk': '250 gr',
+                'Total Berat': '%d gr' % (250 * quantity),
+            })
+            yield [row.get(header_name, '0') for header_name in SHOPEE_HEADERS]
+
+
+def build_xlsx(rows):
+    """Build an XLSX export in memory"""
+    import openpyxl
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(SHOPEE_HEADERS)
+    for row in rows:
+        sheet.append(row)
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+def build_xls(rows):
+    """Build an XLS export in memory (XLS is limited to 65535 data rows)"""
+    import xlwt
+    workbook = xlwt.Workbook()
+    sheet = workbook.add_sheet('orders')
+    for col_idx, value in enumerate(SHOPEE_HEADERS):
+        sheet.write(0, col_idx, value)
+    for row_idx, row in enumerate(rows, start=1):
+        if row_idx > 65535:
+            break
+        for col_idx, value in enumerate(row):
+            sheet.write(row_idx, col_idx, value)
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+def build_csv(rows, encoding='utf-8'):
+    """Build a CSV export in memory with the given encoding"""
+    output = io.StringIO(newline='')
+    writer = csv.writer(output)
+    writer.writerow(SHOPEE_HEADERS)
+    writer.writerows(rows)
+    return output.getvalue().encode(encoding)
+
+
+def build_export(file_format, rows, encoding='utf-8'):
+    """Build an export of the given format, the encoding only applies to CSV"""
+    if file_format == 'csv':
+        return build_csv(rows, encoding)
+    if file_format == 'xls':
+        return build_xls(rows)
+    if file_format == 'xlsx':
+        return build_xlsx(rows)
+    raise ValueError('Unknown file format %s' % file_format)
+
+
+def build_scenario(scenario, file_format='csv', encoding='utf-8', seed=42):
+    """Build the export file of a standard scenario"""
+    params = SCENARIOS[scenario]
+    if file_format == 'xls' and params['lines'] > XLS_MAX_ROWS:
+        raise ValueError('Scenario %s has more rows than an XLS sheet can hold' % scenario)
+    rows = iter_shopee_rows(seed=seed, non_ascii=encoding != 'utf-8', **params)
+    return build_export(file_format, rows, encoding)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic Shopee export file")
+    parser.add_argument('output', help="File to write, its extension gives the format")
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), default='1k')
+    parser.add_argument('--encoding', choices=CSV_ENCODINGS, default='utf-8')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    file_format = args.output.rsplit('.', 1)[-1].lower()
+    if file_format not in FILE_FORMATS:
+        parser.error('The output extension must be one of %s' % ', '.join(FILE_FORMATS))
+    with open(args.output, 'wb') as output:
+        output.write(build_scenario(args.scenario, file_format, args.encoding, args.seed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+from odoo import api, http
+from odoo.http import request, content_disposition
+
+
+class SaleExportController(http.Controller):
+
+    @http.route('/sale_export/<int:wizard_id>', type='http', auth='user')
+    def export_file(self, wizard_id, **kwargs):
+        """Stream the export file of the wizard to the browser as it is produced"""
+        wizard = request.env['sale.export.wizard'].browse(wizard_id).exists()
+        if not wizard:
+            return request.not_found()
+        wizard.check_access('read')
+
+        # Cursor request sudah ditutup saat body response dikirim, jadi
+        # generator membuka cursor sendiri untuk membaca data secara bertahap
+        registry = request.env.registry
+        uid = request.env.uid
+        context = dict(request.env.context)
+
+        def generate():
+            with registry.cursor() as cr:
+                env = api.Environment(cr, uid, context)
+                yield from env['sale.export.wizard'].browse(wizard_id)._iter_export_file()
+
+        return request.make_response(generate(), headers=[
+            ('Content-Type', wizard._get_export_mimetype()),
+            ('Content-Disposition', content_disposition(wizard._get_export_filename())),
+        ])
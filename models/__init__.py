@@ -1 +1,9 @@
-from . import sale_import
\ No newline at end of file
+from . import sale_import
+from . import sale_import_profile
+from . import sale_import_job
+from . import sale_import_bulk
+from . import sale_import_status
+from . import sale_import_log
+from . import sale_confirm_job
+from . import sale_buyer_identity
+from . import sale_settlement_summary
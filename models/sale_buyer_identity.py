@@ -0,0 +1,134 @@
+from odoo import models, fields, api
+from odoo.tools import sql
+import logging
+
+from ..tools import buyers
+
+_logger = logging.getLogger(__name__)
+
+# Pembeli yang sudah tersimpan di database, dipakai bersama oleh semua import di proses ini
+_buyer_cache = buyers.LRUCache()
+
+
+class SaleBuyerIdentity(models.Model):
+    _name = 'sale.buyer.identity'
+    _description = 'Marketplace Buyer Identity'
+    _order = 'marketplace_id, normalized_username'
+    _rec_name = 'username'
+
+    marketplace_id = fields.Many2one('market.place', string='Marketplace', readonly=True, ondelete='cascade')
+    username = fields.Char(string='Username', required=True, readonly=True)
+    normalized_username = fields.Char(string='Normalized Username', required=True, readonly=True)
+    normalized_phone = fields.Char(string='Normalized Phone', readonly=True, index='btree_not_null')
+    partner_id = fields.Many2one('res.partner', string='Customer', required=True, ondelete='cascade', index=True)
+
+    def init(self):
+        """
+        Unique key on the marketplace and the normalized username, then fill
+        the identities of the buyers imported before this table existed
+        """
+        super().init()
+        cr = self.env.cr
+        if not sql.index_exists(cr, 'sale_buyer_identity_marketplace_username_uniq'):
+            sql.create_unique_index(cr, 'sale_buyer_identity_marketplace_username_uniq', self._table,
+                                    ['COALESCE(marketplace_id, 0)', 'normalized_username'])
+        cr.execute("SELECT 1 FROM sale_buyer_identity LIMIT 1")
+        if cr.fetchone():
+            return
+        # Normalisasi harus sama dengan tools.buyers.normalize_username
+        cr.execute("""
+            INSERT INTO sale_buyer_identity (marketplace_id, username, normalized_username, partner_id,
+                                             create_uid, write_uid, create_date, write_date)
+            SELECT DISTINCT ON (COALESCE(sale_marketplace, 0), key)
+                   sale_marketplace, buyer_username, key, partner_id,
+                   1, 1, now() AT TIME ZONE 'UTC', now() AT TIME ZONE 'UTC'
+              FROM sale_order,
+                   LATERAL (SELECT lower(regexp_replace(btrim(buyer_username), '\\s+', ' ', 'g')) AS key) normalized
+             WHERE buyer_username IS NOT NULL AND key <> ''
+          ORDER BY COALESCE(sale_marketplace, 0), key, id
+            ON CONFLICT DO NOTHING
+        """)
+        if cr.rowcount:
+            _logger.info("Created %s buyer identities from the imported orders", cr.rowcount)
+
+    def write(self, vals):
+        _buyer_cache.clear()
+        return super().write(vals)
+
+    def unlink(self):
+        _buyer_cache.clear()
+        return super().unlink()
+
+    @api.model
+    def _clear_cache(self):
+        """Forget the cached buyers, some of them may belong to a rolled back transaction"""
+        _buyer_cache.clear()
+
+    @api.model
+    def _resolve_buyers(self, marketplace, buyer_vals):
+        """
+        Return the partner id of each buyer username of a marketplace, in
+        bulk. buyer_vals maps the username to the partner values used when
+        the buyer is new; a partner and its identity are then created.
+
+        Nothing here serializes concurrent callers: a buyer committed by
+        another transaction after the snapshot of this one is not found, and
+        its identity insert fails on the unique key. Imports call this from
+        a separate transaction started under locks on the buyer keys, see
+        sale.import.job._create_shared_records
+        """
+        keys = {username: buyers.normalize_username(username) for username in buyer_vals}
+        dbname = self.env.cr.dbname
+        result = {}
+        missing = {}
+        for username, key in keys.items():
+            partner_id = _buyer_cache.get((dbname, marketplace.id, key))
+            if partner_id:
+                result[username] = partner_id
+            elif key:
+                missing.setdefault(key, username)
+        if result:
+            # Pelanggan dapat dihapus atau digabung di proses lain, id dari cache diperiksa sekali per panggilan
+            existing = set(self.env['res.partner'].browse(set(result.values())).exists().ids)
+            for username, partner_id in list(result.items()):
+                if partner_id not in existing:
+                    del result[username]
+                    _buyer_cache.discard((dbname, marketplace.id, keys[username]))
+                    missing.setdefault(keys[username], username)
+        if not missing:
+            return result
+
+        found = {}
+        for identity in self.search_read([
+            ('marketplace_id', '=', marketplace.id),
+            ('normalized_username', 'in', list(missing)),
+        ], ['normalized_username', 'partner_id'], load=None):
+            found[identity['normalized_username']] = identity['partner_id']
+            _buyer_cache.put((dbname, marketplace.id, identity['normalized_username']), identity['partner_id'])
+
+        to_create = [key for key in missing if key not in found]
+        if to_create:
+            # Identitas baru tidak masuk cache sampai ditemukan lagi setelah di-commit
+            partners = self.env['res.partner'].create([buyer_vals[missing[key]] for key in to_create])
+            self.create([{
+                'marketplace_id': marketplace.id,
+                'username': missing[key],
+                'normalized_username': key,
+                'normalized_phone': buyers.normalize_phone(buyer_vals[missing[key]].get('phone')),
+                'partner_id': partner.id,
+            } for key, partner in zip(to_create, partners)])
+            found.update(zip(to_create, partners.ids))
+
+        for username, key in keys.items():
+            if username not in result and key in found:
+                result[username] = found[key]
+        return result
+
+
+class ResPartner(models.Model):
+    _inherit = 'res.partner'
+
+    def unlink(self):
+        # Identitas pembeli ikut terhapus (cascade), termasuk saat pelanggan digabung
+        _buyer_cache.clear()
+        return super().unlink()
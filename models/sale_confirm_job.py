@@ -0,0 +1,214 @@
+from odoo import models, fields, api, _
+import logging
+import time
+
+from .sale_import_job import cron_time_limit
+
+_logger = logging.getLogger(__name__)
+
+
+class SaleConfirmJob(models.Model):
+    _name = 'sale.confirm.job'
+    _description = 'Sale Mass Confirmation Job'
+    _order = 'id desc'
+
+    name = fields.Char(string='Name', required=True, readonly=True)
+    order_ids = fields.Many2many('sale.order', string='Orders', readonly=True)
+    batch_size = fields.Integer(string='Orders per Commit', default=100,
+                                help="Number of orders confirmed and committed together.")
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', default='draft', required=True, readonly=True, copy=False)
+    order_count = fields.Integer(string='Orders to Confirm', readonly=True)
+    confirmed_count = fields.Integer(string='Confirmed Orders', readonly=True, copy=False)
+    error_count = fields.Integer(string='Errors', readonly=True, copy=False)
+    error_log = fields.Text(string='Failure Reason', readonly=True, copy=False)
+    error_ids = fields.One2many('sale.confirm.job.error', 'job_id', string='Failed Orders', readonly=True)
+    processing_time = fields.Float(string='Processing Time (s)', readonly=True, copy=False)
+    date_started = fields.Datetime(string='Started On', readonly=True, copy=False)
+    date_finished = fields.Datetime(string='Finished On', readonly=True, copy=False)
+    progress = fields.Float(string='Progress', compute='_compute_progress')
+    user_id = fields.Many2one('res.users', string='Requested By', default=lambda self: self.env.user, readonly=True)
+
+    @api.depends('order_count', 'confirmed_count', 'error_count')
+    def _compute_progress(self):
+        for job in self:
+            done = job.confirmed_count + job.error_count
+            job.progress = min(100.0, 100.0 * done / job.order_count) if job.order_count else 0.0
+
+    @api.model
+    def _create_job(self, orders, batch_size=None):
+        """Create a job confirming the quotations among the given orders"""
+        orders = orders.filtered(lambda order: order.state in ('draft', 'sent'))
+        vals = {
+            'name': _('Confirm %s orders', len(orders)),
+            'order_ids': [(6, 0, orders.ids)],
+            'order_count': len(orders),
+        }
+        if batch_size:
+            vals['batch_size'] = batch_size
+        return self.create(vals)
+
+    def _get_remaining_orders(self):
+        """Orders of the job still to confirm, the failed ones are not retried"""
+        return self.env['sale.order'].search([
+            ('id', 'in', self.order_ids.ids),
+            ('state', 'in', ('draft', 'sent')),
+            ('id', 'not in', self.error_ids.order_id.ids),
+        ], order='id')
+
+    def _confirm_batch(self, orders):
+        """
+        Confirm the orders with a single action_confirm call, falling back to
+        one call per order to isolate the failing ones. Return the confirmed
+        orders and the (order, message) of the failed ones
+        """
+        try:
+            with self.env.cr.savepoint():
+                orders.action_confirm()
+            return orders, []
+        except Exception:
+            pass
+
+        confirmed = self.env['sale.order']
+        errors = []
+        for order in orders:
+            try:
+                with self.env.cr.savepoint():
+                    order.action_confirm()
+            except Exception as e:
+                errors.append((order, str(e)))
+                continue
+            confirmed |= order
+        return confirmed, errors
+
+    def _commit_batch(self):
+        """Commit the batch and release the record cache"""
+        if not self.env.registry.in_test_mode():
+            self.env.cr.commit()
+        self.env.invalidate_all()
+
+    def _try_lock(self):
+        """Session-level advisory lock on the job, see sale.import.job"""
+        self.env.cr.execute("SELECT pg_try_advisory_lock(hashtext(%s), %s)", (self._name, self.id))
+        return self.env.cr.fetchone()[0]
+
+    def _unlock(self):
+        self.env.cr.execute("SELECT pg_advisory_unlock(hashtext(%s), %s)", (self._name, self.id))
+
+    def _run(self, time_limit=None):
+        """
+        Confirm the remaining orders batch by batch. Return True when all of
+        them have been processed, False when the time limit was reached and
+        None when the job is already being processed by another worker
+        """
+        self.ensure_one()
+        if self.user_id and self.env.uid != self.user_id.id:
+            # Pesanan dikonfirmasi atas nama pengguna yang meminta, juga saat dijalankan oleh cron
+            return self.with_user(self.user_id).with_company(self.user_id.company_id)._run(time_limit)
+        if self.state not in ('draft', 'queued', 'running'):
+            return True
+        if not self._try_lock():
+            _logger.info("Confirmation job %s is already being processed", self.id)
+            return None
+        try:
+            return self._process(time_limit)
+        except Exception as e:
+            self.env.cr.rollback()
+            self.env.invalidate_all()
+            _logger.exception("Confirmation job %s failed", self.id)
+            self.write({'state': 'failed', 'error_log': str(e)})
+            self._commit_batch()
+            raise
+        finally:
+            self._unlock()
+
+    def _process(self, time_limit=None):
+        deadline = time.monotonic() + time_limit if time_limit else None
+        vals = {'state': 'running'}
+        if not self.date_started:
+            vals['date_started'] = fields.Datetime.now()
+        self.write(vals)
+        self._commit_batch()
+
+        remaining = self._get_remaining_orders()
+        batch_size = max(self.batch_size, 1)
+        for start in range(0, len(remaining), batch_size):
+            started = time.monotonic()
+            batch = remaining[start:start + batch_size]
+            confirmed, errors = self._confirm_batch(batch)
+            self.env['sale.confirm.job.error'].create([{
+                'job_id': self.id,
+                'order_id': order.id,
+                'message': message,
+            } for order, message in errors])
+            self.write({
+                'confirmed_count': self.confirmed_count + len(confirmed),
+                'error_count': self.error_count + len(errors),
+                'processing_time': self.processing_time + time.monotonic() - started,
+            })
+            self._commit_batch()
+            if deadline and time.monotonic() > deadline:
+                return False
+
+        _logger.info("Confirmation job %s: %s confirmed, %s failed", self.id, self.confirmed_count, self.error_count)
+        self.write({'state': 'done', 'date_finished': fields.Datetime.now()})
+        self._commit_batch()
+        return True
+
+    @api.model
+    def _cron_process_jobs(self):
+        """Process the queued jobs one at a time within the cron time budget"""
+        jobs = self.search([('state', 'in', ('queued', 'running'))], order='id')
+        for job in jobs:
+            try:
+                finished = job._run(time_limit=cron_time_limit())
+            except Exception:
+                continue
+            if finished is None:
+                continue
+            if not finished or len(jobs) > 1:
+                self.env.ref('%s.ir_cron_sale_confirm_job' % self._module)._trigger()
+            return
+
+    def action_queue(self):
+        """Queue the job to be processed in the background"""
+        self.filtered(lambda job: job.state in ('draft', 'failed')).write({'state': 'queued'})
+        self.env.ref('%s.ir_cron_sale_confirm_job' % self._module)._trigger()
+        return True
+
+    def _get_form_action(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Confirmation Job'),
+            'res_model': self._name,
+            'view_mode': 'form',
+            'res_id': self.id,
+        }
+
+    def action_view_orders(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Orders'),
+            'res_model': 'sale.order',
+            'view_mode': 'list,form',
+            'domain': [('id', 'in', self.order_ids.ids)],
+            'context': {'create': False},
+        }
+
+
+class SaleConfirmJobError(models.Model):
+    _name = 'sale.confirm.job.error'
+    _description = 'Sale Mass Confirmation Failed Order'
+    _order = 'job_id, id'
+
+    job_id = fields.Many2one('sale.confirm.job', string='Confirmation Job', required=True, ondelete='cascade',
+                             index=True)
+    order_id = fields.Many2one('sale.order', string='Order', readonly=True, ondelete='cascade')
+    message = fields.Text(string='Error', readonly=True)
@@ -1,19 +1,22 @@
 from odoo import models, fields, api
-from odoo.exceptions import UserError, ValidationError
+from odoo.tools import sql
 from odoo.tools.translate import _
-import base64
-import csv
-import io
+import contextlib
 import logging
-from datetime import datetime
+
+from .sale_settlement_summary import LINE_AMOUNT_FIELDS, ORDER_AMOUNT_FIELDS, ORDER_KEY_FIELDS
 
 _logger = logging.getLogger(__name__)
 
+# Field pesanan dan baris pesanan yang mengubah ringkasan settlement (sale.settlement.summary)
+SETTLEMENT_TRIGGER_FIELDS = set(ORDER_KEY_FIELDS + ORDER_AMOUNT_FIELDS + ['order_line', 'order_creation_time', 'date_order'])
+SETTLEMENT_LINE_TRIGGER_FIELDS = set(LINE_AMOUNT_FIELDS + ['order_id', 'price_unit', 'discount', 'product_uom_qty', 'tax_id'])
+
 class SaleOrder(models.Model):
     _inherit = 'sale.order'
 
     # Fields tambahan pada sale.order
-    nomor_pesanan = fields.Char(string='No. Pesanan',index=True)
+    nomor_pesanan = fields.Char(string='No. Pesanan', index='trigram', copy=False)
     order_status = fields.Selection([
         ('Belum Bayar', 'Belum Bayar'),
         ('Perlu Dikirim', 'Perlu Dikirim'),
@@ -22,9 +25,9 @@ class SaleOrder(models.Model):
         ('Batal', 'Batal'),
         ('Pengembalian', 'Pengembalian'),
         ('Pengiriman Gagal', 'Pengiriman Gagal')
-    ], string='Status Pesanan')
+    ], string='Status Pesanan', index=True)
     cancellation_return_status = fields.Char(string='Status Pembatalan/Pengembalian')
-    tracking_number = fields.Char(string='No. Resi')
+    tracking_number = fields.Char(string='No. Resi', index='trigram')
     opsi_pengiriman = fields.Char(string='Opsi Pengiriman')
     shipping_option = fields.Selection([
         ('antar counter', 'Antar Ke Counter'),
@@ -49,33 +52,132 @@ class SaleOrder(models.Model):
     return_shipping_fee = fields.Float(string='Ongkos Kirim Pengembalian Barang')
     estimated_shipping_fee = fields.Float(string='Perkiraan Ongkos Kirim')
     buyer_note = fields.Text(string='Catatan dari Pembeli')
-    buyer_username = fields.Char(string='Username (Pembeli)')
+    buyer_username = fields.Char(string='Username (Pembeli)', index='trigram')
     receiver_name = fields.Char(string='Nama Penerima') 
     receiver_phone = fields.Char(string='No. Telepon')
     shipping_address = fields.Text(string='Alamat Pengiriman')
     city = fields.Char(string='Kota/Kabupaten')
     province = fields.Char(string='Provinsi')
     order_completion_time = fields.Datetime(string='Waktu Pesanan Selesai')
-    sale_marketplace = fields.Many2one('market.place', string='Marketplace')
-    
+    sale_marketplace = fields.Many2one('market.place', string='Marketplace', index=True)
+    import_job_id = fields.Many2one('sale.import.job', string='Import Job', readonly=True, copy=False,
+                                    index='btree_not_null')
+    import_order_hash = fields.Char(string='Import Order Hash', readonly=True, copy=False, index='btree_not_null',
+                                    help="Content hash of the order columns of the imported source rows, used with "
+                                         "the line hashes to skip unchanged orders on re-import. Not refreshed by the "
+                                         "status sync, so an order whose status was synced is processed again by "
+                                         "the next full import.")
+    settlement_date = fields.Date(string='Settlement Day', compute='_compute_settlement_date', store=True, index=True,
+                                  help="Day of the order in the settlement summary: order creation time, or order date.")
+
+    def _auto_init(self):
+        # Kolom diisi dengan SQL agar pemasangan tidak menghitung jutaan pesanan lewat ORM
+        if not sql.column_exists(self.env.cr, 'sale_order', 'settlement_date'):
+            sql.create_column(self.env.cr, 'sale_order', 'settlement_date', 'date')
+            self.env.cr.execute("UPDATE sale_order SET settlement_date = COALESCE(order_creation_time, date_order)::date")
+        return super()._auto_init()
+
+    @api.depends('order_creation_time', 'date_order')
+    def _compute_settlement_date(self):
+        for order in self:
+            moment = order.order_creation_time or order.date_order
+            order.settlement_date = moment.date() if moment else False
+
+    def init(self):
+        super().init()
+        self._init_trigram_indexes()
+        self._init_order_number_key()
+
+    def _init_trigram_indexes(self):
+        """
+        Drop the btree index of the order number created by the previous
+        versions, the registry then creates the trigram index under the same
+        name. Exact lookups use the unique key of the order number, which
+        starts with the same column
+        """
+        if not self.env.registry.has_trigram:
+            return
+        cr = self.env.cr
+        cr.execute("SELECT indexdef FROM pg_indexes WHERE indexname = 'sale_order__nomor_pesanan_index'")
+        row = cr.fetchone()
+        if row and 'USING btree' in row[0]:
+            _logger.info("Replacing the btree index of sale_order.nomor_pesanan by a trigram index")
+            cr.execute("DROP INDEX sale_order__nomor_pesanan_index")
+
+    def _init_order_number_key(self):
+        """
+        One order per number and marketplace, so concurrent imports of the
+        same file cannot create the same order twice
+        """
+        cr = self.env.cr
+        cr.execute("SELECT 1 FROM pg_indexes WHERE indexname = 'sale_order_nomor_pesanan_marketplace_uniq'")
+        if cr.fetchone():
+            return
+        cr.execute("""
+            SELECT nomor_pesanan FROM sale_order
+             WHERE nomor_pesanan IS NOT NULL
+          GROUP BY nomor_pesanan, COALESCE(sale_marketplace, 0)
+            HAVING COUNT(*) > 1
+             LIMIT 5
+        """)
+        duplicates = [row[0] for row in cr.fetchall()]
+        if duplicates:
+            # Data lama dengan nomor ganda harus dibersihkan dulu sebelum indeks dibuat
+            _logger.warning("Unique key on sale_order (nomor_pesanan, sale_marketplace) not created, "
+                            "duplicated order numbers: %s", ', '.join(duplicates))
+            return
+        cr.execute("""
+            CREATE UNIQUE INDEX sale_order_nomor_pesanan_marketplace_uniq
+                ON sale_order (nomor_pesanan, COALESCE(sale_marketplace, 0))
+             WHERE nomor_pesanan IS NOT NULL
+        """)
 
     # Untuk Odoo 17 fungsi _amount_all berubah menjadi _compute_amounts
     @api.depends('order_line.price_total')
     def _compute_amounts(self):
-        for order in self:
-            res = super(SaleOrder, self)._compute_amounts()
-        return res
+        # super() sudah menghitung seluruh recordset, cukup dipanggil sekali
+        return super(SaleOrder, self)._compute_amounts()
 
-    @api.model
-    def create(self, vals):
-        if 'nomor_pesanan' in vals:
-            vals['client_order_ref'] = vals['nomor_pesanan']
-        return super(SaleOrder, self).create(vals)
+    @contextlib.contextmanager
+    def _defer_amount_compute(self):
+        """
+        Keep the amounts and taxes of the orders from being recomputed by the
+        flushes inside the block, then mark them to be recomputed once for
+        all of them at the next flush
+        """
+        amount_fields = [field for field in self._fields.values()
+                         if field.compute == '_compute_amounts' and field.store]
+        with self.env.protecting(amount_fields, self):
+            yield
+        for field in amount_fields:
+            self.env.add_to_compute(field, self.exists())
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if 'nomor_pesanan' in vals:
+                vals['client_order_ref'] = vals['nomor_pesanan']
+        orders = super(SaleOrder, self).create(vals_list)
+        Summary = self.env['sale.settlement.summary']
+        Summary._mark_dirty(Summary._get_keys(orders))
+        return orders
 
     def write(self, vals):
         if 'nomor_pesanan' in vals:
             vals['client_order_ref'] = vals['nomor_pesanan']
-        return super(SaleOrder, self).write(vals)        
+        Summary = self.env['sale.settlement.summary']
+        if not SETTLEMENT_TRIGGER_FIELDS.isdisjoint(vals):
+            # Kunci lama dan kunci baru sama-sama berubah jumlahnya
+            Summary._mark_dirty(Summary._get_keys(self))
+            res = super(SaleOrder, self).write(vals)
+            Summary._mark_dirty(Summary._get_keys(self))
+            return res
+        return super(SaleOrder, self).write(vals)
+
+    def unlink(self):
+        Summary = self.env['sale.settlement.summary']
+        Summary._mark_dirty(Summary._get_keys(self))
+        return super(SaleOrder, self).unlink()
     
     @api.constrains('order_status', 'order_completion_time')
     def _check_order_status(self):
@@ -100,17 +202,25 @@ class SaleOrder(models.Model):
 
     def action_confirm(self):
         res = super(SaleOrder, self).action_confirm()
-        for order in self:
-            pickings = order.picking_ids.filtered(lambda x: x.state not in ('done', 'cancel'))
-            for picking in pickings:
-                picking.carrier_tracking_ref = order.nomor_pesanan
-        return res            
+        self._set_picking_tracking_ref()
+        return res
+
+    def _set_picking_tracking_ref(self):
+        """Copy the order number on the open pickings of the orders"""
+        pickings = self.picking_ids.filtered(lambda x: x.state not in ('done', 'cancel'))
+        pickings._set_tracking_ref_from_order()
+
+    def action_mass_confirm(self):
+        """Confirm the selected quotations in the background, batch by batch"""
+        job = self.env['sale.confirm.job']._create_job(self)
+        job.action_queue()
+        return job._get_form_action()
     
 class SaleOrderLine(models.Model):
     _inherit = 'sale.order.line'
     
     parent_sku = fields.Char(string='Parent SKU')
-    sku_reference = fields.Char(string='SKU Reference')
+    sku_reference = fields.Char(string='SKU Reference', index=True)
     variation_name = fields.Char(string='Variation Name')
     original_price = fields.Float(string='Harga Awal')
     discounted_price = fields.Float(string='Harga Setelah Diskon')
@@ -119,11 +229,32 @@ class SaleOrderLine(models.Model):
     total_weight = fields.Float(string='Total Weight', digits=(16, 6))
     biaya_administrasi = fields.Float(string='Biaya Administrasi', digits=(16,6))
     biaya_layanan = fields.Float(string='Biaya Layanan (Termasuk PPN 11%)', digits=(16,6))
+    import_row_hash = fields.Char(string='Import Row Hash', readonly=True, copy=False, index=True,
+                                  help="Content hash of the line columns of the imported source row, used to skip unchanged "
+                                       "rows on re-import.")
     
     @api.depends('price_unit', 'discount', 'product_uom_qty', 'tax_id')
     def _compute_amount(self):
-        for line in self:
-            res = super(SaleOrderLine, self)._compute_amount()
+        return super(SaleOrderLine, self)._compute_amount()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super(SaleOrderLine, self).create(vals_list)
+        Summary = self.env['sale.settlement.summary']
+        Summary._mark_dirty(Summary._get_keys(lines.order_id))
+        return lines
+
+    def write(self, vals):
+        res = super(SaleOrderLine, self).write(vals)
+        if not SETTLEMENT_LINE_TRIGGER_FIELDS.isdisjoint(vals):
+            Summary = self.env['sale.settlement.summary']
+            Summary._mark_dirty(Summary._get_keys(self.order_id))
+        return res
+
+    def unlink(self):
+        Summary = self.env['sale.settlement.summary']
+        Summary._mark_dirty(Summary._get_keys(self.order_id))
+        return super(SaleOrderLine, self).unlink()
     
     @api.onchange('original_price')
     def _onchange_original_price(self):
@@ -134,188 +265,96 @@ class SaleImportExport(models.Model):
     _name = 'sale.import.export'
     _description = 'Sale Import Export'
 
-    def import_sale_data(self, csv_data):
-        successful_imports = 0
-        total_rows = 0
-        error_rows = []
-
+    def import_sale_data(self, csv_data, marketplace=None):
+        """
+        Import a CSV export with the same engine as the import wizard, through
+        an import job. Return the number of imported rows, the number of rows
+        and the (row number, error) of the rejected rows
+        """
         # Decode CSV data if necessary
         if isinstance(csv_data, str):
-            csv_file = io.StringIO(csv_data)
+            raw = csv_data.encode('utf-8')
         elif isinstance(csv_data, bytes):
-            csv_file = io.StringIO(csv_data.decode('utf-8'))
+            raw = csv_data
         else:
-            csv_file = csv_data
-        
-        reader = csv.DictReader(csv_file)
-        
-        for row in reader:
-            total_rows += 1
-            try:
-                self._process_sale_row(row)
-                successful_imports += 1
-            except Exception as e:
-                error_rows.append((total_rows, str(e)))
-                _logger.error(f"Error processing row {total_rows}: {str(e)}")
-        
-        return successful_imports, total_rows, error_rows
-
-
-    def _process_sale_row(self, row):
-        # Cari pesanan berdasarkan nomor pesanan
-        order = self.env['sale.order'].search([('name', '=', row.get('No. Pesanan'))], limit=1)
-        if not order:
-            partner = self._get_or_create_partner(row)
-            order_vals = {
-                'name': row.get('No. Pesanan'),
-                'partner_id': partner.id,
-                'order_status': row.get('Status Pesanan'),
-                'cancellation_return_status': row.get('Status Pembatalan/ Pengembalian'),
-                'tracking_number': row.get('No. Resi'),
-                'opsi_pengiriman': row.get('Opsi Pengiriman'),
-                'shipping_option': 'antar counter' if row.get('Antar ke counter/pick-up') == 'Antar Ke Counter' else 'pickup',
-                'must_ship_before': self._parse_datetime(row.get('Pesanan Harus Dikirimkan Sebelum')),
-                'order_creation_time': self._parse_datetime(row.get('Waktu Pesanan Dibuat')),
-                'payment_time': self._parse_datetime(row.get('Waktu Pembayaran Dilakukan')),
-                'payment_method': row.get('Metode Pembayaran'),
-                'seller_discount': self._parse_float(row.get('Diskon Dari Penjual', digits=(16, 6))),
-                'platform_discount': self._parse_float(row.get('Diskon Dari Shopee', digits=(16, 6))),
-                'voucher_seller': self._parse_float(row.get('Voucher Ditanggung Penjual', digits=(16, 6))),
-                'cashback': self._parse_float(row.get('Cashback Koin', digits=(16, 6))),
-                'voucher_platform': self._parse_float(row.get('Voucher Ditanggung Shopee', digits=(16, 6))),
-                'package_discount': self._parse_float(row.get('Paket Diskon', digits=(16, 6))),
-                'package_discount_platform': self._parse_float(row.get('Paket Diskon (Diskon dari Shopee)', digits=(16, 6))),
-                'package_discount_seller': self._parse_float(row.get('Paket Diskon (Diskon dari Penjual)', digits=(16, 6))),
-                'coin_discount': self._parse_float(row.get('Potongan Koin Shopee', digits=(16, 6))),
-                'credit_card_discount': self._parse_float(row.get('Diskon Kartu Kredit', digits=(16, 6))),
-                'shipping_fee_paid_by_buyer': self._parse_float(row.get('Ongkos Kirim Dibayar oleh Pembeli', digits=(16, 6))),
-                'shipping_fee_discount': self._parse_float(row.get('Estimasi Potongan Biaya Pengiriman', digits=(16, 6))),
-                'return_shipping_fee': self._parse_float(row.get('Ongkos Kirim Pengembalian Barang', digits=(16, 6))),
-                'estimated_shipping_fee': self._parse_float(row.get('Perkiraan Ongkos Kirim', digits=(16, 6))),
-                'buyer_note': row.get('Catatan dari Pembeli'),
-                'buyer_username': row.get('Username (Pembeli)'),
-                'receiver_name': row.get('Nama Penerima'),
-                'receiver_phone': row.get('No. Telepon'),
-                'shipping_address': row.get('Alamat Pengiriman'),
-                'city': row.get('Kota/Kabupaten'),
-                'province': row.get('Provinsi'),
-                'order_completion_time': self._parse_datetime(row.get('Waktu Pesanan Selesai')),
-            }
-            order = self.env['sale.order'].create(order_vals)
-
-        # Tambahkan data produk
-        self._process_order_lines(order, row)
-    
-    def _process_order_lines(self, order, row):
-        """
-        Memproses detail produk per baris pesanan
-        """
-        product = self._get_or_create_product(row)
-        line_vals = {
-            'order_id': order.id,
-            'product_id': product.id,
-            'parent_sku': row.get('SKU Induk'),
-            'sku_reference': row.get('Nomor Referensi SKU'),
-            'variation_name': row.get('Nama Variasi'),
-            'original_price': self._parse_float(row.get('Harga Awal')),
-            'discounted_price': self._parse_float(row.get('Harga Setelah Diskon')),
-            'returned_quantity': self._parse_float(row.get('Returned Quantity', 0.0)),
-            'product_uom_qty': self._parse_float(row.get('Jumlah')),
-            'product_weight': self._parse_float(row.get('Berat Produk')),
-            'total_weight': self._parse_float(row.get('Total Berat')),
-        }
-        self.env['sale.order.line'].create(line_vals)
-
-    def _get_or_create_partner(self, row):
-        """
-        Mendapatkan atau membuat mitra berdasarkan nama pembeli
-        """
-        partner = self.env['res.partner'].search([('name', '=', row.get('Username (Pembeli)'))], limit=1)
-        if not partner:
-            partner = self.env['res.partner'].create({
-                'name': row.get('Username (Pembeli)'),
-                'phone': row.get('No. Telepon'),
-                'street': row.get('Alamat Pengiriman'),
-                'city': row.get('Kota/Kabupaten'),
-                'state_id': self._get_state_id(row.get('Provinsi')),
-            })
-        return partner
-    
-    def _get_state_id(self, state_name):
-        """
-        Mendapatkan ID provinsi berdasarkan nama
-        """
-        state = self.env['res.country.state'].search([('name', '=', state_name)], limit=1)
-        if state:
-            return state.id
-        return False
-    
-    def _get_or_create_product(self, row):
-        """
-        Mendapatkan atau membuat produk berdasarkan SKU
-        """
-        product = self.env['product.product'].search([('default_code', '=', row.get('Nomor Referensi SKU'))], limit=1)
-        if not product:
-            product = self.env['product.product'].create({
-                'name': row.get('Nama Produk'),
-                'default_code': row.get('Nomor Referensi SKU'),
-                'list_price': self._parse_float(row.get('Harga Awal')),
-                'weight': self._parse_float(row.get('Berat Produk')),
-            })
-        return product
-    
-    def _parse_float(self, value):
-        """
-        Parse value to float, handling empty cases and preserving precision
-        """
-        if not value:
-            return 0.0
-        try:
-            # Remove thousand separators and replace comma with dot for decimal
-            cleaned_value = value.replace(',', '').replace('.', '').replace(',', '.')
-            return float(cleaned_value)
-        except ValueError:
-            return 0.0
+            raw = csv_data.read()
+            if isinstance(raw, str):
+                raw = raw.encode('utf-8')
+
+        job = self.env['sale.import.job']._create_job({
+            'name': _('Import %s', fields.Datetime.now()),
+            'file_type': 'csv',
+            'marketplace_id': marketplace.id if marketplace else False,
+        }, raw=raw)
+        job._run()
+
+        error_rows = [(error.row_number, error.message) for error in job.error_ids]
+        successful_imports = job.row_offset - len({row_number for row_number, message in error_rows})
+        return successful_imports, job.row_offset, error_rows
 
 class StockPicking(models.Model):
     _inherit = 'stock.picking'
 
-    @api.model
-    def create(self, vals):
-        res = super(StockPicking, self).create(vals)
-        if res.sale_id and res.sale_id.nomor_pesanan:
-            res.carrier_tracking_ref = res.sale_id.nomor_pesanan
+    @api.model_create_multi
+    def create(self, vals_list):
+        res = super(StockPicking, self).create(vals_list)
+        res.filtered(lambda picking: picking.sale_id.nomor_pesanan)._set_tracking_ref_from_order()
         return res
 
+    def _set_tracking_ref_from_order(self):
+        """
+        Copy the number of the sale order on the pickings as their tracking
+        reference, once per number. Pickings already holding their number
+        are not written
+        """
+        pickings_by_ref = {}
+        for picking in self:
+            ref = picking.sale_id.nomor_pesanan
+            if ref and picking.carrier_tracking_ref != ref:
+                pickings_by_ref.setdefault(ref, self.env['stock.picking'])
+                pickings_by_ref[ref] |= picking
+        for ref, pickings in pickings_by_ref.items():
+            pickings.write({'carrier_tracking_ref': ref})
+
+    def _propagate_order_status(self, updates):
+        """
+        Write the new status of the sale orders from a list of (picking,
+        status), once per status. The last status of an order wins and
+        orders already in their new status are not written
+        """
+        status_by_order = {}
+        for picking, status in updates:
+            if picking.sale_id:
+                status_by_order[picking.sale_id] = status
+        orders_by_status = {}
+        for order, status in status_by_order.items():
+            if order.order_status != status:
+                orders_by_status.setdefault(status, self.env['sale.order'])
+                orders_by_status[status] |= order
+        for status, orders in orders_by_status.items():
+            orders.write({'order_status': status})
+
     def button_validate(self):
         """Override metode button_validate untuk mengubah status pesanan menjadi Sedang Dikirim"""
         res = super(StockPicking, self).button_validate()
-        for picking in self:
-            if picking.sale_id and picking.picking_type_code == 'outgoing':
-                picking.sale_id.write({
-                    'order_status': 'Sedang Dikirim'
-                })
+        self._propagate_order_status([
+            (picking, 'Sedang Dikirim') for picking in self if picking.picking_type_code == 'outgoing'
+        ])
         return res
 
     def action_cancel(self):
         """Override metode action_cancel untuk mengubah status pesanan menjadi Batal"""
         res = super(StockPicking, self).action_cancel()
-        for picking in self:
-            if picking.sale_id and picking.picking_type_code == 'outgoing':
-                picking.sale_id.write({
-                    'order_status': 'Batal'
-                })
+        self._propagate_order_status([
+            (picking, 'Batal') for picking in self if picking.picking_type_code == 'outgoing'
+        ])
         return res
 
     def _action_done(self):
         """Override metode _action_done untuk menangani kasus return"""
         res = super(StockPicking, self)._action_done()
-        for picking in self:
-            if picking.sale_id and picking.picking_type_code == 'incoming' and picking.is_return:
-                picking.sale_id.write({
-                    'order_status': 'Pengembalian'
-                })
+        self._propagate_order_status([
+            (picking, 'Pengembalian') for picking in self
+            if picking.picking_type_code == 'incoming' and picking.is_return
+        ])
         return res
-
-
-    
\ No newline at end of file
@@ -0,0 +1,353 @@
+from odoo import models, fields, _
+from odoo.exceptions import UserError
+from odoo.tools import SQL
+import csv
+import io
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Kolom wajib yang diisi dari kolom lain pada baris yang sama, lalu dihitung ulang oleh ORM
+DERIVED_COLUMNS = {
+    'sale.order': {
+        'partner_invoice_id': 'partner_id',
+        'partner_shipping_id': 'partner_id',
+    },
+}
+# Nilai sementara kolom wajib yang dihitung ulang oleh ORM setelah insert
+PLACEHOLDERS = {
+    'varchar': "''",
+    'text': "''",
+    'int4': '0',
+    'numeric': '0',
+    'float8': '0',
+    'bool': 'false',
+}
+# Kolom staging yang bukan field Odoo
+ORDER_KEY_COLUMN = '_order_number'
+ROW_COLUMN = '_row'
+# Baris pesanan yang sudah ada dan dicocokkan dengan baris file, kosong untuk baris baru
+LINE_ID_COLUMN = '_line_id'
+# Kolom log akses, diisi oleh insert
+LOG_ACCESS_COLUMNS = {'create_uid', 'write_uid', 'create_date', 'write_date'}
+
+
+class SaleImportJob(models.Model):
+    _inherit = 'sale.import.job'
+
+    load_mode = fields.Selection([
+        ('orm', 'ORM'),
+        ('copy', 'Bulk SQL (COPY)'),
+    ], string='Load Mode', default='orm', required=True, readonly=True,
+        help="Bulk SQL streams each chunk into a staging table with COPY and inserts the orders and lines with "
+             "set-based SQL, then recomputes the computed fields once. Meant for backfills: no chatter "
+             "messages are posted on the new orders.")
+
+    def _write_orders(self, groups, records, cache, errors, stats):
+        if self.load_mode != 'copy':
+            return super()._write_orders(groups, records, cache, errors, stats)
+        tracker = cache['telemetry']
+        with tracker.phase('resolve'):
+            cache['orders'] = {}
+            self._resolve_import_keys(
+                [records[index] for indexed_rows in groups.values() for index, row in indexed_rows], cache)
+        with tracker.phase('write'):
+            order_rows, line_rows = self._prepare_bulk_rows(groups, records, cache, errors)
+            if not order_rows:
+                return
+            # Partner, produk dan carrier yang dibuat ORM harus ada di database sebelum COPY
+            self.env.flush_all()
+            staged = {
+                'sale.order': self._copy_staging('sale_import_staging_order', self.env['sale.order'],
+                                                 list(order_rows.values()), {ROW_COLUMN: 'int4'}),
+                'sale.order.line': self._copy_staging('sale_import_staging_line', self.env['sale.order.line'],
+                                                      line_rows, {ORDER_KEY_COLUMN: 'varchar', ROW_COLUMN: 'int4',
+                                                                  LINE_ID_COLUMN: 'int4'}),
+            }
+            orders, lines, changed, updated_lines = self._bulk_upsert(order_rows, line_rows, staged, cache, stats)
+        with tracker.phase('recompute'):
+            self._bulk_recompute(orders, lines, changed, updated_lines, staged)
+            self.env['sale.settlement.summary']._refresh_dirty()
+
+    def _prepare_bulk_rows(self, groups, records, cache, errors):
+        """
+        Prepare the order and line values of the chunk the same way as the
+        ORM path. Return {order number: order values} and a list of line
+        values carrying their order number, row number and, for the lines of
+        an existing order, the matched line. Matched lines without changes
+        are left out
+        """
+        order_rows = {}
+        line_rows = []
+        existing_orders = {order.id: order for order in self.env['sale.order'].browse(list(cache['orders'].values()))}
+        for order_number, indexed_rows in groups.items():
+            indexes = [index for index, row in indexed_rows]
+            try:
+                order_vals = self._prepare_order_vals(records[indexes[0]], cache)
+            except Exception as e:
+                self._add_row_errors(errors, indexes, e)
+                continue
+            # Sama dengan SaleOrder.create
+            order_vals['client_order_ref'] = order_vals['nomor_pesanan']
+            order_vals[ROW_COLUMN] = indexes[0]
+            order_rows[order_vals['nomor_pesanan']] = order_vals
+            lines_vals = []
+            for index, row in indexed_rows:
+                try:
+                    line_vals = self._prepare_line_vals(records[index], cache)
+                except Exception as e:
+                    self._add_row_errors(errors, [index], e)
+                    continue
+                line_vals.update({ORDER_KEY_COLUMN: order_vals['nomor_pesanan'], ROW_COLUMN: index})
+                lines_vals.append(line_vals)
+            order = existing_orders.get(cache['orders'].get(order_number))
+            if not order:
+                line_rows += lines_vals
+                continue
+            for line_vals, line in self._match_order_lines(order, lines_vals):
+                line_vals[LINE_ID_COLUMN] = line.id or None
+                line_rows.append(line_vals)
+        return order_rows, line_rows
+
+    def _get_column_types(self, Model, names):
+        """PostgreSQL type of the stored fields among the names, in order"""
+        types = {}
+        for name in names:
+            field = Model._fields.get(name)
+            if field and field.store and field.column_type:
+                types[name] = field.column_type[1]
+        return types
+
+    def _copy_staging(self, table, Model, rows, extra_columns):
+        """
+        Create a temporary staging table for the rows and stream them into
+        it with COPY. Return the names of the field columns
+        """
+        names = list(dict.fromkeys(name for row in rows for name in row if name not in extra_columns))
+        types = self._get_column_types(Model, names)
+        columns = list(types)
+        cr = self.env.cr
+        cr.execute(SQL("DROP TABLE IF EXISTS %s", SQL.identifier(table)))
+        cr.execute(SQL("CREATE TEMPORARY TABLE %s (%s)", SQL.identifier(table), SQL(', ').join(
+            [SQL('%s %s', SQL.identifier(name), SQL(column_type)) for name, column_type in extra_columns.items()]
+            + [SQL('%s %s', SQL.identifier(name), SQL(types[name])) for name in columns])))
+
+        record = Model.browse()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            values = [row.get(name) for name in extra_columns]
+            for name in columns:
+                value = Model._fields[name].convert_to_column(row.get(name), record, validate=False)
+                values.append(None if value is False else value)
+            writer.writerow(values)
+        buffer.seek(0)
+        cr.copy_expert('COPY "%s" (%s) FROM STDIN WITH (FORMAT csv)' % (
+            table, ', '.join('"%s"' % name for name in list(extra_columns) + columns)), buffer)
+        return columns
+
+    def _get_insert_columns(self, Model, staged, extra):
+        """
+        Columns inserted for the new records: the staged values and the extra
+        expressions, then the default values of the model, then a value for
+        the remaining NOT NULL columns that the ORM recomputes afterwards.
+        Return the columns and the names of the fields given a value, which
+        are not recomputed, as with create()
+        """
+        cr = self.env.cr
+        cr.execute("""
+            SELECT column_name FROM information_schema.columns
+             WHERE table_name = %s AND is_nullable = 'NO' AND column_default IS NULL
+        """, [Model._table])
+        required = {name for name, in cr.fetchall()} - {'id'}
+
+        columns = {name: SQL('s.%s', SQL.identifier(name)) for name in staged}
+        columns.update(extra)
+        given = set(columns)
+        record = Model.browse()
+        for name, value in Model.default_get(list(Model._fields)).items():
+            field = Model._fields.get(name)
+            if name in columns or not field or not field.store or not field.column_type or field.type in ('one2many', 'many2many'):
+                continue
+            value = field.convert_to_column(field.convert_to_write(value, record), record, validate=False)
+            if value is not None and value is not False:
+                columns[name] = SQL('%s', value)
+                given.add(name)
+        for name in required - set(columns) - LOG_ACCESS_COLUMNS:
+            field = Model._fields.get(name)
+            source = DERIVED_COLUMNS.get(Model._name, {}).get(name)
+            if source in columns:
+                columns[name] = columns[source]
+            elif field and field.compute and field.column_type[1] in PLACEHOLDERS:
+                columns[name] = SQL(PLACEHOLDERS[field.column_type[1]])
+            else:
+                raise UserError(_("Bulk load cannot fill the required column %(column)s of %(model)s.",
+                                  column=name, model=Model._name))
+        columns.update({
+            'create_uid': SQL('%s', self.env.uid),
+            'write_uid': SQL('%s', self.env.uid),
+            'create_date': SQL("now() AT TIME ZONE 'UTC'"),
+            'write_date': SQL("now() AT TIME ZONE 'UTC'"),
+        })
+        return columns, given
+
+    def _get_order_names(self, count):
+        """
+        Reference of the new orders. A standard sequence without date
+        ranges is drawn in one query, other sequences number by number
+        """
+        IrSequence = self.env['ir.sequence']
+        sequence = IrSequence.search([
+            ('code', '=', 'sale.order'),
+            ('company_id', 'in', [self.env.company.id, False]),
+        ], order='company_id', limit=1)
+        if not sequence or sequence.implementation != 'standard' or sequence.use_date_range:
+            return [IrSequence.next_by_code('sale.order') or _('New') for _index in range(count)]
+        prefix, suffix = sequence._get_prefix_suffix()
+        self.env.cr.execute("SELECT nextval(%s) FROM generate_series(1, %s)", ['ir_sequence_%03d' % sequence.id, count])
+        return ['%s%s%s' % (prefix, str(number).zfill(sequence.padding), suffix) for number, in self.env.cr.fetchall()]
+
+    def _bulk_upsert(self, order_rows, line_rows, staged, cache, stats):
+        """
+        Update the existing orders whose values changed, insert the new ones,
+        update the matched lines and insert the other lines, with set-based
+        SQL over the staging tables. Return the new orders, the new lines,
+        the updated orders and the updated lines
+        """
+        SaleOrder = self.env['sale.order']
+        SaleOrderLine = self.env['sale.order.line']
+        cr = self.env.cr
+        order_columns = staged['sale.order']
+        line_columns = staged['sale.order.line']
+        given = {}
+
+        # Pesanan yang sudah ada: hanya yang nilainya berbeda yang ditulis
+        existing_ids = [order_id for number, order_id in cache['orders'].items() if number in order_rows]
+        compared = [name for name in order_columns if name != 'import_job_id']
+        updated_ids = []
+        if existing_ids and compared:
+            # UPDATE ini melewati write(): kunci ringkasan sebelum perubahan ditandai di sini,
+            # kunci sesudahnya oleh _bulk_recompute
+            Summary = self.env['sale.settlement.summary']
+            Summary._mark_dirty(Summary._get_keys(SaleOrder.browse(existing_ids)))
+            cr.execute(SQL("""
+                UPDATE sale_order o
+                   SET %(assignments)s, write_uid = %(uid)s, write_date = now() AT TIME ZONE 'UTC'
+                  FROM sale_import_staging_order s
+                 WHERE s.nomor_pesanan = o.nomor_pesanan
+                   AND o.id IN %(ids)s
+                   AND (%(current)s) IS DISTINCT FROM (%(incoming)s)
+             RETURNING o.id
+                """,
+                assignments=SQL(', ').join(SQL('%s = s.%s', SQL.identifier(name), SQL.identifier(name))
+                                           for name in order_columns),
+                uid=self.env.uid,
+                ids=tuple(existing_ids),
+                current=SQL(', ').join(SQL('o.%s', SQL.identifier(name)) for name in compared),
+                incoming=SQL(', ').join(SQL('s.%s', SQL.identifier(name)) for name in compared),
+            ))
+            updated_ids = [order_id for order_id, in cr.fetchall()]
+
+        new_numbers = [number for number in order_rows if number not in cache['orders']]
+        new_ids = []
+        if new_numbers:
+            columns, given['sale.order'] = self._get_insert_columns(SaleOrder, order_columns, {'name': SQL('n.name')})
+            cr.execute(SQL("""
+                INSERT INTO sale_order (%(names)s)
+                SELECT %(values)s
+                  FROM sale_import_staging_order s
+                  JOIN unnest(%(numbers)s::varchar[], %(refs)s::varchar[]) AS n(number, name)
+                    ON n.number = s.nomor_pesanan
+              ORDER BY s.%(row)s
+             RETURNING id, nomor_pesanan
+                """,
+                names=SQL(', ').join(SQL.identifier(name) for name in columns),
+                values=SQL(', ').join(columns.values()),
+                numbers=new_numbers,
+                refs=self._get_order_names(len(new_numbers)),
+                row=SQL.identifier(ROW_COLUMN),
+            ))
+            for order_id, number in cr.fetchall():
+                cache['orders'][number] = order_id
+                new_ids.append(order_id)
+
+        updated_line_ids = []
+        if any(line_vals.get(LINE_ID_COLUMN) for line_vals in line_rows) and line_columns:
+            cr.execute(SQL("""
+                UPDATE sale_order_line l
+                   SET %(assignments)s, write_uid = %(uid)s, write_date = now() AT TIME ZONE 'UTC'
+                  FROM sale_import_staging_line s
+                 WHERE s.%(line_id)s = l.id
+             RETURNING l.id
+                """,
+                assignments=SQL(', ').join(SQL('%s = s.%s', SQL.identifier(name), SQL.identifier(name))
+                                           for name in line_columns),
+                uid=self.env.uid,
+                line_id=SQL.identifier(LINE_ID_COLUMN),
+            ))
+            updated_line_ids = [line_id for line_id, in cr.fetchall()]
+
+        line_ids = []
+        if any(not line_vals.get(LINE_ID_COLUMN) for line_vals in line_rows):
+            columns, given['sale.order.line'] = self._get_insert_columns(
+                SaleOrderLine, line_columns, {'order_id': SQL('o.id')})
+            cr.execute(SQL("""
+                INSERT INTO sale_order_line (%(names)s)
+                SELECT %(values)s
+                  FROM sale_import_staging_line s
+                  JOIN sale_order o ON o.nomor_pesanan = s.%(key)s AND COALESCE(o.sale_marketplace, 0) = %(marketplace)s
+                 WHERE s.%(line_id)s IS NULL
+              ORDER BY s.%(row)s
+             RETURNING id
+                """,
+                names=SQL(', ').join(SQL.identifier(name) for name in columns),
+                values=SQL(', ').join(columns.values()),
+                key=SQL.identifier(ORDER_KEY_COLUMN),
+                marketplace=self.marketplace_id.id or 0,
+                line_id=SQL.identifier(LINE_ID_COLUMN),
+                row=SQL.identifier(ROW_COLUMN),
+            ))
+            line_ids = [line_id for line_id, in cr.fetchall()]
+
+        self.env.invalidate_all()
+        orders = SaleOrder.browse(new_ids)
+        lines = SaleOrderLine.browse(line_ids)
+        updated_lines = SaleOrderLine.browse(updated_line_ids)
+        # Pesanan lama dengan baris baru atau baris yang berubah juga dihitung sebagai berubah
+        line_order_ids = set((lines | updated_lines).order_id.ids) - set(new_ids)
+        changed = SaleOrder.browse(sorted(set(updated_ids) | line_order_ids))
+        stats['created'] += len(orders)
+        stats['updated'] += len(changed)
+        stats['untouched'] += len(existing_ids) - len(changed)
+        staged['given'] = given
+        return orders, lines, changed, updated_lines
+
+    def _bulk_recompute(self, orders, lines, changed, updated_lines, staged):
+        """
+        Let the ORM compute the stored fields that were not given a value, and
+        the fields depending on the inserted or updated values, in one flush.
+        Then run the constraints of the orders and lines
+        """
+        env = self.env
+        order_columns = staged['sale.order']
+        for records in (orders, lines):
+            if not records:
+                continue
+            given = staged['given'][records._name]
+            for field in records._fields.values():
+                if field.store and field.compute and field.name not in given:
+                    env.add_to_compute(field, records)
+            records.modified(sorted(given - LOG_ACCESS_COLUMNS), create=True)
+        if changed:
+            changed.modified(order_columns)
+        if updated_lines:
+            updated_lines.modified(staged['sale.order.line'])
+        env.flush_all()
+        if updated_lines:
+            updated_lines._validate_fields(staged['sale.order.line'])
+        all_orders = orders | changed
+        if all_orders:
+            all_orders._validate_fields(order_columns)
+            Summary = env['sale.settlement.summary']
+            Summary._mark_dirty(Summary._get_keys(all_orders))
+        env.flush_all()
@@ -0,0 +1,1264 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError, ValidationError
+import base64
+import csv
+import hashlib
+import io
+import itertools
+import logging
+import os
+import time
+
+from odoo.tools import config, split_every
+
+from ..tools import buyers, mapping, readers, telemetry
+
+_logger = logging.getLogger(__name__)
+
+# Kolom tambahan pada file baris yang ditolak
+REJECTED_ERROR_COLUMN = 'Import Error'
+
+# Di bawah jumlah baris ini konversi tidak dijalankan di process pool
+PARALLEL_MIN_ROWS = 5000
+
+# Preview tidak melakukan commit, sehingga chunk boleh jauh lebih besar
+PREVIEW_CHUNK_SIZE = 5000
+# Jumlah kunci per query pencarian pada preview
+PREVIEW_LOOKUP_SIZE = 20000
+# Jumlah contoh baris gagal yang ditampilkan preview
+PREVIEW_ERROR_LIMIT = 20
+
+# Batas waktu satu eksekusi cron jika worker cron tidak dibatasi
+DEFAULT_CRON_TIME_LIMIT = 240
+# Bagian dari batas waktu worker cron yang dipakai job, sisanya untuk chunk terakhir dan log eksekusi
+CRON_TIME_RATIO = 0.5
+
+# Cron yang memproses job, masing-masing mengambil job yang belum dikunci
+IMPORT_CRONS = [
+    'ir_cron_sale_import_job',
+    'ir_cron_sale_import_job_worker_2',
+    'ir_cron_sale_import_job_worker_3',
+    'ir_cron_sale_import_job_worker_4',
+]
+
+# Kunci cache record yang dipakai bersama oleh import paralel, dicari atau dibuat di transaksi terpisah sebelum chunk
+SHARED_KEYS = ['states', 'partners', 'carriers', 'products']
+
+# Penghitung partisi yang dijumlahkan pada job induknya
+PARTITION_COUNTERS = [
+    'order_count', 'order_created_count', 'order_updated_count', 'order_untouched_count',
+    'skipped_count', 'error_count', 'processing_time',
+]
+
+# Penghitung job yang kenaikannya dicatat pada log setiap eksekusi
+LOG_COUNTERS = {
+    'row_offset': 'row_count',
+    'order_created_count': 'order_created_count',
+    'order_updated_count': 'order_updated_count',
+    'error_count': 'error_count',
+}
+
+if not readers.xlrd or not readers.openpyxl:
+    _logger.warning("xlrd or openpyxl library is not installed. Excel import may not work.")
+
+
+def cron_time_limit():
+    """
+    Time budget of one cron run, within the real time limit of the cron
+    workers so the last chunk and the run log finish before the worker is
+    killed
+    """
+    limit = config.get('limit_time_real_cron', -1)
+    if limit is None or limit < 0:
+        limit = config.get('limit_time_real')
+    if not limit or limit <= 0:
+        return DEFAULT_CRON_TIME_LIMIT
+    return limit * CRON_TIME_RATIO
+
+
+class SaleImportJob(models.Model):
+    _name = 'sale.import.job'
+    _description = 'Sale Import Job'
+    _order = 'id desc'
+
+    name = fields.Char(string='Filename', required=True, readonly=True)
+    attachment_id = fields.Many2one('ir.attachment', string='File', readonly=True, ondelete='restrict')
+    file_type = fields.Selection([
+        ('csv', 'CSV File'),
+        ('xls', 'XLS File'),
+        ('xlsx', 'XLSX File')
+    ], string='File Type', required=True, default='csv', readonly=True)
+    marketplace_id = fields.Many2one('market.place', string='Marketplace', readonly=True)
+    profile_id = fields.Many2one('sale.import.profile', string='Column Profile', readonly=True,
+                                 help="Column mapping of the file. Defaults to the profile of the marketplace.")
+    chunk_size = fields.Integer(string='Orders per Commit', default=500,
+                                help="Number of orders written and committed together during the import.")
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', default='draft', required=True, readonly=True, copy=False)
+    row_total = fields.Integer(string='Estimated Rows', readonly=True,
+                               help="Row count estimated from the file when the job was created.")
+    row_offset = fields.Integer(string='Rows Done', readonly=True, copy=False,
+                                help="Rows already imported and committed. A resumed job continues after this row.")
+    order_count = fields.Integer(string='Orders Imported', readonly=True, copy=False)
+    order_created_count = fields.Integer(string='New Orders', readonly=True, copy=False)
+    order_updated_count = fields.Integer(string='Changed Orders', readonly=True, copy=False)
+    order_untouched_count = fields.Integer(string='Untouched Orders', readonly=True, copy=False,
+                                           help="Existing orders without any difference, which were not written.")
+    skipped_count = fields.Integer(string='Unchanged Rows Skipped', readonly=True, copy=False,
+                                   help="Rows already imported with the same content by a previous import.")
+    file_fingerprint = fields.Char(string='File Fingerprint', readonly=True, copy=False, index=True,
+                                   help="SHA-256 of the file. A file already fully imported is not processed again.")
+    error_count = fields.Integer(string='Errors', readonly=True, copy=False)
+    error_log = fields.Text(string='Failure Reason', readonly=True, copy=False)
+    error_ids = fields.One2many('sale.import.job.error', 'job_id', string='Rejected Rows', readonly=True)
+    rejected_file = fields.Binary(string='Rejected Rows File', readonly=True, copy=False, attachment=True,
+                                  help="The rejected rows with their original columns and the error, ready to be fixed and imported again.")
+    rejected_filename = fields.Char(string='Rejected Rows Filename', readonly=True, copy=False)
+    processing_time = fields.Float(string='Processing Time (s)', readonly=True, copy=False)
+    date_started = fields.Datetime(string='Started On', readonly=True, copy=False)
+    date_finished = fields.Datetime(string='Finished On', readonly=True, copy=False)
+    progress = fields.Float(string='Progress', compute='_compute_progress')
+    rows_per_second = fields.Float(string='Rows/s', compute='_compute_progress')
+    eta = fields.Char(string='ETA', compute='_compute_progress')
+    user_id = fields.Many2one('res.users', string='Requested By', default=lambda self: self.env.user, readonly=True)
+    parse_workers = fields.Integer(string='Parse Processes', default=1,
+                                   help="Processes converting the rows ahead of the database writes. 0 uses every "
+                                        "CPU core. Files under %s rows are converted in the import process." % PARALLEL_MIN_ROWS)
+    partition_count = fields.Integer(string='Parallel Workers', default=1,
+                                     help="Split the orders by a hash of their number into this many jobs, "
+                                          "processed in parallel by the import crons.")
+    partition_index = fields.Integer(string='Partition', readonly=True)
+    parent_id = fields.Many2one('sale.import.job', string='Partitioned Job', readonly=True, ondelete='cascade',
+                                index='btree_not_null')
+    partition_ids = fields.One2many('sale.import.job', 'parent_id', string='Partitions', readonly=True)
+    capture_profile = fields.Boolean(string='Capture Profile', copy=False,
+                                     help="Save a cProfile capture of each run on its log. Slows the import down.")
+    log_ids = fields.One2many('sale.import.log', 'job_id', string='Run Logs', readonly=True)
+
+    @api.depends('row_total', 'row_offset', 'processing_time', 'state')
+    def _compute_progress(self):
+        for job in self:
+            job.progress = min(100.0, 100.0 * job.row_offset / job.row_total) if job.row_total else 0.0
+            job.rows_per_second = job.row_offset / job.processing_time if job.processing_time else 0.0
+            if job.state in ('queued', 'running') and job.rows_per_second and job.row_total > job.row_offset:
+                remaining = int((job.row_total - job.row_offset) / job.rows_per_second)
+                job.eta = '%d:%02d:%02d' % (remaining // 3600, remaining % 3600 // 60, remaining % 60)
+            else:
+                job.eta = False
+
+    @api.model
+    def _create_job(self, vals, attachment=None, raw=None):
+        """
+        Create an import job owning its file: the given attachment is handed
+        over to the job instead of being copied, otherwise one is created
+        from the raw content
+        """
+        job = self.create(vals)
+        attachment_vals = {
+            'name': job.name,
+            'res_model': job._name,
+            'res_id': job.id,
+            'res_field': False,
+        }
+        if attachment:
+            attachment.sudo().write(attachment_vals)
+        else:
+            attachment = self.env['ir.attachment'].sudo().create(dict(attachment_vals, raw=raw))
+        job.attachment_id = attachment
+        job._estimate_row_count()
+        job._fingerprint_file()
+        return job
+
+    def _open_file(self):
+        """
+        Open the import file as a binary stream, reading it from the filestore
+        when possible instead of loading it in memory
+        """
+        attachment = self.attachment_id.sudo()
+        if not attachment:
+            raise UserError(_("Please upload a file to import."))
+        if attachment.store_fname:
+            return open(attachment._full_path(attachment.store_fname), 'rb')
+        return io.BytesIO(attachment.raw)
+
+    def _iter_rows(self):
+        """Iterate over the rows of the import file based on its type"""
+        reader = readers.READERS.get(self.file_type)
+        if not reader:
+            raise UserError(_("Unsupported file type."))
+        return self._read_rows(reader)
+
+    def _read_rows(self, reader):
+        """Stream the rows produced by the reader of the file type"""
+        with self._open_file() as binary_file:
+            try:
+                yield from reader(binary_file)
+            except UnicodeError:
+                raise UserError(_("Unable to decode the CSV file. Please check the file encoding."))
+            except Exception as e:
+                raise UserError(_("Error reading %s file: %s") % (self.file_type.upper(), str(e)))
+
+    def _estimate_row_count(self):
+        """Estimate the number of rows of the file, used for the progress and ETA"""
+        for job in self:
+            try:
+                with job._open_file() as binary_file:
+                    job.row_total = readers.count_rows(job.file_type, binary_file)
+            except Exception as e:
+                _logger.warning("Unable to estimate the row count of import job %s: %s", job.id, str(e))
+
+    def _prepare_import_cache(self):
+        """
+        Prepare the lookup cache shared by every row of the file
+        """
+        # Mendapatkan payment mode 'BC Online'
+        payment_mode = self.env['account.payment.mode'].search([('name', '=', 'BC Online')], limit=1)
+        if not payment_mode:
+            raise ValidationError(_("Payment mode 'BC Online' not found in the system."))
+
+        # Mendapatkan automatic workflow 'Automatic'
+        workflow = self.env['sale.workflow.process'].search([('name', '=', 'Automatic')], limit=1)
+        if not workflow:
+            raise ValidationError(_("Workflow 'Automatic' not found in the system."))
+
+        return {
+            'payment_mode_id': payment_mode.id,
+            'workflow_id': workflow.id,
+            'orders': {},
+            'partners': {},
+            'states': {},
+            'carriers': {},
+            'products': {},
+            'columns': [],
+        }
+
+    def _get_profile(self):
+        """Return the column profile of the job, defaulting to the marketplace one"""
+        if not self.profile_id:
+            self.profile_id = self.env['sale.import.profile']._get_for_marketplace(self.marketplace_id)
+        if not self.profile_id:
+            raise UserError(_("No import profile found for marketplace %s.") % (self.marketplace_id.display_name or '-'))
+        return self.profile_id
+
+    def _resolve_file_columns(self, headers):
+        """Return the profile columns imported from a file with these headers"""
+        return self._get_profile()._resolve_columns(headers)
+
+    def _build_mapping_spec(self, columns, groups):
+        """
+        Build the mapping spec of the file from the columns resolved from the
+        profile, inferring the date formats from the rows of the first chunk
+        """
+        selections = {
+            (target, field_name): self._get_selection_values(target, field_name)
+            for target, field_name, header, converter, default in columns if converter == 'selection'
+        }
+        sample_rows = [row for indexed_rows in groups.values() for index, row in indexed_rows]
+        return mapping.build_spec(columns, sample_rows, selections, self.marketplace_id.id)
+
+    def _get_parse_workers(self):
+        """Number of processes converting the rows, 1 converts them in the import process"""
+        cpu_count = os.cpu_count() or 1
+        # Biaya process pool tidak sebanding untuk file kecil
+        if self.row_total and self.row_total < PARALLEL_MIN_ROWS:
+            return 1
+        return max(1, min(self.parse_workers or cpu_count, cpu_count))
+
+    def _iter_mapped_chunks(self, chunks, cache, tracker):
+        """
+        Yield each chunk of order groups with its mapped rows. The mapping
+        spec is built from the first chunk, then the rows are converted in
+        the import process or ahead of the writes in a process pool
+        """
+        first_chunk = next(chunks, None)
+        if first_chunk is None:
+            return
+        with tracker.phase('parse'):
+            spec = self._build_mapping_spec(cache['columns'], first_chunk)
+        chunks = itertools.chain([first_chunk], chunks)
+        yield from mapping.iter_mapped_chunks(chunks, spec, self._get_parse_workers(), tracker)
+
+    def _get_selection_values(self, model, field_name):
+        """Map both the values and the labels of a selection field to its values"""
+        env = self.with_context(lang='en_US').env
+        values = {}
+        for value, label in env[model]._fields[field_name]._description_selection(env):
+            values[value] = value
+            values[label] = value
+        return values
+
+    def _collect_import_keys(self, records):
+        """
+        Collect the distinct keys of the mapped rows: order numbers, buyer
+        values, provinces, carrier names and product values
+        """
+        order_numbers = set()
+        partner_vals = {}
+        provinces = set()
+        carrier_names = set()
+        product_vals = {}
+        for record in records:
+            order = record['sale.order']
+            order_numbers.add(order.get('nomor_pesanan'))
+            if order.get('buyer_username'):
+                partner_vals.setdefault(order['buyer_username'], order)
+                if order.get('province'):
+                    provinces.add(order['province'])
+            if order.get('opsi_pengiriman'):
+                carrier_names.add(order['opsi_pengiriman'])
+            product_vals.setdefault(record['sale.order.line'].get('sku_reference'), record['product.product'])
+        return {
+            'orders': order_numbers,
+            'partners': partner_vals,
+            'states': provinces,
+            'carriers': carrier_names,
+            'products': product_vals,
+        }
+
+    def _resolve_import_keys(self, records, cache):
+        """
+        Resolve the keys of the mapped rows to ids in bulk, creating the
+        missing partners, carriers and products in one call each
+        """
+        keys = self._collect_import_keys(records)
+        self._resolve_orders(keys['orders'], cache)
+        self._resolve_states(keys['states'], cache)
+        self._resolve_partners(keys['partners'], cache)
+        self._resolve_carriers(keys['carriers'], cache)
+        self._resolve_products(keys['products'], cache)
+        return cache
+
+    def _get_order_locks(self, groups, records):
+        """Advisory lock keys of the order numbers of a chunk, within the marketplace of the job"""
+        namespace = 'sale.order,%s' % self.marketplace_id.id
+        return sorted({
+            (namespace, records[indexed_rows[0][0]]['sale.order'].get('nomor_pesanan') or '')
+            for indexed_rows in groups.values()
+        })
+
+    def _lock_chunk(self, order_locks, records, cache):
+        """
+        Prepare a chunk for the concurrent imports: lock its order numbers
+        until the chunk is committed, create the shared records it needs in
+        a separate transaction, then start the transaction of the chunk.
+
+        Odoo transactions run at REPEATABLE READ: their snapshot is taken at
+        their first query, and a record committed later by another import
+        stays invisible whatever lock they wait for. The locks are therefore
+        session-level and the chunk transaction only starts once they are
+        held, so it sees the orders and the shared records committed by the
+        import that held them before
+        """
+        self._lock_keys(order_locks)
+        self._create_shared_records(records, cache)
+        # Snapshot baru untuk chunk, diambil setelah kunci didapat dan record bersama di-commit
+        self._commit_chunk()
+
+    def _create_shared_records(self, records, cache):
+        """
+        Get or create the buyers, carriers and products of the chunk on a
+        separate cursor: under session locks on their keys, in a transaction
+        started once the locks are held and committed before the locks are
+        released. Two imports finding the same new buyer or product create it
+        once. When this fails, the chunk resolves the keys itself and reports
+        the failing rows
+        """
+        keys = self._collect_import_keys(records.values())
+        locks = self._get_shared_locks(keys, cache)
+        if not locks:
+            return
+        with self.env.registry.cursor() as cr:
+            job = self.with_env(self.env(cr=cr))
+            try:
+                job._lock_keys(locks)
+                # Transaksi baru dimulai setelah kunci didapat dan melihat record yang di-commit import lain
+                cr.commit()
+                shared = {name: dict(cache[name]) for name in SHARED_KEYS}
+                job._resolve_shared_keys(keys, shared)
+                cr.commit()
+                cache.update(shared)
+            except Exception as e:
+                cr.rollback()
+                _logger.info("Import job %s: shared records not created ahead of the chunk (%s)", self.id, str(e))
+            finally:
+                job._unlock_keys(locks)
+
+    def _get_shared_locks(self, keys, cache):
+        """Advisory lock keys of the buyers, carriers and products not resolved yet"""
+        buyer_namespace = 'sale.buyer.identity,%s' % self.marketplace_id.id
+        locks = {
+            (buyer_namespace, buyers.normalize_username(username))
+            for username in keys['partners'] if username not in cache['partners']
+        }
+        locks.update(('delivery.carrier', name) for name in keys['carriers'] if name not in cache['carriers'])
+        locks.update(('product.product', sku) for sku in keys['products'] if sku not in cache['products'])
+        return sorted(lock for lock in locks if lock[1])
+
+    def _resolve_shared_keys(self, keys, cache):
+        """Get or create the records shared with the concurrent imports"""
+        self._resolve_states(keys['states'], cache)
+        self._resolve_partners(keys['partners'], cache)
+        self._resolve_carriers(keys['carriers'], cache)
+        self._resolve_products(keys['products'], cache)
+
+    def _lock_keys(self, locks):
+        """
+        Take a session-level advisory lock on each (namespace, key) pair. The
+        locks survive the commits of the cursor and are taken in the given
+        sorted order, so two imports locking overlapping keys cannot deadlock
+        """
+        if not locks:
+            return
+        namespaces, keys = zip(*locks)
+        self.env.cr.execute("""
+            SELECT pg_advisory_lock(hashtext(k.namespace), hashtext(k.key))
+              FROM unnest(%s::text[], %s::text[]) WITH ORDINALITY AS k(namespace, key, position)
+          ORDER BY k.position
+        """, (list(namespaces), list(keys)))
+
+    def _unlock_keys(self, locks):
+        """Release the session-level advisory locks taken by _lock_keys"""
+        if not locks:
+            return
+        namespaces, keys = zip(*locks)
+        self.env.cr.execute("""
+            SELECT pg_advisory_unlock(hashtext(k.namespace), hashtext(k.key))
+              FROM unnest(%s::text[], %s::text[]) AS k(namespace, key)
+        """, (list(namespaces), list(keys)))
+
+    def _resolve_orders(self, order_numbers, cache):
+        """
+        Index existing sale orders by nomor_pesanan
+        """
+        index = cache['orders']
+        missing = [number for number in order_numbers if number and number not in index]
+        if missing:
+            domain = [('nomor_pesanan', 'in', missing), ('sale_marketplace', '=', self.marketplace_id.id)]
+            for record in self.env['sale.order'].search_read(domain, ['nomor_pesanan']):
+                index.setdefault(record['nomor_pesanan'], record['id'])
+
+    def _resolve_states(self, state_names, cache):
+        """
+        Index states by name
+        """
+        index = cache['states']
+        missing = [name for name in state_names if name not in index]
+        if missing:
+            for record in self.env['res.country.state'].search_read([('name', 'in', missing)], ['name']):
+                index.setdefault(record['name'], record['id'])
+            for name in missing:
+                index.setdefault(name, False)
+
+    def _resolve_partners(self, partner_vals, cache):
+        """
+        Index partners by username through the buyer identities of the
+        marketplace, creating the missing ones from the buyer values of
+        their first order
+        """
+        index = cache['partners']
+        missing = [username for username in partner_vals if username not in index]
+        if not missing:
+            return
+        index.update(self.env['sale.buyer.identity']._resolve_buyers(self.marketplace_id, {
+            username: {
+                'name': username,
+                'phone': partner_vals[username].get('receiver_phone'),
+                'street': partner_vals[username].get('shipping_address'),
+                'city': partner_vals[username].get('city'),
+                'state_id': cache['states'].get(partner_vals[username].get('province'), False),
+            } for username in missing
+        }))
+
+    def _resolve_carriers(self, carrier_names, cache):
+        """
+        Index delivery carriers by name and create the missing ones
+        """
+        Carrier = self.env['delivery.carrier']
+        index = cache['carriers']
+        missing = [name for name in carrier_names if name not in index]
+        if not missing:
+            return
+        for record in Carrier.search_read([('name', 'in', missing)], ['name']):
+            index.setdefault(record['name'], record['id'])
+
+        to_create = [name for name in missing if name not in index]
+        if to_create:
+            delivery_product_id = self.env.ref('delivery.product_product_delivery').id
+            carriers = Carrier.create([{
+                'name': name,
+                'delivery_type': 'fixed',  # Anda bisa menyesuaikan tipe delivery sesuai kebutuhan
+                'product_id': delivery_product_id,
+            } for name in to_create])
+            index.update(zip(to_create, carriers.ids))
+
+    def _resolve_products(self, product_vals, cache):
+        """
+        Index products by SKU and create the missing ones from the product
+        values mapped by the profile
+        """
+        Product = self.env['product.product']
+        index = cache['products']
+        missing = [sku for sku in product_vals if sku not in index]
+        if not missing:
+            return
+        for record in Product.search_read([('default_code', 'in', missing)], ['default_code']):
+            index.setdefault(record['default_code'], record['id'])
+
+        # Produk tanpa nama tidak dapat dibuat, baris terkait akan gagal saat diproses
+        to_create = [sku for sku in missing if sku not in index and product_vals[sku].get('name')]
+        if to_create:
+            products = Product.create([dict(product_vals[sku], default_code=sku) for sku in to_create])
+            index.update(zip(to_create, products.ids))
+
+    def _iter_order_chunks(self, rows, chunk_size, key, start=1, partition=None):
+        """
+        Group the streamed rows by order number, read from the key column,
+        keeping the row number of each line, and yield the groups in chunks
+        of at most chunk_size orders. With a (index, count) partition, only
+        the orders of that partition are kept
+        """
+        groups = {}
+        for index, row in enumerate(rows, start=start):
+            order_number = row.get(key)
+            if partition and mapping.partition_of(order_number, partition[1]) != partition[0]:
+                continue
+            # Baris dari satu pesanan berurutan dalam file export marketplace
+            if order_number not in groups and len(groups) >= chunk_size:
+                yield groups
+                groups = {}
+            groups.setdefault(order_number, []).append((index, row))
+        if groups:
+            yield groups
+
+    def _prepare_order_vals(self, record, cache):
+        """
+        Prepare the sale order header values from the first mapped row of an
+        order
+        """
+        order_vals = dict(record['sale.order'])
+        if not order_vals.get('nomor_pesanan'):
+            raise ValidationError(_("No. Pesanan is required to create or find a sale order."))
+
+        username = order_vals.get('buyer_username')
+        if not username:
+            raise ValidationError(_("Username (Pembeli) is required to create or find a partner."))
+
+        order_vals.update({
+            'partner_id': cache['partners'][username],
+            'carrier_id': cache['carriers'].get(order_vals.get('opsi_pengiriman'), False),
+            'sale_marketplace': self.marketplace_id.id,
+            'import_job_id': self.id,
+            # Menambahkan payment mode dan workflow
+            'payment_mode_id': cache['payment_mode_id'],
+            'workflow_process_id': cache['workflow_id'],
+        })
+        return order_vals
+
+    def _prepare_line_vals(self, record, cache):
+        """
+        Prepare the sale order line values of a row from its mapped values
+        """
+        line_vals = dict(record['sale.order.line'])
+        sku = line_vals.get('sku_reference')
+        product_id = cache['products'].get(sku)
+        if not product_id:
+            raise ValidationError(_("Nama Produk is required to create product %s.") % sku)
+        line_vals['product_id'] = product_id
+        return line_vals
+
+    def _add_row_errors(self, errors, indexes, error):
+        """
+        Record an error for every row number of a failed order or line
+        """
+        for index in indexes:
+            if isinstance(error, ValidationError):
+                errors.append((index, f"Validation error - {str(error)}"))
+            else:
+                errors.append((index, f"Unexpected error - {str(error)}"))
+        if not isinstance(error, ValidationError):
+            _logger.error("Error importing rows %s: %s", indexes, str(error))
+
+    def _import_orders(self, groups, records, cache, errors, stats):
+        """
+        Build every order with all of its lines, create the new orders in one
+        batch and write each existing order once, with only the fields that
+        changed
+        """
+        SaleOrder = self.env['sale.order']
+        orders = SaleOrder
+        new_orders = []
+        # Satu kali baca untuk semua pesanan yang sudah ada di chunk ini
+        existing_orders = {order.id: order for order in SaleOrder.browse(list(cache['orders'].values()))}
+
+        for order_number, indexed_rows in groups.items():
+            indexes = [index for index, row in indexed_rows]
+            try:
+                order_vals = self._prepare_order_vals(records[indexes[0]], cache)
+            except Exception as e:
+                self._add_row_errors(errors, indexes, e)
+                continue
+
+            lines_vals = []
+            for index, row in indexed_rows:
+                try:
+                    lines_vals.append(self._prepare_line_vals(records[index], cache))
+                except Exception as e:
+                    self._add_row_errors(errors, [index], e)
+
+            order = existing_orders.get(cache['orders'].get(order_number))
+            if not order:
+                order_vals['order_line'] = [(0, 0, line_vals) for line_vals in lines_vals]
+                new_orders.append((order_number, indexes, order_vals))
+                continue
+            try:
+                with self.env.cr.savepoint():
+                    order_vals['order_line'] = self._get_line_commands(order, lines_vals)
+                    changed_vals = self._get_changed_vals(order, order_vals)
+                    if changed_vals:
+                        order.write(changed_vals)
+                if changed_vals:
+                    stats['updated'] += 1
+                    orders |= order
+                else:
+                    stats['untouched'] += 1
+            except Exception as e:
+                self._add_row_errors(errors, indexes, e)
+
+        created_orders = self._create_orders(new_orders, cache, errors)
+        stats['created'] += len(created_orders)
+        return orders | created_orders
+
+    def _match_order_lines(self, order, lines_vals):
+        """
+        Pair the incoming line values of an existing order with its lines, by
+        SKU and position among the lines of the same SKU. Yield (line values,
+        matched line or an empty recordset), leaving out the matched lines
+        whose content hash did not change
+        """
+        current = {}
+        for line in order.order_line.sorted('id'):
+            if line.sku_reference:
+                current.setdefault(line.sku_reference, []).append(line)
+        for line_vals in lines_vals:
+            matches = current.get(line_vals.get('sku_reference'))
+            line = matches.pop(0) if matches else order.order_line.browse()
+            if line and line.import_row_hash == line_vals.get('import_row_hash'):
+                continue
+            yield line_vals, line
+
+    def _get_line_commands(self, order, lines_vals):
+        """
+        Line commands of an existing order: the changed values of its matched
+        lines and a new line for every other incoming line
+        """
+        commands = []
+        for line_vals, line in self._match_order_lines(order, lines_vals):
+            if not line:
+                commands.append((0, 0, line_vals))
+                continue
+            changed_vals = self._get_changed_vals(line, line_vals)
+            if changed_vals:
+                commands.append((1, line.id, changed_vals))
+        return commands
+
+    def _get_changed_vals(self, order, order_vals):
+        """
+        Keep only the values that differ from the current order or line. Both
+        sides are converted the way the ORM caches them, so a float rounded to
+        the field digits or a many2one id compares equal to the stored value
+        """
+        changed_vals = {}
+        for name, value in order_vals.items():
+            if name == 'order_line':
+                if value:
+                    changed_vals[name] = value
+                continue
+            if name == 'import_job_id':
+                continue
+            field = order._fields[name]
+            current = field.convert_to_cache(order[name], order)
+            incoming = field.convert_to_cache(value, order)
+            # Nilai kosong ('' / False / None / 0.0) dianggap sama
+            if (current or False) != (incoming or False):
+                changed_vals[name] = value
+        if changed_vals and 'import_job_id' in order_vals:
+            changed_vals['import_job_id'] = order_vals['import_job_id']
+        return changed_vals
+
+    def _create_orders(self, new_orders, cache, errors):
+        """
+        Create the new orders in a single call, falling back to one call per
+        order to isolate the failing ones
+        """
+        SaleOrder = self.env['sale.order']
+        if not new_orders:
+            return SaleOrder
+        try:
+            with self.env.cr.savepoint():
+                orders = SaleOrder.create([order_vals for order_number, indexes, order_vals in new_orders])
+        except Exception:
+            orders = SaleOrder
+            for order_number, indexes, order_vals in new_orders:
+                try:
+                    with self.env.cr.savepoint():
+                        order = SaleOrder.create(order_vals)
+                except Exception as e:
+                    self._add_row_errors(errors, indexes, e)
+                    continue
+                orders |= order
+                cache['orders'][order_number] = order.id
+            return orders
+
+        for (order_number, indexes, order_vals), order_id in zip(new_orders, orders.ids):
+            cache['orders'][order_number] = order_id
+        return orders
+
+    def _filter_imported_rows(self, groups, records):
+        """
+        Drop the orders whose order columns and every line were already
+        imported with the same content, before any other ORM work. The other
+        orders keep all of their rows: their lines are matched with the
+        existing ones and their order columns go through the field diff.
+        Return the remaining groups and the number of rows already imported
+        """
+        hashes = {index: record['sale.order.line']['import_row_hash'] for index, record in records.items()}
+        imported = {
+            record['import_row_hash']
+            for record in self.env['sale.order.line'].search_read(
+                [('import_row_hash', 'in', list(set(hashes.values())))], ['import_row_hash'])
+        }
+        if not imported:
+            return groups, 0
+        order_hashes = {
+            order_number: records[indexed_rows[0][0]]['sale.order']['import_order_hash']
+            for order_number, indexed_rows in groups.items()
+        }
+        imported_orders = {
+            record['import_order_hash']
+            for record in self.env['sale.order'].search_read([
+                ('import_order_hash', 'in', list(set(order_hashes.values()))),
+                ('sale_marketplace', '=', self.marketplace_id.id),
+            ], ['import_order_hash'])
+        }
+
+        remaining = {}
+        skipped = 0
+        for order_number, indexed_rows in groups.items():
+            new_rows = [index for index, row in indexed_rows if hashes[index] not in imported]
+            skipped += len(indexed_rows) - len(new_rows)
+            if new_rows or order_hashes[order_number] not in imported_orders:
+                remaining[order_number] = indexed_rows
+        return remaining, skipped
+
+    def _fingerprint_file(self):
+        """Compute the SHA-256 of the file, read in blocks"""
+        for job in self:
+            digest = hashlib.sha256()
+            with job._open_file() as binary_file:
+                for block in iter(lambda: binary_file.read(1024 * 1024), b''):
+                    digest.update(block)
+            job.file_fingerprint = digest.hexdigest()
+
+    def _find_imported_duplicate(self):
+        """
+        Finish the job right away when the very same file was already fully
+        imported for the same marketplace
+        """
+        if not self.file_fingerprint or self.row_offset:
+            return False
+        duplicate = self.search([
+            ('id', '!=', self.id),
+            ('file_fingerprint', '=', self.file_fingerprint),
+            ('marketplace_id', '=', self.marketplace_id.id),
+            ('state', '=', 'done'),
+            ('error_count', '=', 0),
+        ], limit=1)
+        if not duplicate:
+            return False
+        _logger.info("Import job %s: file already imported by job %s, skipping", self.id, duplicate.id)
+        self.write({
+            'state': 'done',
+            'date_finished': fields.Datetime.now(),
+            'row_offset': duplicate.row_offset,
+            'skipped_count': duplicate.row_offset,
+        })
+        self._commit_chunk()
+        return True
+
+    def _import_chunk(self, groups, records, cache):
+        """
+        Import a chunk of orders inside its own savepoint and return the row
+        errors and the created / updated / untouched order counts. When the
+        chunk fails as a whole, it is retried order by order so only the
+        failing orders are rejected and the good ones are kept
+        """
+        errors = []
+        stats = dict.fromkeys(('created', 'updated', 'untouched'), 0)
+        try:
+            with self.env.cr.savepoint():
+                self._write_orders(groups, records, cache, errors, stats)
+            return errors, stats
+        except Exception as e:
+            _logger.info("Import job %s: chunk failed (%s), retrying order by order", self.id, str(e))
+            self._reset_import_cache(cache)
+
+        errors = []
+        stats = dict.fromkeys(('created', 'updated', 'untouched'), 0)
+        for order_number, indexed_rows in groups.items():
+            order_errors = []
+            order_stats = dict.fromkeys(stats, 0)
+            try:
+                with self.env.cr.savepoint():
+                    self._write_orders({order_number: indexed_rows}, records, cache, order_errors, order_stats)
+            except Exception as e:
+                self._reset_import_cache(cache)
+                self._add_row_errors(errors, [index for index, row in indexed_rows], e)
+                continue
+            errors += order_errors
+            for key, value in order_stats.items():
+                stats[key] += value
+        return errors, stats
+
+    def _write_orders(self, groups, records, cache, errors, stats):
+        """Resolve the keys of the orders, then create or update them"""
+        tracker = cache['telemetry']
+        # Semua pencarian dilakukan sekali per chunk, bukan per baris
+        with tracker.phase('resolve'):
+            cache['orders'] = {}
+            self._resolve_import_keys(
+                [records[index] for indexed_rows in groups.values() for index, row in indexed_rows], cache)
+        # Satu pesanan dibuat atau diperbarui sekali dengan semua barisnya. Savepoint
+        # per pesanan melakukan flush, total pesanan yang sudah ada dihitung sekali
+        # untuk seluruh chunk pada fase recompute
+        existing_orders = self.env['sale.order'].browse(list(cache['orders'].values()))
+        with tracker.phase('write'), existing_orders._defer_amount_compute():
+            self._import_orders(groups, records, cache, errors, stats)
+        with tracker.phase('recompute'):
+            self.env.flush_all()
+            self.env['sale.settlement.summary']._refresh_dirty()
+
+    def _reset_import_cache(self, cache):
+        """
+        Forget the ids resolved so far, some of them may have been created in
+        a savepoint that was rolled back
+        """
+        self.env.invalidate_all(flush=False)
+        self.env['sale.buyer.identity']._clear_cache()
+        for key in ('orders', 'partners', 'states', 'carriers', 'products'):
+            cache[key] = {}
+
+    def _create_rejected_file(self):
+        """
+        Write the rejected rows, with their original columns and an error
+        column, to a CSV file that can be fixed and imported again
+        """
+        messages = {}
+        for error in self.error_ids.filtered('row_number'):
+            messages.setdefault(error.row_number, []).append(error.message)
+        if not messages:
+            return
+
+        output = io.StringIO()
+        writer = None
+        last_index = max(messages)
+        for index, row in enumerate(self._iter_rows(), start=1):
+            if index in messages:
+                if writer is None:
+                    fieldnames = [key for key in row if key is not None] + [REJECTED_ERROR_COLUMN]
+                    writer = csv.DictWriter(output, fieldnames=fieldnames, extrasaction='ignore')
+                    writer.writeheader()
+                writer.writerow(dict(row, **{REJECTED_ERROR_COLUMN: '; '.join(messages[index])}))
+            if index >= last_index:
+                break
+
+        self.write({
+            'rejected_file': base64.b64encode(output.getvalue().encode('utf-8')),
+            'rejected_filename': '%s_rejected.csv' % self.name.rsplit('.', 1)[0],
+        })
+
+    def _commit_chunk(self):
+        """
+        Commit the orders written so far and release the record cache so the
+        memory used by the import does not grow with the file size
+        """
+        if not self.env.registry.in_test_mode():
+            self.env.cr.commit()
+        self.env.invalidate_all()
+
+    def _try_lock(self):
+        """
+        Take a session-level advisory lock on the job. It survives the chunk
+        commits and is released by PostgreSQL if the worker dies, so a killed
+        job can be resumed by the next cron run
+        """
+        self.env.cr.execute("SELECT pg_try_advisory_lock(hashtext(%s), %s)", (self._name, self.id))
+        return self.env.cr.fetchone()[0]
+
+    def _unlock(self):
+        self.env.cr.execute("SELECT pg_advisory_unlock(hashtext(%s), %s)", (self._name, self.id))
+
+    def _run(self, time_limit=None):
+        """
+        Import the file from the last committed row offset, chunk by chunk.
+        Return True when the whole file has been processed, False when the
+        time limit was reached and the job must be resumed later, and None
+        when the job is already being processed by another worker
+        """
+        self.ensure_one()
+        if self.user_id and self.env.uid != self.user_id.id:
+            # Pesanan dibuat atas nama pengguna yang meminta import, juga saat dijalankan oleh cron
+            return self.with_user(self.user_id).with_company(self.user_id.company_id)._run(time_limit)
+        if self.state not in ('draft', 'queued', 'running'):
+            return True
+        if not self._try_lock():
+            _logger.info("Import job %s is already being processed", self.id)
+            return None
+        tracker = telemetry.Telemetry(profile=self.capture_profile)
+        counters = self._get_log_counters()
+        query_count = self.env.cr.sql_log_count
+        tracker.start()
+        try:
+            finished = self._process(time_limit, tracker)
+            tracker.stop()
+            self._create_log(tracker, counters, self.env.cr.sql_log_count - query_count,
+                             'done' if finished else 'paused')
+            self._commit_chunk()
+            return finished
+        except Exception as e:
+            tracker.stop()
+            query_count = self.env.cr.sql_log_count - query_count
+            self.env.cr.rollback()
+            self.env.invalidate_all()
+            _logger.exception("Import job %s failed", self.id)
+            self.write({'state': 'failed', 'error_log': '\n'.join(filter(None, [self.error_log, str(e)]))})
+            self._create_log(tracker, counters, query_count, 'failed')
+            self._commit_chunk()
+            raise
+        finally:
+            self._unlock()
+
+    def _get_log_counters(self):
+        """Snapshot of the job counters, the log of a run records their increase"""
+        return {name: self[name] for name in LOG_COUNTERS}
+
+    def _create_log(self, tracker, counters, query_count, state):
+        """Persist the telemetry of a run of the job"""
+        vals = {
+            'job_id': self.id,
+            'state': state,
+            'file_size': self.attachment_id.sudo().file_size,
+            'duration': tracker.duration,
+            'query_count': query_count,
+            'peak_memory': tracker.memory_peak / 1024.0,
+            'memory_growth': max(tracker.memory_peak - tracker.memory_start, 0) / 1024.0,
+        }
+        for name in LOG_COUNTERS:
+            vals[LOG_COUNTERS[name]] = self[name] - counters[name]
+        for phase, value in tracker.timings.items():
+            vals['%s_time' % phase] = value
+        profile_data = tracker.profile_data()
+        if profile_data:
+            vals.update({
+                'profile_file': base64.b64encode(profile_data),
+                'profile_filename': 'import_job_%s_%s.prof' % (self.id, len(self.log_ids) + 1),
+            })
+        return self.env['sale.import.log'].create(vals)
+
+    def _process(self, time_limit=None, tracker=None):
+        """Process the chunks of the file until the end or the time limit"""
+        tracker = tracker or telemetry.Telemetry()
+        deadline = time.monotonic() + time_limit if time_limit else None
+        vals = {'state': 'running'}
+        if not self.date_started:
+            vals['date_started'] = fields.Datetime.now()
+        self.write(vals)
+
+        if self._find_imported_duplicate():
+            return True
+
+        cache = self._prepare_import_cache()
+        cache['telemetry'] = tracker
+        chunk_queries = 0
+        rows = itertools.islice(tracker.iter_phase(self._iter_rows(), 'decode'), self.row_offset, None)
+        # Kolom profil dicocokkan dengan header file sebelum baris dikelompokkan
+        first_row = next(rows, None)
+        if first_row is not None:
+            cache['columns'] = self._resolve_file_columns(list(first_row))
+            rows = itertools.chain([first_row], rows)
+        key = next((header for target, field_name, header, converter, default in cache['columns']
+                    if (target, field_name) == ('sale.order', 'nomor_pesanan')), None)
+
+        partition = (self.partition_index, self.partition_count) if self.parent_id else None
+        chunks = self._iter_order_chunks(rows, max(self.chunk_size, 1), key, start=self.row_offset + 1,
+                                         partition=partition)
+        mapped_chunks = self._iter_mapped_chunks(chunks, cache, tracker)
+        order_locks = []
+        try:
+            for groups, records in mapped_chunks:
+                started = time.monotonic()
+                last_index = max(indexed_rows[-1][0] for indexed_rows in groups.values())
+                query_count = self.env.cr.sql_log_count
+                order_count = len(groups)
+                with tracker.phase('resolve'):
+                    order_locks = self._get_order_locks(groups, records)
+                    self._lock_chunk(order_locks, records, cache)
+                    groups, skipped = self._filter_imported_rows(groups, records)
+                errors, stats = self._import_chunk(groups, records, cache)
+                chunk_queries += self.env.cr.sql_log_count - query_count
+
+                self.env['sale.import.job.error'].create([{
+                    'job_id': self.id,
+                    'row_number': index,
+                    'message': message,
+                } for index, message in errors])
+                self.write({
+                    'row_offset': last_index,
+                    'order_count': self.order_count + stats['created'] + stats['updated'],
+                    'order_created_count': self.order_created_count + stats['created'],
+                    'order_updated_count': self.order_updated_count + stats['updated'],
+                    # Pesanan yang semua barisnya sudah pernah diimport juga tidak disentuh
+                    'order_untouched_count': self.order_untouched_count + stats['untouched'] + order_count - len(groups),
+                    'skipped_count': self.skipped_count + skipped,
+                    'error_count': self.error_count + len(errors),
+                    'processing_time': self.processing_time + time.monotonic() - started,
+                })
+                self._commit_chunk()
+                self._unlock_keys(order_locks)
+                order_locks = []
+                if deadline and time.monotonic() > deadline:
+                    return False
+        except Exception:
+            # Kunci sesi tidak ikut dilepas oleh rollback, transaksi yang gagal dibatalkan dulu
+            if order_locks:
+                self.env.cr.rollback()
+                self._unlock_keys(order_locks)
+            raise
+        finally:
+            # Menghentikan process pool dan chunk yang sudah dipetakan di depan
+            mapped_chunks.close()
+
+        _logger.info(
+            "Import job %s: %s rows, %s new / %s changed / %s untouched orders, %s errors, %s queries in this run",
+            self.id, self.row_offset, self.order_created_count, self.order_updated_count,
+            self.order_untouched_count, self.error_count, chunk_queries,
+        )
+        self._create_rejected_file()
+        self.write({'state': 'done', 'date_finished': fields.Datetime.now()})
+        self._commit_chunk()
+        return True
+
+    def _preview(self, error_limit=PREVIEW_ERROR_LIMIT):
+        """
+        Dry run of the import: parse the file and look the order numbers,
+        buyers, SKUs and carriers up in bulk, without any write. Return the
+        counts of what the import would create or update and a sample of
+        the rows that would fail
+        """
+        tracker = telemetry.Telemetry()
+        tracker.start()
+        row_count = 0
+        order_numbers = set()
+        buyer_keys = set()
+        carrier_names = set()
+        sku_rows = {}
+        named_skus = set()
+        errors = []
+        for indexes, records in self._iter_preview_orders(tracker):
+            row_count += len(indexes)
+            # Pemeriksaan yang sama dengan _prepare_order_vals dan _prepare_line_vals
+            order = records[indexes[0]]['sale.order']
+            if not order.get('nomor_pesanan'):
+                errors.extend((index, _("No. Pesanan is required to create or find a sale order."))
+                              for index in indexes)
+                continue
+            if not order.get('buyer_username'):
+                errors.extend((index, _("Username (Pembeli) is required to create or find a partner."))
+                              for index in indexes)
+                continue
+            order_numbers.add(order['nomor_pesanan'])
+            buyer_keys.add(buyers.normalize_username(order['buyer_username']))
+            if order.get('opsi_pengiriman'):
+                carrier_names.add(order['opsi_pengiriman'])
+            for index in indexes:
+                sku = records[index]['sale.order.line'].get('sku_reference')
+                sku_rows.setdefault(sku, []).append(index)
+                if records[index]['product.product'].get('name'):
+                    named_skus.add(sku)
+
+        with tracker.phase('resolve'):
+            existing_orders = self._preview_lookup('sale.order', 'nomor_pesanan', order_numbers,
+                                                   [('sale_marketplace', '=', self.marketplace_id.id)])
+            existing_buyers = self._preview_lookup('sale.buyer.identity', 'normalized_username', buyer_keys,
+                                                   [('marketplace_id', '=', self.marketplace_id.id)])
+            existing_skus = self._preview_lookup('product.product', 'default_code', sku_rows)
+            existing_carriers = self._preview_lookup('delivery.carrier', 'name', carrier_names)
+
+        new_skus = [sku for sku in sku_rows if sku not in existing_skus]
+        for sku in new_skus:
+            if sku not in named_skus:
+                errors.extend((index, _("Nama Produk is required to create product %s.") % sku)
+                              for index in sku_rows[sku])
+        errors.sort()
+        tracker.stop()
+        return {
+            'row_count': row_count,
+            'order_new_count': len(order_numbers - existing_orders),
+            'order_existing_count': len(order_numbers & existing_orders),
+            'buyer_new_count': len(buyer_keys - existing_buyers),
+            'product_new_count': len([sku for sku in new_skus if sku in named_skus]),
+            'carrier_new_count': len(carrier_names - existing_carriers),
+            'error_count': len(errors),
+            'errors': errors[:error_limit],
+            'duration': tracker.duration,
+        }
+
+    def _iter_preview_orders(self, tracker):
+        """
+        Read and map the file with the columns of the load mode, yielding
+        the row indexes of each order and the mapped records of its chunk
+        """
+        cache = {'columns': []}
+        rows = self._iter_rows()
+        first_row = next(rows, None)
+        if first_row is not None:
+            cache['columns'] = self._resolve_file_columns(list(first_row))
+            rows = itertools.chain([first_row], rows)
+        key = next((header for target, field_name, header, converter, default in cache['columns']
+                    if (target, field_name) == ('sale.order', 'nomor_pesanan')), None)
+        mapped_chunks = self._iter_mapped_chunks(self._iter_order_chunks(rows, PREVIEW_CHUNK_SIZE, key), cache, tracker)
+        try:
+            for groups, records in mapped_chunks:
+                for indexed_rows in groups.values():
+                    yield [index for index, row in indexed_rows], records
+        finally:
+            mapped_chunks.close()
+
+    def _preview_lookup(self, model_name, field_name, keys, domain=None):
+        """Return the keys already stored in a field of a model, searched in batches"""
+        found = set()
+        for batch in split_every(PREVIEW_LOOKUP_SIZE, [key for key in keys if key]):
+            for record in self.env[model_name].search_read(list(domain or []) + [(field_name, 'in', list(batch))],
+                                                            [field_name], load=None):
+                found.add(record[field_name])
+        return found
+
+    @api.model
+    def _cron_process_jobs(self):
+        """Process the queued jobs one at a time within the cron time budget"""
+        self._finalize_partitioned_jobs()
+        # Job yang dipartisi dijalankan oleh partisinya
+        jobs = self.search([('state', 'in', ('queued', 'running')), ('partition_ids', '=', False)], order='id')
+        for job in jobs:
+            try:
+                finished = job._run(time_limit=cron_time_limit())
+            except Exception:
+                continue
+            if finished is None:
+                continue
+            if not finished or len(jobs) > 1:
+                # Lanjutkan job yang tersisa pada eksekusi cron berikutnya
+                self._trigger_crons()
+            return
+
+    @api.model
+    def _trigger_crons(self):
+        """Wake every import cron up, each one processes a different job"""
+        for xmlid in IMPORT_CRONS:
+            cron = self.env.ref('%s.%s' % (self._module, xmlid), raise_if_not_found=False)
+            if cron and cron.active:
+                cron._trigger()
+
+    def _split_partitions(self):
+        """
+        Create one job per partition of the orders. Every partition reads the
+        whole file and imports the orders whose number hashes to it, so the
+        partitions never write the same order
+        """
+        for job in self.filtered(lambda job: job.partition_count > 1 and not job.parent_id and not job.partition_ids):
+            self.create([{
+                'name': '%s [%s/%s]' % (job.name, index + 1, job.partition_count),
+                'attachment_id': job.attachment_id.id,
+                'file_type': job.file_type,
+                'marketplace_id': job.marketplace_id.id,
+                'profile_id': job.profile_id.id,
+                'chunk_size': job.chunk_size,
+                'parse_workers': job.parse_workers,
+                'capture_profile': job.capture_profile,
+                'load_mode': job.load_mode,
+                'row_total': job.row_total,
+                'parent_id': job.id,
+                'partition_index': index,
+                'partition_count': job.partition_count,
+                'user_id': job.user_id.id,
+            } for index in range(job.partition_count)])
+
+    @api.model
+    def _finalize_partitioned_jobs(self):
+        """
+        Sum the counters of the partitions on their job once all of them
+        are finished
+        """
+        parents = self.search([('state', 'in', ('queued', 'running')), ('partition_ids', '!=', False)])
+        for parent in parents:
+            partitions = parent.partition_ids
+            states = set(partitions.mapped('state'))
+            if not states <= {'done', 'failed'}:
+                continue
+            vals = {name: sum(partitions.mapped(name)) for name in PARTITION_COUNTERS}
+            vals.update({
+                'row_offset': max(partitions.mapped('row_offset')),
+                'state': 'failed' if 'failed' in states else 'done',
+                'date_started': min(filter(None, partitions.mapped('date_started')), default=False),
+                'date_finished': fields.Datetime.now(),
+            })
+            try:
+                # Dua cron dapat menyelesaikan job yang sama, yang kalah cukup dilewati
+                with self.env.cr.savepoint():
+                    parent.write(vals)
+            except Exception as e:
+                _logger.info("Import job %s: partitions not summed yet (%s)", parent.id, str(e))
+
+    def action_queue(self):
+        """Queue the job to be processed in the background"""
+        jobs = self.filtered(lambda job: job.state in ('draft', 'failed'))
+        jobs._split_partitions()
+        # Partisi yang gagal dijalankan ulang bersama job induknya
+        (jobs | jobs.partition_ids).filtered(lambda job: job.state in ('draft', 'failed')).write({'state': 'queued'})
+        self._trigger_crons()
+        return True
+
+    def _get_form_action(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Import Job'),
+            'res_model': self._name,
+            'view_mode': 'form',
+            'res_id': self.id,
+        }
+
+    def action_view_orders(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Imported Sales Orders'),
+            'res_model': 'sale.order',
+            'view_mode': 'list,form',
+            'domain': [('import_job_id', 'in', (self | self.partition_ids).ids)],
+            'context': {'create': False},
+        }
+
+
+class SaleImportJobError(models.Model):
+    _name = 'sale.import.job.error'
+    _description = 'Sale Import Job Rejected Row'
+    _order = 'job_id, row_number, id'
+
+    job_id = fields.Many2one('sale.import.job', string='Import Job', required=True, ondelete='cascade', index=True)
+    row_number = fields.Integer(string='Row', readonly=True)
+    message = fields.Text(string='Error', readonly=True)
@@ -0,0 +1,44 @@
+from odoo import models, fields, api
+
+
+class SaleImportLog(models.Model):
+    _name = 'sale.import.log'
+    _description = 'Sale Import Run Log'
+    _order = 'id desc'
+
+    job_id = fields.Many2one('sale.import.job', string='Import Job', required=True, ondelete='cascade', index=True)
+    marketplace_id = fields.Many2one(related='job_id.marketplace_id', store=True)
+    file_type = fields.Selection(related='job_id.file_type', store=True)
+    state = fields.Selection([
+        ('done', 'Finished'),
+        ('paused', 'Time Limit Reached'),
+        ('failed', 'Failed'),
+    ], string='Outcome', required=True, readonly=True)
+    file_size = fields.Integer(string='File Size (bytes)', readonly=True)
+    row_count = fields.Integer(string='Rows', readonly=True)
+    order_created_count = fields.Integer(string='New Orders', readonly=True)
+    order_updated_count = fields.Integer(string='Changed Orders', readonly=True)
+    error_count = fields.Integer(string='Errors', readonly=True)
+    duration = fields.Float(string='Wall Time (s)', readonly=True)
+    decode_time = fields.Float(string='Decode (s)', readonly=True, help="Reading the rows from the file.")
+    parse_time = fields.Float(string='Parse (s)', readonly=True, help="Converting the rows with the column profile.")
+    resolve_time = fields.Float(string='Resolve (s)', readonly=True,
+                                help="Skipping the rows already imported and resolving orders, partners, carriers and products.")
+    write_time = fields.Float(string='Write (s)', readonly=True, help="Creating and updating the orders.")
+    recompute_time = fields.Float(string='Recompute (s)', readonly=True,
+                                  help="Flushing the pending computed fields and writes of each chunk.")
+    query_count = fields.Integer(string='SQL Queries', readonly=True)
+    peak_memory = fields.Float(string='Peak Memory (MB)', readonly=True,
+                               help="Highest resident memory of the import process during the run, sampled at the "
+                                    "end of each phase. The parse processes are not included.")
+    memory_growth = fields.Float(string='Memory Growth (MB)', readonly=True,
+                                 help="Peak memory of the run minus the resident memory of the process when it started.")
+    rows_per_second = fields.Float(string='Rows/s', compute='_compute_rows_per_second', store=True, aggregator='avg')
+    profile_file = fields.Binary(string='cProfile Stats', readonly=True, attachment=True,
+                                 help="Open with pstats or snakeviz.")
+    profile_filename = fields.Char(string='cProfile Filename', readonly=True)
+
+    @api.depends('row_count', 'duration')
+    def _compute_rows_per_second(self):
+        for log in self:
+            log.rows_per_second = log.row_count / log.duration if log.duration else 0.0
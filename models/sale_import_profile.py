@@ -0,0 +1,90 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError, ValidationError
+import logging
+
+from ..tools import converters
+
+_logger = logging.getLogger(__name__)
+
+
+class SaleImportProfile(models.Model):
+    _name = 'sale.import.profile'
+    _description = 'Sale Import Column Profile'
+    _order = 'sequence, id'
+
+    name = fields.Char(string='Name', required=True)
+    sequence = fields.Integer(string='Sequence', default=10)
+    active = fields.Boolean(string='Active', default=True)
+    marketplace_id = fields.Many2one('market.place', string='Marketplace',
+                                     help="Marketplace whose exports use this profile. "
+                                          "A profile without marketplace is used when no other profile matches.")
+    column_ids = fields.One2many('sale.import.profile.column', 'profile_id', string='Columns', copy=True)
+
+    @api.model
+    def _get_for_marketplace(self, marketplace):
+        """Return the profile of the marketplace, or the default profile"""
+        profile = self.search([('marketplace_id', '=', marketplace.id)], limit=1) if marketplace else self
+        return profile or self.search([('marketplace_id', '=', False)], limit=1)
+
+    def _resolve_columns(self, headers):
+        """
+        Match the columns of the profile with the headers of a file. For
+        every mapped field, the first of its columns found in the file is
+        kept, so several header spellings of a field can be declared.
+        Return a list of (target, field_name, header, converter, default)
+        """
+        self.ensure_one()
+        file_headers = {}
+        for header in headers:
+            if header is not None:
+                file_headers.setdefault(converters.header_key(header), header)
+
+        resolved = []
+        mapped = set()
+        for column in self.column_ids:
+            header = file_headers.get(converters.header_key(column.header))
+            if header is None or (column.target, column.field_name) in mapped:
+                continue
+            mapped.add((column.target, column.field_name))
+            resolved.append((column.target, column.field_name, header, column.converter, column.default_value or False))
+
+        if ('sale.order', 'nomor_pesanan') not in mapped:
+            raise UserError(_("The file has no order number column known by the import profile '%s'.") % self.name)
+        _logger.info("Import profile %s: %s of %s columns mapped", self.name, len(resolved), len(file_headers))
+        return resolved
+
+
+class SaleImportProfileColumn(models.Model):
+    _name = 'sale.import.profile.column'
+    _description = 'Sale Import Profile Column'
+    _order = 'profile_id, sequence, id'
+
+    profile_id = fields.Many2one('sale.import.profile', string='Profile', required=True, ondelete='cascade', index=True)
+    sequence = fields.Integer(string='Sequence', default=10)
+    header = fields.Char(string='Header', required=True,
+                         help="Header of the column in the file. Case and spaces are ignored.")
+    target = fields.Selection([
+        ('sale.order', 'Sale Order'),
+        ('sale.order.line', 'Sale Order Line'),
+        ('product.product', 'New Product'),
+    ], string='Target', required=True, default='sale.order')
+    field_name = fields.Char(string='Field', required=True)
+    converter = fields.Selection([
+        ('char', 'Text'),
+        ('memo', 'Repeated Text'),
+        ('float', 'Number'),
+        ('datetime', 'Date'),
+        ('selection', 'Selection'),
+    ], string='Conversion', required=True, default='char',
+        help="Repeated Text shares the value of the cells that repeat, e.g. status, city or province.")
+    default_value = fields.Char(string='Default Value',
+                                help="Value of a selection column when the cell is empty or unknown.")
+
+    @api.constrains('target', 'field_name', 'converter')
+    def _check_field_name(self):
+        for column in self:
+            field = self.env[column.target]._fields.get(column.field_name)
+            if not field:
+                raise ValidationError(_("Field '%s' does not exist on %s.") % (column.field_name, column.target))
+            if column.converter == 'selection' and field.type != 'selection':
+                raise ValidationError(_("Field '%s' is not a selection field.") % column.field_name)
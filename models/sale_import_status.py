@@ -0,0 +1,220 @@
+from odoo import models, fields, _
+from odoo.exceptions import ValidationError
+from odoo.tools import SQL
+import logging
+
+from ..tools import telemetry
+from .sale_import_job import PREVIEW_ERROR_LIMIT
+
+_logger = logging.getLogger(__name__)
+
+# Field sale.order yang dibaca oleh sinkronisasi status, kolom lain pada file diabaikan
+STATUS_SYNC_FIELDS = [
+    'nomor_pesanan',
+    'order_status',
+    'cancellation_return_status',
+    'tracking_number',
+    'order_completion_time',
+]
+# Nilainya sama untuk banyak pesanan, ditulis lewat ORM sekali per kombinasi nilai
+STATUS_GROUP_FIELDS = ['order_status', 'cancellation_return_status']
+# Nilainya berbeda per pesanan, ditulis dengan satu UPDATE per field. Nilai kosong pada file tidak menghapus nilai tersimpan
+STATUS_ORDER_FIELDS = ['tracking_number', 'order_completion_time']
+
+
+class SaleImportJob(models.Model):
+    _inherit = 'sale.import.job'
+
+    load_mode = fields.Selection(selection_add=[('status', 'Status Sync')], ondelete={'status': 'set default'},
+                                 help="Bulk SQL streams each chunk into a staging table with COPY and inserts the "
+                                      "orders and lines with set-based SQL, then recomputes the computed fields "
+                                      "once. Meant for backfills: no chatter messages are posted on the new orders. "
+                                      "Status Sync only updates the status, tracking number, cancellation/return "
+                                      "status and completion time of orders already imported.")
+
+    def _resolve_file_columns(self, headers):
+        columns = super()._resolve_file_columns(headers)
+        if self.load_mode != 'status':
+            return columns
+        return [column for column in columns if column[0] == 'sale.order' and column[1] in STATUS_SYNC_FIELDS]
+
+    def _preview(self, error_limit=PREVIEW_ERROR_LIMIT):
+        """
+        Dry run of the status sync: nothing is created, the orders missing
+        from the database and the unknown statuses are reported as errors
+        """
+        if self.load_mode != 'status':
+            return super()._preview(error_limit)
+        tracker = telemetry.Telemetry()
+        tracker.start()
+        statuses = self._get_selection_values('sale.order', 'order_status')
+        row_count = 0
+        order_rows = {}
+        errors = []
+        # Pemeriksaan yang sama dengan _prepare_status_updates
+        for indexes, records in self._iter_preview_orders(tracker):
+            row_count += len(indexes)
+            vals = records[indexes[0]]['sale.order']
+            number = vals.get('nomor_pesanan')
+            if not number:
+                errors.extend((index, _("No. Pesanan is required to create or find a sale order."))
+                              for index in indexes)
+                continue
+            if vals.get('order_status') and vals['order_status'] not in statuses:
+                errors.extend((index, _("Unknown Status Pesanan %s.") % vals['order_status']) for index in indexes)
+                continue
+            order_rows.setdefault(number, []).extend(indexes)
+
+        with tracker.phase('resolve'):
+            existing_orders = self._preview_lookup('sale.order', 'nomor_pesanan', order_rows,
+                                                   [('sale_marketplace', '=', self.marketplace_id.id)])
+        for number, indexes in order_rows.items():
+            if number not in existing_orders:
+                errors.extend((index, _("Sale order %s not found. Import it with the ORM or Bulk SQL load mode "
+                                        "first.") % number) for index in indexes)
+        errors.sort()
+        tracker.stop()
+        return {
+            'row_count': row_count,
+            'order_new_count': 0,
+            'order_existing_count': len(existing_orders),
+            'buyer_new_count': 0,
+            'product_new_count': 0,
+            'carrier_new_count': 0,
+            'error_count': len(errors),
+            'errors': errors[:error_limit],
+            'duration': tracker.duration,
+        }
+
+    def _create_shared_records(self, records, cache):
+        # Sinkronisasi status tidak membuat carrier maupun produk
+        if self.load_mode != 'status':
+            return super()._create_shared_records(records, cache)
+
+    def _filter_imported_rows(self, groups, records):
+        """
+        The status sync reads only the status columns, so its row and order
+        hashes never match those of a full import: no row is skipped. It
+        does not refresh import_order_hash either, which it cannot compute
+        from these columns; the next full import processes the synced
+        orders again and finds nothing left to write for their status
+        """
+        if self.load_mode != 'status':
+            return super()._filter_imported_rows(groups, records)
+        return groups, 0
+
+    def _write_orders(self, groups, records, cache, errors, stats):
+        if self.load_mode != 'status':
+            return super()._write_orders(groups, records, cache, errors, stats)
+        tracker = cache['telemetry']
+        with tracker.phase('resolve'):
+            orders = self._find_status_orders(groups, records)
+        with tracker.phase('write'):
+            order_updates, group_updates = self._prepare_status_updates(groups, records, orders, errors, stats)
+            # Waktu selesai ditulis lebih dulu agar _check_order_status melihatnya saat status ditulis
+            self._write_order_values(order_updates)
+            SaleOrder = self.env['sale.order']
+            for group_vals, order_ids in group_updates.items():
+                SaleOrder.browse(order_ids).write(dict(group_vals))
+        with tracker.phase('recompute'):
+            self.env.flush_all()
+            self.env['sale.settlement.summary']._refresh_dirty()
+
+    def _find_status_orders(self, groups, records):
+        """
+        Read the synced fields of the orders of the chunk in one query and
+        index the orders by nomor_pesanan
+        """
+        numbers = {records[indexed_rows[0][0]]['sale.order'].get('nomor_pesanan') for indexed_rows in groups.values()}
+        numbers.discard(None)
+        numbers.discard(False)
+        if not numbers:
+            return {}
+        orders = self.env['sale.order'].search_fetch([
+            ('nomor_pesanan', 'in', list(numbers)),
+            ('sale_marketplace', '=', self.marketplace_id.id),
+        ], STATUS_SYNC_FIELDS)
+        return {order.nomor_pesanan: order for order in orders}
+
+    def _prepare_status_updates(self, groups, records, orders, errors, stats):
+        """
+        Compare the file with the orders. Return {order id: per-order values}
+        and {(field, value) pairs: order ids} for the values shared by many
+        orders. An order becoming 'Selesai' without a completion time gets
+        the one _check_order_status would set
+        """
+        statuses = self._get_selection_values('sale.order', 'order_status')
+        now = fields.Datetime.now()
+        order_updates = {}
+        group_updates = {}
+        for order_number, indexed_rows in groups.items():
+            indexes = [index for index, row in indexed_rows]
+            vals = records[indexes[0]]['sale.order']
+            number = vals.get('nomor_pesanan')
+            if not number:
+                self._add_row_errors(errors, indexes, ValidationError(
+                    _("No. Pesanan is required to create or find a sale order.")))
+                continue
+            order = orders.get(number)
+            if not order:
+                self._add_row_errors(errors, indexes, ValidationError(
+                    _("Sale order %s not found. Import it with the ORM or Bulk SQL load mode first.") % number))
+                continue
+            incoming = {name: vals[name] or False for name in STATUS_GROUP_FIELDS if name in vals}
+            incoming.update({name: vals[name] for name in STATUS_ORDER_FIELDS if vals.get(name)})
+            if incoming.get('order_status'):
+                if incoming['order_status'] not in statuses:
+                    self._add_row_errors(errors, indexes, ValidationError(
+                        _("Unknown Status Pesanan %s.") % incoming['order_status']))
+                    continue
+                incoming['order_status'] = statuses[incoming['order_status']]
+            else:
+                incoming.pop('order_status', None)
+
+            changed_vals = self._get_changed_vals(order, incoming)
+            status = changed_vals.get('order_status', order.order_status)
+            if status == 'Selesai' and not changed_vals.get('order_completion_time') and not order.order_completion_time:
+                changed_vals['order_completion_time'] = now
+            if not changed_vals:
+                stats['untouched'] += 1
+                continue
+            stats['updated'] += 1
+
+            order_vals = {name: changed_vals[name] for name in STATUS_ORDER_FIELDS if name in changed_vals}
+            if order_vals:
+                order_updates[order.id] = order_vals
+            group_vals = {name: changed_vals[name] for name in STATUS_GROUP_FIELDS if name in changed_vals}
+            group_vals['import_job_id'] = self.id
+            group_updates.setdefault(tuple(sorted(group_vals.items())), []).append(order.id)
+        return order_updates, group_updates
+
+    def _write_order_values(self, order_updates):
+        """
+        Write the per-order values with one UPDATE per field, then check the
+        completion time rule of the updated orders
+        """
+        if not order_updates:
+            return
+        SaleOrder = self.env['sale.order']
+        SaleOrder.flush_model(STATUS_ORDER_FIELDS)
+        for name in STATUS_ORDER_FIELDS:
+            values = {order_id: vals[name] for order_id, vals in order_updates.items() if name in vals}
+            if not values:
+                continue
+            field = SaleOrder._fields[name]
+            self.env.cr.execute(SQL("""
+                UPDATE sale_order o
+                   SET %(column)s = v.value, write_uid = %(uid)s, write_date = now() AT TIME ZONE 'UTC'
+                  FROM unnest(%(ids)s::int[], %(values)s::%(type)s[]) AS v(id, value)
+                 WHERE o.id = v.id
+                """,
+                column=SQL.identifier(name),
+                uid=self.env.uid,
+                ids=list(values),
+                values=[field.convert_to_column(value, SaleOrder, validate=False) for value in values.values()],
+                type=SQL(field.column_type[1]),
+            ))
+            updated = SaleOrder.browse(list(values))
+            updated.invalidate_recordset([name, 'write_uid', 'write_date'])
+            updated.modified([name])
+        SaleOrder.browse(list(order_updates))._validate_fields(STATUS_ORDER_FIELDS)
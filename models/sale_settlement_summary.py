@@ -0,0 +1,230 @@
+from odoo import models, fields, api
+from odoo.tools import SQL, sql
+import logging
+
+import psycopg2
+
+_logger = logging.getLogger(__name__)
+
+# Field uang sale.order yang dijumlahkan per hari, marketplace dan status
+ORDER_AMOUNT_FIELDS = [
+    'amount_total',
+    'seller_discount',
+    'platform_discount',
+    'voucher_seller',
+    'voucher_platform',
+    'coin_discount',
+    'shipping_fee_paid_by_buyer',
+    'shipping_fee_discount',
+    'return_shipping_fee',
+    'estimated_shipping_fee',
+]
+# Field uang sale.order.line yang dijumlahkan melalui pesanannya
+LINE_AMOUNT_FIELDS = [
+    'biaya_administrasi',
+    'biaya_layanan',
+]
+# Field sale.order yang menentukan kunci ringkasan
+ORDER_KEY_FIELDS = ['settlement_date', 'sale_marketplace', 'order_status', 'nomor_pesanan']
+
+# Kunci yang perlu dihitung ulang, disimpan pada data precommit cursor sampai commit
+DIRTY_KEYS = 'sale.settlement.summary.dirty'
+# Kunci yang refresh-nya kalah oleh transaksi lain, dihitung ulang oleh cron
+PENDING_TABLE = 'sale_settlement_summary_pending'
+
+
+class SaleSettlementSummary(models.Model):
+    _name = 'sale.settlement.summary'
+    _description = 'Marketplace Settlement Summary'
+    _order = 'date desc, marketplace_id, order_status'
+
+    date = fields.Date(string='Day', required=True, readonly=True)
+    marketplace_id = fields.Many2one('market.place', string='Marketplace', readonly=True, ondelete='cascade')
+    order_status = fields.Selection(selection=lambda self: self.env['sale.order']._fields['order_status'].selection,
+                                    string='Status Pesanan', readonly=True)
+    order_count = fields.Integer(string='Orders', readonly=True)
+    amount_total = fields.Float(string='Total', readonly=True)
+    seller_discount = fields.Float(string='Diskon Dari Penjual', readonly=True)
+    platform_discount = fields.Float(string='Diskon Dari Shopee', readonly=True)
+    voucher_seller = fields.Float(string='Voucher Ditanggung Penjual', readonly=True)
+    voucher_platform = fields.Float(string='Voucher Ditanggung Shopee', readonly=True)
+    coin_discount = fields.Float(string='Potongan Koin Shopee', readonly=True)
+    shipping_fee_paid_by_buyer = fields.Float(string='Ongkos Kirim Dibayar oleh Pembeli', readonly=True)
+    shipping_fee_discount = fields.Float(string='Estimasi Potongan Biaya Pengiriman', readonly=True)
+    return_shipping_fee = fields.Float(string='Ongkos Kirim Pengembalian Barang', readonly=True)
+    estimated_shipping_fee = fields.Float(string='Perkiraan Ongkos Kirim', readonly=True)
+    biaya_administrasi = fields.Float(string='Biaya Administrasi', readonly=True)
+    biaya_layanan = fields.Float(string='Biaya Layanan', readonly=True)
+
+    def init(self):
+        super().init()
+        if not sql.index_exists(self.env.cr, 'sale_settlement_summary_key_uniq'):
+            sql.create_unique_index(self.env.cr, 'sale_settlement_summary_key_uniq', self._table,
+                                    ['date', '(COALESCE(marketplace_id, 0))', "(COALESCE(order_status, ''))"])
+        # Tanpa unique key: INSERT ... ON CONFLICT bisa gagal serialisasi terhadap transaksi lain
+        self.env.cr.execute(SQL("""
+            CREATE TABLE IF NOT EXISTS %s (
+                day date NOT NULL,
+                marketplace_id int4 NOT NULL,
+                order_status varchar NOT NULL
+            )
+            """, SQL.identifier(PENDING_TABLE)))
+
+    @api.model
+    def _get_keys(self, orders):
+        """Summary keys of the marketplace orders, NULL replaced as in the unique key"""
+        return {
+            (order.settlement_date, order.sale_marketplace.id or 0, order.order_status or '')
+            for order in orders if order.nomor_pesanan and order.settlement_date
+        }
+
+    @api.model
+    def _mark_dirty(self, keys):
+        """
+        Remember the keys to recompute. They are recomputed before the
+        commit, or earlier by the caller with _refresh_dirty(). A rollback
+        forgets them together with the changes
+        """
+        if not keys:
+            return
+        cr = self.env.cr
+        data = cr.precommit.data
+        if DIRTY_KEYS not in data:
+            data[DIRTY_KEYS] = set()
+
+            @cr.precommit.add
+            def refresh():
+                self.sudo()._refresh_dirty()
+        data[DIRTY_KEYS].update(keys)
+
+    @api.model
+    def _refresh_dirty(self):
+        """
+        Recompute the keys marked dirty in this cursor. Keys locked by a
+        concurrent refresh are saved and recomputed by the cron
+        """
+        # Kunci yang ditandai setelah ini mendaftarkan hook precommit baru
+        keys = self.env.cr.precommit.data.pop(DIRTY_KEYS, None)
+        if not keys:
+            return
+        try:
+            with self.env.cr.savepoint():
+                self._refresh(keys)
+        except psycopg2.errors.SerializationFailure:
+            # Kunci yang sama sedang dihitung transaksi lain, disimpan bersama perubahan pesanan untuk cron
+            _logger.info("Settlement summary refresh of %s keys postponed by a concurrent update", len(keys))
+            self._postpone(keys)
+
+    @api.model
+    def _postpone(self, keys):
+        """Save the keys in the pending table, in the current transaction"""
+        days, marketplaces, statuses = zip(*keys)
+        self.env.cr.execute(SQL(
+            "INSERT INTO %s (day, marketplace_id, order_status) "
+            "SELECT * FROM unnest(%s::date[], %s::int[], %s::varchar[])",
+            SQL.identifier(PENDING_TABLE), list(days), list(marketplaces), list(statuses),
+        ))
+
+    @api.model
+    def _cron_refresh_pending(self):
+        """Recompute the keys postponed by serialization failures"""
+        try:
+            with self.env.cr.savepoint():
+                self.env.cr.execute(SQL(
+                    "DELETE FROM %s RETURNING day, marketplace_id, order_status", SQL.identifier(PENDING_TABLE)))
+                keys = set(self.env.cr.fetchall())
+                self._refresh(keys)
+        except psycopg2.errors.SerializationFailure:
+            # Kunci tetap tersimpan dan dicoba lagi pada jalannya cron berikutnya
+            _logger.info("Settlement summary refresh of the pending keys postponed by a concurrent update")
+            return
+        if keys:
+            _logger.info("Settlement summary refreshed %s pending keys", len(keys))
+
+    @api.model
+    def _refresh(self, keys):
+        """
+        Recompute the summary rows of the (day, marketplace id or 0, status
+        or '') keys from the orders, deleting the rows left without orders
+        """
+        if not keys:
+            return
+        self.env['sale.order'].flush_model(ORDER_KEY_FIELDS + ORDER_AMOUNT_FIELDS)
+        self.env['sale.order.line'].flush_model(['order_id'] + LINE_AMOUNT_FIELDS)
+        days, marketplaces, statuses = zip(*keys)
+        keys_query = SQL(
+            "SELECT * FROM unnest(%s::date[], %s::int[], %s::varchar[]) AS k(day, marketplace_id, order_status)",
+            list(days), list(marketplaces), list(statuses),
+        )
+        match_orders = SQL("""
+                o.settlement_date = k.day
+            AND COALESCE(o.sale_marketplace, 0) = k.marketplace_id
+            AND COALESCE(o.order_status, '') = k.order_status
+            AND o.nomor_pesanan IS NOT NULL
+        """)
+        self.env.cr.execute(SQL("""
+            WITH keys AS (%(keys)s)
+            INSERT INTO sale_settlement_summary (date, marketplace_id, order_status, order_count, %(columns)s,
+                                                 create_uid, write_uid, create_date, write_date)
+            SELECT o.settlement_date, o.sale_marketplace, o.order_status, COUNT(*), %(sums)s,
+                   %(uid)s, %(uid)s, now() AT TIME ZONE 'UTC', now() AT TIME ZONE 'UTC'
+              FROM keys k
+              JOIN sale_order o ON %(match)s
+         LEFT JOIN LATERAL (
+                   SELECT %(line_sums)s FROM sale_order_line l WHERE l.order_id = o.id
+                   ) lines ON TRUE
+          GROUP BY o.settlement_date, o.sale_marketplace, o.order_status
+                ON CONFLICT (date, (COALESCE(marketplace_id, 0)), (COALESCE(order_status, '')))
+                DO UPDATE SET order_count = EXCLUDED.order_count, %(updates)s,
+                              write_uid = EXCLUDED.write_uid, write_date = EXCLUDED.write_date
+            """,
+            keys=keys_query,
+            match=match_orders,
+            uid=self.env.uid,
+            columns=SQL(', ').join(SQL.identifier(name) for name in ORDER_AMOUNT_FIELDS + LINE_AMOUNT_FIELDS),
+            sums=SQL(', ').join(
+                [SQL('COALESCE(SUM(o.%s), 0)', SQL.identifier(name)) for name in ORDER_AMOUNT_FIELDS]
+                + [SQL('COALESCE(SUM(lines.%s), 0)', SQL.identifier(name)) for name in LINE_AMOUNT_FIELDS]),
+            line_sums=SQL(', ').join(
+                SQL('SUM(l.%s) AS %s', SQL.identifier(name), SQL.identifier(name)) for name in LINE_AMOUNT_FIELDS),
+            updates=SQL(', ').join(
+                SQL('%s = EXCLUDED.%s', SQL.identifier(name), SQL.identifier(name))
+                for name in ORDER_AMOUNT_FIELDS + LINE_AMOUNT_FIELDS),
+        ))
+        self.env.cr.execute(SQL("""
+            WITH keys AS (%(keys)s)
+            DELETE FROM sale_settlement_summary s
+             USING keys k
+             WHERE s.date = k.day
+               AND COALESCE(s.marketplace_id, 0) = k.marketplace_id
+               AND COALESCE(s.order_status, '') = k.order_status
+               AND NOT EXISTS (SELECT 1 FROM sale_order o WHERE %(match)s)
+            """,
+            keys=keys_query,
+            match=match_orders,
+        ))
+        self.invalidate_model()
+
+    @api.model
+    def _rebuild(self):
+        """
+        Recompute the whole summary from the orders, for instance after
+        orders were changed in SQL. Usable from a shell:
+        env['sale.settlement.summary']._rebuild()
+        """
+        self.env['sale.order'].flush_model(ORDER_KEY_FIELDS)
+        self.env.cr.execute("DELETE FROM sale_settlement_summary")
+        self.env.cr.execute(SQL("DELETE FROM %s", SQL.identifier(PENDING_TABLE)))
+        self.env.cr.execute("""
+            SELECT DISTINCT settlement_date, COALESCE(sale_marketplace, 0), COALESCE(order_status, '')
+              FROM sale_order
+             WHERE nomor_pesanan IS NOT NULL AND settlement_date IS NOT NULL
+        """)
+        keys = self.env.cr.fetchall()
+        self._refresh(keys)
+        _logger.info("Settlement summary rebuilt, %s days x marketplaces x statuses", len(keys))
+        return True
+
+    def action_rebuild(self):
+        self._rebuild()
+        return {'type': 'ir.actions.client', 'tag': 'reload'}
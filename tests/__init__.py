@@ -0,0 +1,2 @@
+from . import test_import_amounts
+from . import test_import_concurrency
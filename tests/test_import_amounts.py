@@ -0,0 +1,101 @@
+import contextlib
+import csv
+import io
+import unittest
+from unittest.mock import patch
+
+from odoo.tests import TransactionCase, tagged
+
+HEADER = [
+    'No. Pesanan', 'Status Pesanan', 'Username (Pembeli)', 'Nomor Referensi SKU', 'Nama Produk',
+    'Harga Awal', 'Harga Setelah Diskon', 'Jumlah',
+]
+SKUS = ['TEST-SKU-A', 'TEST-SKU-B', 'TEST-SKU-C']
+
+
+@tagged('post_install', '-at_install')
+class TestImportAmounts(TransactionCase):
+    """Amounts of the orders recomputed once per chunk by the import"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Model dari modul lain yang dipakai import tetapi tidak ada di depends
+        for model in ('market.place', 'account.payment.mode', 'sale.workflow.process', 'delivery.carrier'):
+            if model not in cls.env:
+                raise unittest.SkipTest("%s is required by the sale import" % model)
+        if not cls.env['account.payment.mode'].search([('name', '=', 'BC Online')], limit=1):
+            cls.env['account.payment.mode'].create({
+                'name': 'BC Online',
+                'payment_method_id': cls.env.ref('account.account_payment_method_manual_in').id,
+                'bank_account_link': 'variable',
+            })
+        if not cls.env['sale.workflow.process'].search([('name', '=', 'Automatic')], limit=1):
+            cls.env['sale.workflow.process'].create({'name': 'Automatic'})
+        cls.marketplace = cls.env['market.place'].create({'name': 'Test Marketplace'})
+        # Produk baru dari import mendapat pajak penjualan default perusahaan
+        cls.env.company.account_sale_tax_id = cls.env['account.tax'].create({
+            'name': 'Test PPN 11%',
+            'amount': 11.0,
+            'amount_type': 'percent',
+            'type_tax_use': 'sale',
+        })
+
+    def setUp(self):
+        super().setUp()
+        # Commit per chunk dilewati dalam test mode
+        if not self.registry.in_test_mode():
+            self.registry.enter_test_mode(self.cr)
+            self.addCleanup(self.registry.leave_test_mode)
+
+    def _get_rows(self, prefix, quantities, status):
+        return [{
+            'No. Pesanan': '%s%03d' % (prefix, number),
+            'Status Pesanan': status,
+            'Username (Pembeli)': 'test_buyer_%s' % number,
+            'Nomor Referensi SKU': sku,
+            'Nama Produk': 'Product %s' % sku,
+            'Harga Awal': '15000',
+            'Harga Setelah Diskon': '12500',
+            'Jumlah': str(quantity),
+        } for number in range(3) for sku, quantity in zip(SKUS, quantities)]
+
+    def _import(self, rows):
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=HEADER)
+        writer.writeheader()
+        writer.writerows(rows)
+        job = self.env['sale.import.job']._create_job({
+            'name': 'test_import.csv',
+            'file_type': 'csv',
+            'marketplace_id': self.marketplace.id,
+        }, raw=output.getvalue().encode('utf-8'))
+        job._run()
+        self.assertEqual(job.state, 'done')
+        self.assertFalse(job.error_ids.mapped('message'))
+        return job
+
+    def _import_and_update(self, prefix):
+        """Import three orders of three lines, then re-import them with other quantities and status"""
+        self._import(self._get_rows(prefix, (1, 2, 3), 'Perlu Dikirim'))
+        job = self._import(self._get_rows(prefix, (4, 2, 5), 'Sedang Dikirim'))
+        self.assertEqual(job.order_updated_count, 3)
+        return self.env['sale.order'].search([('nomor_pesanan', '=like', prefix + '%')], order='nomor_pesanan')
+
+    def test_deferred_amounts_match_immediate_amounts(self):
+        deferred_orders = self._import_and_update('TESTDEF')
+        SaleOrder = type(self.env['sale.order'])
+        with patch.object(SaleOrder, '_defer_amount_compute', lambda orders: contextlib.nullcontext()):
+            immediate_orders = self._import_and_update('TESTNOW')
+
+        self.assertEqual(len(deferred_orders), 3)
+        self.assertEqual(len(immediate_orders), 3)
+        for deferred, immediate in zip(deferred_orders, immediate_orders):
+            # Baris yang cocok diperbarui, tidak ditambahkan lagi
+            self.assertEqual(deferred.order_line.mapped('product_uom_qty'), [4.0, 2.0, 5.0])
+            self.assertEqual(deferred.order_status, 'Sedang Dikirim')
+            self.assertTrue(deferred.amount_tax)
+            for name in ('amount_untaxed', 'amount_tax', 'amount_total'):
+                self.assertAlmostEqual(deferred[name], immediate[name], places=2, msg=name)
+            self.assertAlmostEqual(deferred.amount_untaxed, sum(deferred.order_line.mapped('price_subtotal')),
+                                   places=2)
@@ -0,0 +1,108 @@
+import contextlib
+import csv
+import io
+import unittest
+
+from odoo import SUPERUSER_ID, api
+from odoo.modules.registry import Registry
+from odoo.tests.common import BaseCase, get_db_name, tagged
+
+from .test_import_amounts import HEADER
+
+SKUS = ['TEST-CONC-A', 'TEST-CONC-B']
+CARRIER = 'Test Concurrent Carrier'
+BUYERS = ['test_conc_buyer_0', 'test_conc_buyer_1']
+
+
+@tagged('post_install', '-at_install')
+class TestImportConcurrency(BaseCase):
+    """
+    Two imports committing from their own cursors, as two cron workers do.
+    The records are really committed and removed again after the test
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.db_registry = Registry(get_db_name())
+        self.created = []
+        with self._environment() as env:
+            # Model dari modul lain yang dipakai import tetapi tidak ada di depends
+            for model in ('market.place', 'account.payment.mode', 'sale.workflow.process', 'delivery.carrier'):
+                if model not in env:
+                    raise unittest.SkipTest("%s is required by the sale import" % model)
+            if not env['account.payment.mode'].search([('name', '=', 'BC Online')], limit=1):
+                self.created.append(env['account.payment.mode'].create({
+                    'name': 'BC Online',
+                    'payment_method_id': env.ref('account.account_payment_method_manual_in').id,
+                    'bank_account_link': 'variable',
+                }))
+            if not env['sale.workflow.process'].search([('name', '=', 'Automatic')], limit=1):
+                self.created.append(env['sale.workflow.process'].create({'name': 'Automatic'}))
+            marketplace = env['market.place'].create({'name': 'Test Concurrent Marketplace'})
+            self.created.append(marketplace)
+            self.marketplace_id = marketplace.id
+        self.created = [(record._name, record.ids) for record in self.created]
+        self.addCleanup(self._remove_records)
+
+    @contextlib.contextmanager
+    def _environment(self):
+        with self.db_registry.cursor() as cr:
+            yield api.Environment(cr, SUPERUSER_ID, {})
+
+    def _remove_records(self):
+        with self._environment() as env:
+            orders = env['sale.order'].search([('sale_marketplace', '=', self.marketplace_id)])
+            orders.filtered(lambda order: order.state not in ('draft', 'cancel'))._action_cancel()
+            orders.unlink()
+            env['sale.import.job'].search([('marketplace_id', '=', self.marketplace_id)]).unlink()
+            identities = env['sale.buyer.identity'].search([('marketplace_id', '=', self.marketplace_id)])
+            identities.partner_id.unlink()
+            env['product.product'].search([('default_code', 'in', SKUS)]).unlink()
+            env['delivery.carrier'].search([('name', '=', CARRIER)]).unlink()
+            for model_name, ids in reversed(self.created):
+                env[model_name].browse(ids).exists().unlink()
+
+    def _create_job(self, env, prefix):
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=HEADER + ['Opsi Pengiriman'])
+        writer.writeheader()
+        writer.writerows({
+            'No. Pesanan': '%s%03d' % (prefix, number),
+            'Status Pesanan': 'Perlu Dikirim',
+            'Username (Pembeli)': buyer,
+            'Nomor Referensi SKU': sku,
+            'Nama Produk': 'Product %s' % sku,
+            'Harga Awal': '15000',
+            'Harga Setelah Diskon': '12500',
+            'Jumlah': '1',
+            'Opsi Pengiriman': CARRIER,
+        } for number, buyer in enumerate(BUYERS) for sku in SKUS)
+        return env['sale.import.job']._create_job({
+            'name': '%s.csv' % prefix,
+            'file_type': 'csv',
+            'marketplace_id': self.marketplace_id,
+        }, raw=output.getvalue().encode('utf-8'))
+
+    def test_overlapping_keys_created_once(self):
+        with self._environment() as env1, self._environment() as env2:
+            job1 = self._create_job(env1, 'TESTCONA')
+            job2 = self._create_job(env2, 'TESTCONB')
+            env1.cr.commit()
+            env2.cr.commit()
+            # Snapshot transaksi job pertama diambil sebelum job kedua membuat produk, carrier dan pembeli
+            env1.cr.execute("SELECT 1")
+            job2._run()
+            job1._run()
+            for job in (job1, job2):
+                self.assertEqual(job.state, 'done')
+                self.assertFalse(job.error_ids.mapped('message'))
+
+        with self._environment() as env:
+            self.assertEqual(env['product.product'].search_count([('default_code', 'in', SKUS)]), len(SKUS))
+            self.assertEqual(env['delivery.carrier'].search_count([('name', '=', CARRIER)]), 1)
+            self.assertEqual(env['sale.buyer.identity'].search_count([
+                ('marketplace_id', '=', self.marketplace_id),
+            ]), len(BUYERS))
+            orders = env['sale.order'].search([('sale_marketplace', '=', self.marketplace_id)])
+            self.assertEqual(len(orders), 2 * len(BUYERS))
+            self.assertEqual(len(orders.partner_id), len(BUYERS))
@@ -0,0 +1,6 @@
+from . import buyers
+from . import converters
+from . import mapping
+from . import readers
+from . import telemetry
+from . import writers
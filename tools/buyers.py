@@ -0,0 +1,68 @@
+"""
+Identitas pembeli marketplace: normalisasi username dan nomor telepon, serta
+cache LRU dalam proses untuk pembeli yang berulang.
+
+Username dinormalisasi sama persis dengan ekspresi SQL di
+sale.buyer.identity (trim, spasi beruntun menjadi satu, huruf kecil)
+sehingga identitas yang diisi dari data lama cocok dengan hasil import.
+Modul ini tidak bergantung pada Odoo.
+"""
+import collections
+import re
+import threading
+
+# Jumlah pembeli yang diingat per proses worker
+CACHE_SIZE = 200000
+
+_NON_DIGITS = re.compile(r'\D+')
+
+
+def normalize_username(username):
+    """Key of a buyer username: trimmed, single spaced and lower case"""
+    return ' '.join(str(username or '').split()).lower()
+
+
+def normalize_phone(phone):
+    """
+    International digits of an Indonesian phone number, or False when the
+    number is empty or masked by the marketplace
+    """
+    digits = _NON_DIGITS.sub('', str(phone or ''))
+    if digits.startswith('0'):
+        digits = '62' + digits[1:]
+    return digits if len(digits) >= 8 else False
+
+
+class LRUCache:
+    """Least recently used mapping with a maximum size, shared by the threads of a worker"""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,121 @@
+"""
+Konverter nilai kolom file export marketplace.
+
+Konverter disusun sekali per file (tools.mapping.compile_plan): format
+tanggal setiap kolom tanggal ditebak dari sampel baris, lalu setiap kolom
+mendapat satu fungsi konversi langsung. Nilai yang berulang (waktu, kota,
+provinsi, status) dimemoisasi sehingga konversi per sel cukup satu
+pemanggilan fungsi.
+Modul ini tidak bergantung pada Odoo.
+"""
+import functools
+import logging
+from datetime import datetime
+
+_logger = logging.getLogger(__name__)
+
+DATE_FORMATS = [
+    '%m/%d/%Y %H:%M',  # Format in your CSV: 9/21/2024 8:39
+    '%m/%d/%Y',
+    '%d/%m/%Y %H:%M',
+    '%d/%m/%Y',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%d',
+]
+
+# Jumlah nilai berbeda yang diingat per kolom
+MEMO_SIZE = 65536
+# Jumlah nilai tidak kosong per kolom yang dipakai untuk menebak format tanggal
+DATE_SAMPLE_SIZE = 200
+
+
+def parse_datetime(date_string):
+    """
+    Parse date from string format to datetime, trying every known format
+    """
+    if not date_string:
+        return False
+
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_string.strip(), fmt)
+        except ValueError:
+            continue
+
+    _logger.warning(f"Unable to parse date: {date_string}")
+    return False
+
+
+def parse_float(value):
+    if not value:
+        return 0.0
+    try:
+        # Menghapus pemisah ribuan dan mengganti pemisah desimal
+        cleaned_value = value.replace('.', '').replace(',', '.')
+        return float(cleaned_value)
+    except ValueError:
+        _logger.warning(f"Invalid float value: {value}")
+        return 0.0
+
+
+def infer_date_format(values, sample_size=DATE_SAMPLE_SIZE):
+    """Return the first known format that parses every sampled value, or None"""
+    samples = []
+    for value in values:
+        if value:
+            samples.append(value.strip())
+            if len(samples) >= sample_size:
+                break
+    if not samples:
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            for sample in samples:
+                datetime.strptime(sample, fmt)
+            return fmt
+        except ValueError:
+            continue
+    return None
+
+
+def datetime_converter(fmt):
+    """
+    Build a memoized converter for a date column of the given format. Values
+    that do not match it fall back to trying every known format
+    """
+    @functools.lru_cache(maxsize=MEMO_SIZE)
+    def convert(value):
+        if not value:
+            return False
+        if fmt:
+            try:
+                return datetime.strptime(value.strip(), fmt)
+            except ValueError:
+                pass
+        return parse_datetime(value)
+    return convert
+
+
+def memo_converter():
+    """Build a converter that returns a single shared object for repeated values"""
+    return functools.lru_cache(maxsize=MEMO_SIZE)(lambda value: value)
+
+
+def header_key(header):
+    """
+    Key used to match a header of a file with a profile column, ignoring
+    case and whitespace ('Returned quantity' / 'Returned Quantity',
+    'counter/ pick-up' / 'counter/pick-up')
+    """
+    return ''.join(str(header).split()).lower()
+
+
+def selection_converter(values, default=False):
+    """
+    Build a converter mapping the labels (or the values) of a selection to
+    its values, with a default for empty or unknown cells
+    """
+    def convert(value):
+        return values.get(value.strip() if value else value, default)
+    return convert
@@ -0,0 +1,164 @@
+"""
+Pemetaan baris file export ke nilai sale.order, sale.order.line dan
+product.product.
+
+Rencana pemetaan (spec) disusun sekali per file oleh job import dari profil
+kolom, berupa data biasa yang dapat di-pickle, lalu dikompilasi menjadi
+konverter di setiap proses. Tahap ini murni CPU (konversi angka dan tanggal,
+harga dan diskon baris, hash baris) sehingga dapat dijalankan di process pool
+sementara proses utama menulis chunk sebelumnya ke database.
+Modul ini tidak bergantung pada Odoo.
+"""
+import collections
+import contextlib
+import functools
+import hashlib
+import multiprocessing
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from . import converters
+
+TARGETS = ('sale.order', 'sale.order.line', 'product.product')
+
+# Rencana yang dikompilasi sekali di setiap proses worker
+_worker_plan = None
+
+
+def row_hash(row, headers, salt):
+    """Content hash of some columns of a source row"""
+    content = '\x1f'.join('%s=%s' % (header, row.get(header)) for header in headers)
+    return hashlib.sha1(('%s\x1e%s' % (salt, content)).encode('utf-8')).hexdigest()
+
+
+def partition_of(order_number, count):
+    """Stable partition of an order number, the same in every process"""
+    return zlib.crc32(str(order_number or '').encode('utf-8')) % count
+
+
+def build_spec(columns, sample_rows, selections, salt):
+    """
+    Build the picklable mapping spec of a file from the columns resolved by
+    its profile: (target, field_name, header, converter, default). The date
+    format of each date column is inferred from the sample rows, and
+    selections gives the value map of each selection field
+    """
+    spec_columns = []
+    for target, field_name, header, converter, default in columns:
+        option = None
+        if converter == 'datetime':
+            option = converters.infer_date_format(row.get(header) for row in sample_rows)
+        elif converter == 'selection':
+            option = (selections[target, field_name], default)
+        spec_columns.append((target, field_name, header, converter, option))
+    return {'columns': spec_columns, 'salt': salt}
+
+
+def compile_plan(spec):
+    """Compile the converters of a spec, repeated values are memoized per column"""
+    float_convert = functools.lru_cache(maxsize=converters.MEMO_SIZE)(converters.parse_float)
+    columns = []
+    for target, field_name, header, converter, option in spec['columns']:
+        if converter == 'datetime':
+            convert = converters.datetime_converter(option)
+        elif converter == 'float':
+            convert = float_convert
+        elif converter == 'memo':
+            convert = converters.memo_converter()
+        elif converter == 'selection':
+            convert = converters.selection_converter(*option)
+        else:
+            convert = None
+        columns.append((target, field_name, header, convert))
+    # Hash baris hanya mencakup kolom baris pesanan (dan nomor pesanan), perubahan status
+    # pesanan tidak membuat baris yang sudah ada terlihat baru
+    order_headers = [header for target, field_name, header, convert in columns if target == 'sale.order']
+    line_headers = [header for target, field_name, header, convert in columns
+                    if target != 'sale.order' or field_name == 'nomor_pesanan']
+    return {'columns': columns, 'salt': spec['salt'], 'order_headers': order_headers, 'line_headers': line_headers}
+
+
+def map_row(row, plan):
+    """
+    Convert a row to the values of each target model, with the price and
+    discount of its order line and the content hashes of its order and line
+    columns
+    """
+    record = {target: {} for target in TARGETS}
+    for target, field_name, header, convert in plan['columns']:
+        value = row.get(header)
+        record[target][field_name] = convert(value) if convert else value
+
+    line = record['sale.order.line']
+    original_price = line.get('original_price') or 0.0
+    discounted_price = line.get('discounted_price', original_price) or 0.0
+    # Calculate discount percentage
+    if original_price > 0:
+        line['discount'] = ((original_price - discounted_price) / original_price) * 100
+    else:
+        line['discount'] = 0.0
+    line['price_unit'] = original_price
+    line['import_row_hash'] = row_hash(row, plan['line_headers'], plan['salt'])
+    record['sale.order']['import_order_hash'] = row_hash(row, plan['order_headers'], plan['salt'])
+    return record
+
+
+def map_rows(indexed_rows, plan):
+    """Map a list of (row number, row), return {row number: record}"""
+    return {index: map_row(row, plan) for index, row in indexed_rows}
+
+
+def _init_worker(spec):
+    global _worker_plan
+    _worker_plan = compile_plan(spec)
+
+
+def _map_worker_rows(indexed_rows):
+    return map_rows(indexed_rows, _worker_plan)
+
+
+def _chunk_rows(groups):
+    return [indexed_row for indexed_rows in groups.values() for indexed_row in indexed_rows]
+
+
+def iter_mapped_chunks(chunks, spec, workers=1, tracker=None):
+    """
+    Yield (groups, records) for each chunk of order groups. With several
+    workers the chunks are mapped ahead in a process pool, at most two per
+    worker, while the caller writes the current one. The time spent waiting
+    for the mapping is counted in the parse phase of the tracker
+    """
+    if workers <= 1:
+        plan = compile_plan(spec)
+        for groups in chunks:
+            with _phase(tracker, 'parse'):
+                records = map_rows(_chunk_rows(groups), plan)
+            yield groups, records
+        return
+
+    # fork: worker tidak mengimpor ulang Odoo dan hanya menjalankan fungsi murni modul ini
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(spec,)) as executor:
+        pending = collections.deque()
+        try:
+            for groups in chunks:
+                pending.append((groups, executor.submit(_map_worker_rows, _chunk_rows(groups))))
+                if len(pending) >= 2 * workers:
+                    groups, future = pending.popleft()
+                    with _phase(tracker, 'parse'):
+                        records = future.result()
+                    yield groups, records
+            while pending:
+                groups, future = pending.popleft()
+                with _phase(tracker, 'parse'):
+                    records = future.result()
+                yield groups, records
+        finally:
+            # Chunk yang sudah dipetakan tetapi tidak ditulis (batas waktu) dibaca ulang pada run berikutnya
+            for groups, future in pending:
+                future.cancel()
+
+
+def _phase(tracker, name):
+    return tracker.phase(name) if tracker else contextlib.nullcontext()
@@ -0,0 +1,138 @@
+"""
+Pembaca file export marketplace (CSV, XLS, XLSX).
+
+Setiap reader menerima stream biner yang sudah dibuka dan menghasilkan baris
+satu per satu sebagai dict {header: nilai string}, sehingga ketiga format
+masuk ke pipeline import yang sama tanpa memuat seluruh file ke memori.
+Modul ini tidak bergantung pada Odoo.
+"""
+import codecs
+import csv
+import io
+
+try:
+    import xlrd
+except ImportError:
+    xlrd = None
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+# Ukuran sampel yang dibaca untuk mendeteksi encoding file CSV
+ENCODING_SAMPLE_SIZE = 64 * 1024
+# utf-8-sig juga membaca UTF-8 biasa, dan membuang BOM yang ditulis Excel di awal file
+CSV_ENCODINGS = ['utf-8-sig', 'iso-8859-1', 'windows-1252']
+
+
+def detect_encoding(binary_file, sample_size=ENCODING_SAMPLE_SIZE):
+    """Detect the encoding of the file from a sample of its first bytes"""
+    sample = binary_file.read(sample_size)
+    binary_file.seek(0)
+    for encoding in CSV_ENCODINGS:
+        try:
+            # final=False agar karakter multi-byte yang terpotong di akhir sampel tidak dianggap error
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    raise UnicodeError("Unable to detect the file encoding")
+
+
+def _decode_windows_1252(error):
+    """
+    Decode the bytes that are not valid UTF-8 as windows-1252, for the
+    exports whose first non-ASCII character comes after the detection sample
+    """
+    text = ''.join(bytes([byte]).decode('windows-1252', errors='ignore') or chr(byte)
+                   for byte in error.object[error.start:error.end])
+    return text, error.end
+
+
+# Encoding terdeteksi dari sampel awal saja, byte non-UTF-8 setelahnya dibaca sebagai windows-1252
+FALLBACK_ERRORS = 'sale_import_windows_1252'
+codecs.register_error(FALLBACK_ERRORS, _decode_windows_1252)
+
+
+def iter_csv_rows(binary_file):
+    """Stream the rows of a CSV file"""
+    encoding = detect_encoding(binary_file)
+    errors = FALLBACK_ERRORS if encoding == 'utf-8-sig' else 'strict'
+    file_input = io.TextIOWrapper(binary_file, encoding=encoding, errors=errors, newline='')
+    try:
+        yield from csv.DictReader(file_input, delimiter=',')
+    finally:
+        # Lepaskan wrapper tanpa menutup stream milik pemanggil
+        file_input.detach()
+
+
+def _number_to_string(value):
+    """Convert numbers to strings to match CSV behavior"""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def iter_xls_rows(binary_file):
+    """Stream the rows of the first sheet of an XLS file, one whole row at a time"""
+    book = xlrd.open_workbook(file_contents=binary_file.read(), on_demand=True)
+    try:
+        sheet = book.sheet_by_index(0)
+        headers = [str(value) for value in sheet.row_values(0)]
+        for row_idx in range(1, sheet.nrows):
+            yield {
+                header: _number_to_string(value) if isinstance(value, float) else (str(value) if value else '')
+                for header, value in zip(headers, sheet.row_values(row_idx))
+            }
+    finally:
+        book.release_resources()
+
+
+def iter_xlsx_rows(binary_file):
+    """Stream the rows of the active sheet of an XLSX file in read-only mode"""
+    workbook = openpyxl.load_workbook(binary_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = [str(value) for value in next(rows, ())]
+        for row in rows:
+            yield {
+                header: '' if value is None else (
+                    _number_to_string(value) if isinstance(value, (int, float)) else str(value))
+                for header, value in zip(headers, row)
+            }
+    finally:
+        workbook.close()
+
+
+def count_rows(file_type, binary_file):
+    """
+    Estimate the number of data rows of a file without parsing it. CSV rows
+    are counted by line breaks, so quoted multi-line cells are over-counted
+    """
+    try:
+        if file_type == 'csv':
+            lines = sum(block.count(b'\n') for block in iter(lambda: binary_file.read(1024 * 1024), b''))
+            return max(lines - 1, 0)
+        if file_type == 'xls':
+            book = xlrd.open_workbook(file_contents=binary_file.read(), on_demand=True)
+            try:
+                return max(book.sheet_by_index(0).nrows - 1, 0)
+            finally:
+                book.release_resources()
+        if file_type == 'xlsx':
+            workbook = openpyxl.load_workbook(binary_file, read_only=True, data_only=True)
+            try:
+                return max((workbook.active.max_row or 1) - 1, 0)
+            finally:
+                workbook.close()
+    finally:
+        binary_file.seek(0)
+    return 0
+
+
+READERS = {
+    'csv': iter_csv_rows,
+    'xls': iter_xls_rows,
+    'xlsx': iter_xlsx_rows,
+}
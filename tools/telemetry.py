@@ -0,0 +1,95 @@
+"""
+Telemetri satu eksekusi import: waktu per fase, memori puncak dan profil
+cProfile opsional.
+
+Memori diukur dari resident memory saat ini (/proc/self/statm) di awal
+eksekusi dan di akhir setiap fase, bukan dari ru_maxrss yang merupakan
+puncak sepanjang umur proses: pada worker yang berumur panjang ru_maxrss
+tidak lagi naik setelah import besar pertama.
+
+Fase dihitung dengan akumulasi perf_counter sehingga biayanya dapat diabaikan
+dibanding pekerjaan yang diukur; pembacaan file yang berjalan lazy diukur per
+baris yang diambil dari iterator. Modul ini tidak bergantung pada Odoo.
+"""
+import contextlib
+import cProfile
+import marshal
+import os
+import time
+
+PHASES = ('decode', 'parse', 'resolve', 'write', 'recompute')
+
+try:
+    PAGE_SIZE_KB = os.sysconf('SC_PAGE_SIZE') // 1024
+except (AttributeError, ValueError, OSError):
+    PAGE_SIZE_KB = 4
+
+
+def current_memory_kb():
+    """Current resident memory of the process in kB, 0 when it cannot be measured"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE_KB
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class Telemetry:
+    """Accumulate the wall time of each phase of an import run"""
+
+    def __init__(self, profile=False):
+        self.timings = dict.fromkeys(PHASES, 0.0)
+        self.profiler = cProfile.Profile() if profile else None
+        self.duration = 0.0
+        self.memory_start = 0
+        self.memory_peak = 0
+        self._started = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        self.memory_start = current_memory_kb()
+        self.memory_peak = max(self.memory_peak, self.memory_start)
+        if self.profiler:
+            self.profiler.enable()
+
+    def stop(self):
+        if self._started is None:
+            return
+        if self.profiler:
+            self.profiler.disable()
+        self.duration += time.perf_counter() - self._started
+        self._sample_memory()
+        self._started = None
+
+    def _sample_memory(self):
+        self.memory_peak = max(self.memory_peak, current_memory_kb())
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += time.perf_counter() - started
+            self._sample_memory()
+
+    def iter_phase(self, iterable, name):
+        """Yield the items of a lazy iterable, counting the time spent producing them"""
+        iterator = iter(iterable)
+        timings = self.timings
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                timings[name] += time.perf_counter() - started
+            yield item
+
+    def profile_data(self):
+        """Return the cProfile stats in the format read by pstats, or None"""
+        if not self.profiler:
+            return None
+        self.profiler.create_stats()
+        return marshal.dumps(self.profiler.stats)
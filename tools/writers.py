@@ -0,0 +1,220 @@
+"""
+Penulis file export (CSV, XLSX) yang menghasilkan file sebagai potongan
+bytes selama file ditulis, sehingga dapat dikirim langsung ke browser tanpa
+menyimpan seluruh file di memori maupun di disk. XLSX ditulis sebagai zip
+streaming dengan XML worksheet yang dibuat sendiri, karena workbook openpyxl
+baru dapat dikirim setelah seluruh file disimpan. Modul ini tidak bergantung
+pada Odoo.
+"""
+import csv
+import datetime
+import io
+import itertools
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+# Jumlah baris per potongan file CSV yang dikirim
+CSV_CHUNK_ROWS = 1000
+# Jumlah baris per potongan file XLSX yang dikirim
+XLSX_CHUNK_ROWS = 1000
+# Tanggal nol serial tanggal Excel (sistem 1900)
+XLSX_EPOCH = datetime.datetime(1899, 12, 30)
+# Style cellXfs pada XLSX_STYLES: 1 tanggal-waktu, 2 tanggal
+XLSX_DATETIME_STYLE = 1
+XLSX_DATE_STYLE = 2
+# Batas satu worksheet: jumlah baris Excel, dan ukuran XML di bawah batas entri zip tanpa ZIP64.
+# ZIP64 tidak dipakai karena tidak semua versi Excel dapat membukanya
+XLSX_MAX_ROWS = 1048576
+XLSX_MAX_SHEET_SIZE = 1536 * 1024 * 1024
+# Karakter kontrol yang tidak boleh ada di XML
+XML_ILLEGAL_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '%s</Types>'
+)
+XLSX_SHEET_CONTENT_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet%d.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="xl/workbook.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+    '</Relationships>'
+)
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets>%s</sheets></workbook>'
+)
+XLSX_WORKBOOK_SHEET = '<sheet name="%s" sheetId="%d" r:id="rId%d"/>'
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rIdStyles" Target="styles.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"/>'
+    '%s</Relationships>'
+)
+XLSX_WORKBOOK_SHEET_REL = (
+    '<Relationship Id="rId%d" Target="worksheets/sheet%d.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+)
+# Format angka bawaan Excel: 22 tanggal-waktu, 14 tanggal
+XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+XLSX_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+XLSX_SHEET_END = '</sheetData></worksheet>'
+
+
+def iter_csv_chunks(header, rows, chunk_rows=CSV_CHUNK_ROWS):
+    """Yield a CSV file as encoded chunks of chunk_rows rows"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(header)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % chunk_rows == 0:
+            yield output.getvalue().encode()
+            output.seek(0)
+            output.truncate()
+    yield output.getvalue().encode()
+
+
+class _StreamBuffer:
+    """
+    Write-only file object collecting what zipfile writes until it is sent.
+    Without tell() and seek(), zipfile writes each entry with a data
+    descriptor instead of seeking back to its header
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _xlsx_cell(value):
+    """XML of one cell: numbers and datetimes typed, empty values as empty cells"""
+    if value is None or value is False:
+        return '<c/>'
+    if isinstance(value, bool):
+        return '<c t="b"><v>%d</v></c>' % value
+    if isinstance(value, (int, float)):
+        # NaN dan tak hingga tidak dapat disimpan sebagai angka Excel
+        if value != value or value in (float('inf'), float('-inf')):
+            return _xlsx_cell(str(value))
+        return '<c><v>%r</v></c>' % value
+    if isinstance(value, datetime.datetime):
+        serial = (value.replace(tzinfo=None) - XLSX_EPOCH) / datetime.timedelta(days=1)
+        return '<c s="%d"><v>%r</v></c>' % (XLSX_DATETIME_STYLE, serial)
+    if isinstance(value, datetime.date):
+        serial = (value - XLSX_EPOCH.date()).days
+        return '<c s="%d"><v>%d</v></c>' % (XLSX_DATE_STYLE, serial)
+    text = escape(XML_ILLEGAL_CHARS.sub('', str(value)))
+    return '<c t="inlineStr"><is><t xml:space="preserve">%s</t></is></c>' % text
+
+
+def _xlsx_row(row):
+    return '<row>%s</row>' % ''.join(_xlsx_cell(value) for value in row)
+
+
+def _write_xlsx_sheet(sheet, output, header, rows, chunk_rows):
+    """
+    Write the header and the rows into one worksheet, yielding the
+    compressed chunks, until the rows or the sheet limits run out. Return
+    the rows left for the next sheet, or None
+    """
+    buffer = [XLSX_SHEET_START, _xlsx_row(header)]
+    size = 0
+    count = 0
+    for row in rows:
+        buffer.append(_xlsx_row(row))
+        count += 1
+        if count % chunk_rows == 0:
+            data = ''.join(buffer).encode()
+            sheet.write(data)
+            size += len(data)
+            buffer = []
+            yield output.pop()
+        if count >= XLSX_MAX_ROWS - 1 or size >= XLSX_MAX_SHEET_SIZE:
+            break
+    else:
+        rows = None
+    buffer.append(XLSX_SHEET_END)
+    sheet.write(''.join(buffer).encode())
+    if rows is None:
+        return None
+    first_row = next(rows, None)
+    return None if first_row is None else itertools.chain([first_row], rows)
+
+
+def iter_xlsx_chunks(header, rows, sheet_title='Orders', chunk_rows=XLSX_CHUNK_ROWS):
+    """
+    Yield an XLSX file as compressed chunks of chunk_rows rows while it is
+    written: the zip is streamed and the worksheet XML is written row by
+    row, so the first bytes leave before the last rows are read and the
+    memory stays constant. Rows beyond the limits of a worksheet continue
+    on a new one. Strings are inline strings, never formulas
+    """
+    output = _StreamBuffer()
+    titles = []
+    rows = iter(rows)
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        while rows is not None:
+            titles.append(sheet_title if not titles else '%s (%d)' % (sheet_title, len(titles) + 1))
+            with archive.open('xl/worksheets/sheet%d.xml' % len(titles), 'w') as sheet:
+                rows = yield from _write_xlsx_sheet(sheet, output, header, rows, chunk_rows)
+        # Bagian workbook ditulis terakhir, setelah jumlah worksheet diketahui
+        sheet_numbers = range(1, len(titles) + 1)
+        archive.writestr('[Content_Types].xml', XLSX_CONTENT_TYPES % ''.join(
+            XLSX_SHEET_CONTENT_TYPE % number for number in sheet_numbers))
+        archive.writestr('_rels/.rels', XLSX_ROOT_RELS)
+        archive.writestr('xl/workbook.xml', XLSX_WORKBOOK % ''.join(
+            XLSX_WORKBOOK_SHEET % (escape(title, {'"': '&quot;'}), number, number)
+            for number, title in zip(sheet_numbers, titles)))
+        archive.writestr('xl/_rels/workbook.xml.rels', XLSX_WORKBOOK_RELS % ''.join(
+            XLSX_WORKBOOK_SHEET_REL % (number, number) for number in sheet_numbers))
+        archive.writestr('xl/styles.xml', XLSX_STYLES)
+    yield output.pop()
+
+
+WRITERS = {
+    'csv': iter_csv_chunks,
+    'xlsx': iter_xlsx_chunks,
+}
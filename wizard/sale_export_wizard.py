@@ -1,9 +1,51 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
-import base64
-import csv
-import io
-from datetime import datetime
+
+from ..tools import writers
+
+# Jumlah pesanan yang dibaca per batch saat export
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+EXPORT_HEADER = [
+    'No. Pesanan', 'Status Pesanan', 'Status Pembatalan/ Pengembalian', 'No. Resi',
+    'Opsi Pengiriman', 'Antar ke counter/pick-up', 'Pesanan Harus Dikirimkan Sebelum',
+    'Waktu Pesanan Dibuat', 'Waktu Pembayaran Dilakukan', 'Metode Pembayaran',
+    'Diskon Dari Penjual', 'Diskon Dari Shopee', 'Voucher Ditanggung Penjual',
+    'Cashback Koin', 'Voucher Ditanggung Shopee', 'Paket Diskon',
+    'Paket Diskon (Diskon dari Shopee)', 'Paket Diskon (Diskon dari Penjual)',
+    'Potongan Koin Shopee', 'Diskon Kartu Kredit', 'Ongkos Kirim Dibayar oleh Pembeli',
+    'Estimasi Potongan Biaya Pengiriman', 'Ongkos Kirim Pengembalian Barang',
+    'Perkiraan Ongkos Kirim', 'Catatan dari Pembeli', 'Username (Pembeli)',
+    'Nama Penerima', 'No. Telepon', 'Alamat Pengiriman', 'Kota/Kabupaten', 'Provinsi',
+    'Waktu Pesanan Selesai', 'SKU Induk', 'Nomor Referensi SKU', 'Nama Produk',
+    'Nama Variasi', 'Harga Awal', 'Harga Setelah Diskon', 'Jumlah', 'Berat Produk',
+    'Total Berat'
+]
+
+EXPORT_ORDER_FIELDS = [
+    'nomor_pesanan', 'order_status', 'cancellation_return_status',
+    'tracking_number', 'opsi_pengiriman', 'shipping_option',
+    'must_ship_before', 'order_creation_time', 'payment_time',
+    'payment_method', 'seller_discount', 'platform_discount',
+    'voucher_seller', 'cashback', 'voucher_platform',
+    'package_discount', 'package_discount_platform',
+    'package_discount_seller', 'coin_discount', 'credit_card_discount',
+    'shipping_fee_paid_by_buyer', 'shipping_fee_discount',
+    'return_shipping_fee', 'estimated_shipping_fee', 'buyer_note',
+    'buyer_username', 'receiver_name', 'receiver_phone',
+    'shipping_address', 'city', 'province', 'order_completion_time',
+]
+
+EXPORT_LINE_FIELDS = [
+    'order_id', 'product_id', 'parent_sku', 'sku_reference', 'variation_name',
+    'original_price', 'discounted_price', 'product_uom_qty',
+    'product_weight', 'total_weight',
+]
 
 class SaleExportWizard(models.TransientModel):
     _name = 'sale.export.wizard'
@@ -12,17 +54,17 @@ class SaleExportWizard(models.TransientModel):
     date_from = fields.Date(string='Date From', required=True)
     date_to = fields.Date(string='Date To', required=True)
     partner_ids = fields.Many2many('res.partner', string='Customers')
-    export_file = fields.Binary(string='Export File', readonly=True)
-    filename = fields.Char(string='Filename', default='sale_export.csv')
+    file_format = fields.Selection([
+        ('csv', 'CSV File'),
+        ('xlsx', 'XLSX File'),
+    ], string='File Format', required=True, default='csv')
 
     @api.onchange('date_from')
     def _onchange_date_from(self):
         if self.date_from and self.date_to and self.date_from > self.date_to:
             self.date_to = self.date_from
 
-    def action_export(self):
-        self.ensure_one()
-        
+    def _get_export_domain(self):
         # Define the domain for sale orders
         domain = [
             ('date_order', '>=', self.date_from),
@@ -30,68 +72,63 @@ class SaleExportWizard(models.TransientModel):
         ]
         if self.partner_ids:
             domain.append(('partner_id', 'in', self.partner_ids.ids))
+        return domain
 
-        # Fetch sale orders
-        sale_orders = self.env['sale.order'].search(domain)
+    def _get_export_filename(self):
+        return f'sale_export_{self.date_from}_{self.date_to}.{self.file_format}'
 
-        if not sale_orders:
-            raise UserError(_("No sale orders found for the selected criteria."))
+    def _get_export_mimetype(self):
+        return EXPORT_MIMETYPES[self.file_format]
 
-        # Prepare CSV data
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        # Write header
-        header = [
-            'No. Pesanan', 'Status Pesanan', 'Status Pembatalan/ Pengembalian', 'No. Resi',
-            'Opsi Pengiriman', 'Antar ke counter/pick-up', 'Pesanan Harus Dikirimkan Sebelum',
-            'Waktu Pesanan Dibuat', 'Waktu Pembayaran Dilakukan', 'Metode Pembayaran',
-            'Diskon Dari Penjual', 'Diskon Dari Shopee', 'Voucher Ditanggung Penjual',
-            'Cashback Koin', 'Voucher Ditanggung Shopee', 'Paket Diskon',
-            'Paket Diskon (Diskon dari Shopee)', 'Paket Diskon (Diskon dari Penjual)',
-            'Potongan Koin Shopee', 'Diskon Kartu Kredit', 'Ongkos Kirim Dibayar oleh Pembeli',
-            'Estimasi Potongan Biaya Pengiriman', 'Ongkos Kirim Pengembalian Barang',
-            'Perkiraan Ongkos Kirim', 'Catatan dari Pembeli', 'Username (Pembeli)',
-            'Nama Penerima', 'No. Telepon', 'Alamat Pengiriman', 'Kota/Kabupaten', 'Provinsi',
-            'Waktu Pesanan Selesai', 'SKU Induk', 'Nomor Referensi SKU', 'Nama Produk',
-            'Nama Variasi', 'Harga Awal', 'Harga Setelah Diskon', 'Jumlah', 'Berat Produk',
-            'Total Berat'
-        ]
-        writer.writerow(header)
-
-        # Write data
-        for order in sale_orders:
-            for line in order.order_line:
-                row = [
-                    order.nomor_pesanan, order.order_status, order.cancellation_return_status,
-                    order.tracking_number, order.opsi_pengiriman, order.shipping_option,
-                    order.must_ship_before, order.order_creation_time, order.payment_time,
-                    order.payment_method, order.seller_discount, order.platform_discount,
-                    order.voucher_seller, order.cashback, order.voucher_platform,
-                    order.package_discount, order.package_discount_platform,
-                    order.package_discount_seller, order.coin_discount, order.credit_card_discount,
-                    order.shipping_fee_paid_by_buyer, order.shipping_fee_discount,
-                    order.return_shipping_fee, order.estimated_shipping_fee, order.buyer_note,
-                    order.buyer_username, order.receiver_name, order.receiver_phone,
-                    order.shipping_address, order.city, order.province, order.order_completion_time,
-                    line.parent_sku, line.sku_reference, line.product_id.name, line.variation_name,
-                    line.original_price, line.discounted_price, line.product_uom_qty,
-                    line.product_weight, line.total_weight
-                ]
-                writer.writerow(row)
-
-        # Encode the CSV data
-        export_data = output.getvalue().encode()
-        
-        # Set the binary field and filename
-        self.export_file = base64.b64encode(export_data)
-        self.filename = f'sale_export_{self.date_from}_{self.date_to}.csv'
+    def _iter_export_rows(self):
+        """
+        Yield the export rows order by order. Orders and lines are fetched in
+        batches with explicit field lists, and the record cache is released
+        after each batch so memory stays bounded
+        """
+        SaleOrder = self.env['sale.order']
+        SaleOrderLine = self.env['sale.order.line']
+        order_ids = SaleOrder.search(self._get_export_domain()).ids
+        product_names = {}
+
+        for start in range(0, len(order_ids), EXPORT_BATCH_SIZE):
+            batch_ids = order_ids[start:start + EXPORT_BATCH_SIZE]
+            orders = SaleOrder.browse(batch_ids).read(EXPORT_ORDER_FIELDS, load=None)
+            lines_by_order = {}
+            for line in SaleOrderLine.search_read([('order_id', 'in', batch_ids)], EXPORT_LINE_FIELDS,
+                                                  order='order_id, sequence, id', load=None):
+                lines_by_order.setdefault(line['order_id'], []).append(line)
+
+            missing_products = {line['product_id'] for lines in lines_by_order.values() for line in lines} - set(product_names)
+            missing_products.discard(False)
+            for product in self.env['product.product'].browse(list(missing_products)).read(['name']):
+                product_names[product['id']] = product['name']
+
+            for order in orders:
+                order_values = [order[name] for name in EXPORT_ORDER_FIELDS]
+                for line in lines_by_order.get(order['id'], []):
+                    yield order_values + [
+                        line['parent_sku'], line['sku_reference'],
+                        product_names.get(line['product_id'], ''), line['variation_name'],
+                        line['original_price'], line['discounted_price'], line['product_uom_qty'],
+                        line['product_weight'], line['total_weight'],
+                    ]
+            self.env.invalidate_all()
+
+    def _iter_export_file(self):
+        """Yield the export file in the selected format as chunks of bytes"""
+        writer = writers.WRITERS[self.file_format]
+        return writer(EXPORT_HEADER, self._iter_export_rows())
+
+    def action_export(self):
+        self.ensure_one()
+
+        if not self.env['sale.order'].search_count(self._get_export_domain(), limit=1):
+            raise UserError(_("No sale orders found for the selected criteria."))
 
+        # File dikirim langsung ke browser oleh controller, tidak disimpan di wizard
         return {
-            'type': 'ir.actions.act_window',
-            'res_model': 'sale.export.wizard',
-            'view_mode': 'form',
-            'res_id': self.id,
-            'views': [(False, 'form')],
-            'target': 'new',
-        }
\ No newline at end of file
+            'type': 'ir.actions.act_url',
+            'url': f'/sale_export/{self.id}',
+            'target': 'self',
+        }
@@ -1,25 +1,7 @@
 from odoo import models, fields, api, _
-from odoo.exceptions import UserError, ValidationError
+from odoo.exceptions import UserError
 import base64
-import csv
-import io
-import logging
-from datetime import datetime
-import tempfile
 
-_logger = logging.getLogger(__name__)
-
-try:
-    import pytz
-except ImportError:
-    pytz = None
-    _logger.warning("pytz library is not installed. Timezone conversion may not be accurate.")
-
-try:
-    import xlrd
-    import openpyxl
-except ImportError:
-    _logger.warning("xlrd or openpyxl library is not installed. Excel import may not work.")
 
 class SaleImportWizard(models.TransientModel):
     _name = 'sale.import.wizard'
@@ -33,6 +15,37 @@ class SaleImportWizard(models.TransientModel):
         ('xlsx', 'XLSX File')
     ], string='File Type', required=True, default='csv')
     marketplace_id = fields.Many2one('market.place', string='Marketplace', required=True)
+    profile_id = fields.Many2one('sale.import.profile', string='Column Profile',
+                                 help="Column mapping of the file. Leave empty to use the profile of the marketplace.")
+    chunk_size = fields.Integer(string='Orders per Commit', default=500,
+                                help="Number of orders written and committed together during the import.")
+    parse_workers = fields.Integer(string='Parse Processes', default=1,
+                                   help="Processes converting the rows ahead of the database writes. 0 uses every CPU core.")
+    partition_count = fields.Integer(string='Parallel Workers', default=1,
+                                     help="Split the orders by a hash of their number into this many background "
+                                          "jobs processed in parallel. More than one always imports in the background.")
+    load_mode = fields.Selection([
+        ('orm', 'ORM'),
+        ('copy', 'Bulk SQL (COPY)'),
+        ('status', 'Status Sync'),
+    ], string='Load Mode', default='orm', required=True,
+        help="Bulk SQL inserts the orders and lines with set-based SQL, for large backfills. Status Sync only "
+             "updates the status, tracking number, cancellation/return status and completion time of orders "
+             "already imported, reading just those columns.")
+    capture_profile = fields.Boolean(string='Capture Profile',
+                                     help="Save a cProfile capture of the import on its run log. Slows the import down.")
+
+    # Hasil preview (dry run), tidak ada data penjualan yang ditulis
+    preview_done = fields.Boolean(string='Previewed', readonly=True)
+    preview_row_count = fields.Integer(string='Rows', readonly=True)
+    preview_order_new_count = fields.Integer(string='New Orders', readonly=True)
+    preview_order_existing_count = fields.Integer(string='Existing Orders', readonly=True)
+    preview_buyer_new_count = fields.Integer(string='New Buyers', readonly=True)
+    preview_product_new_count = fields.Integer(string='New Products', readonly=True)
+    preview_carrier_new_count = fields.Integer(string='New Carriers', readonly=True)
+    preview_error_count = fields.Integer(string='Failing Rows', readonly=True)
+    preview_errors = fields.Text(string='Sample Errors', readonly=True)
+    preview_duration = fields.Float(string='Preview Time (s)', readonly=True, digits=(16, 2))
 
     @api.onchange('filename')
     def _onchange_filename(self):
@@ -45,328 +58,99 @@ class SaleImportWizard(models.TransientModel):
             elif file_extension in ['xlsx']:
                 self.file_type = 'xlsx'
 
-    def _parse_file(self):
-        """Parse the uploaded file based on its type"""
-        if not self.file_data:
-            raise UserError(_("Please upload a file to import."))
-
-        if self.file_type == 'csv':
-            return self._parse_csv()
-        elif self.file_type == 'xls':
-            return self._parse_xls()
-        elif self.file_type == 'xlsx':
-            return self._parse_xlsx()
-        else:
-            raise UserError(_("Unsupported file type."))
-
-    def _parse_csv(self):
-        """Parse CSV file"""
-        data = base64.b64decode(self.file_data)
-        encodings = ['utf-8', 'iso-8859-1', 'windows-1252']
-        for encoding in encodings:
-            try:
-                file_input = io.StringIO(data.decode(encoding))
-                reader = csv.DictReader(file_input, delimiter=',')
-                return list(reader)
-            except UnicodeDecodeError:
-                continue
-        raise UserError(_("Unable to decode the CSV file. Please check the file encoding."))
+    @api.onchange('file_data', 'file_type', 'marketplace_id', 'profile_id', 'load_mode')
+    def _onchange_reset_preview(self):
+        self.preview_done = False
 
-    def _parse_xls(self):
-        """Parse XLS file"""
-        data = base64.b64decode(self.file_data)
-        
-        # Write the binary data to a temporary file
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            temp_file.write(data)
-            temp_file.seek(0)
-            
-            try:
-                # Open the workbook
-                book = xlrd.open_workbook(temp_file.name)
-                sheet = book.sheet_by_index(0)
-                
-                # Get headers from the first row
-                headers = [str(cell.value) for cell in sheet.row(0)]
-                
-                # Convert all rows to dictionaries
-                result = []
-                for row_idx in range(1, sheet.nrows):
-                    row = {}
-                    for col_idx, header in enumerate(headers):
-                        cell_value = sheet.cell(row_idx, col_idx).value
-                        # Convert numbers to strings to match CSV behavior
-                        if isinstance(cell_value, float):
-                            # Check if it's actually an integer
-                            if cell_value.is_integer():
-                                cell_value = str(int(cell_value))
-                            else:
-                                cell_value = str(cell_value)
-                        row[header] = str(cell_value) if cell_value else ''
-                    result.append(row)
-                return result
-            except Exception as e:
-                raise UserError(_("Error reading XLS file: %s") % str(e))
+    def _get_file_attachment(self):
+        """Return the attachment holding the uploaded file"""
+        return self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_id', '=', self.id),
+            ('res_field', '=', 'file_data'),
+        ], limit=1)
 
-    def _parse_xlsx(self):
-        """Parse XLSX file"""
-        data = base64.b64decode(self.file_data)
-        
-        # Write the binary data to a temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as temp_file:
-            temp_file.write(data)
-            temp_file.seek(0)
-            
-            try:
-                # Load the workbook
-                workbook = openpyxl.load_workbook(temp_file.name, data_only=True)
-                sheet = workbook.active
-                
-                # Get headers from the first row
-                headers = [str(cell.value) for cell in next(sheet.rows)]
-                
-                # Convert all rows to dictionaries
-                result = []
-                for row in sheet.iter_rows(min_row=2, values_only=True):
-                    row_dict = {}
-                    for header, value in zip(headers, row):
-                        # Convert numbers to strings to match CSV behavior
-                        if isinstance(value, (int, float)):
-                            if isinstance(value, float) and value.is_integer():
-                                value = str(int(value))
-                            else:
-                                value = str(value)
-                        row_dict[header] = str(value) if value is not None else ''
-                    result.append(row_dict)
-                return result
-            except Exception as e:
-                raise UserError(_("Error reading XLSX file: %s") % str(e))
-
-    def _parse_datetime(self, date_string):
+    def action_preview(self):
         """
-        Parse date from string format to datetime
+        Dry run of the import: report the new and existing orders, the
+        buyers, products and carriers that would be created and the rows
+        that would fail, without writing any sale data
         """
-        if not date_string:
-            return False
-        
-        date_formats = [
-            '%m/%d/%Y %H:%M',  # Format in your CSV: 9/21/2024 8:39
-            '%m/%d/%Y',
-            '%d/%m/%Y %H:%M',
-            '%d/%m/%Y',
-            '%Y-%m-%d %H:%M:%S',
-            '%Y-%m-%d %H:%M',
-            '%Y-%m-%d',
-        ]
-
-        for fmt in date_formats:
-            try:
-                return datetime.strptime(date_string.strip(), fmt)
-            except ValueError:
-                continue
-    
-        _logger.warning(f"Unable to parse date: {date_string}")
-        return False
-
-    def _parse_float(self, value):
-        if not value:
-            return 0.0
-        try:
-            # Menghapus pemisah ribuan dan mengganti pemisah desimal
-            cleaned_value = value.replace('.', '').replace(',', '.')
-            return float(cleaned_value)
-        except ValueError:
-            _logger.warning(f"Invalid float value: {value}")
-            return 0.0
-
-    def _get_or_create_partner(self, row):
-        """
-        Get or create partner based on username
-        """
-        Partner = self.env['res.partner']
-        username = row.get('Username (Pembeli)')
-        
-        if not username:
-            raise ValidationError(_("Username (Pembeli) is required to create or find a partner."))
-        
-        partner = Partner.search([('name', '=', username)], limit=1)
-        if not partner:
-            partner_vals = {
-                'name': username,
-                'phone': row.get('No. Telepon'),
-                'street': row.get('Alamat Pengiriman'),
-                'city': row.get('Kota/Kabupaten'),
-                'state_id': self._get_state_id(row.get('Provinsi')),
-            }
-            partner = Partner.create(partner_vals)
-        return partner
-    
-    def _get_state_id(self, state_name):
-        """
-        Get state ID based on name
-        """
-        State = self.env['res.country.state']
-        state = State.search([('name', '=', state_name)], limit=1)
-        return state.id if state else False
+        self.ensure_one()
+        if not self.with_context(bin_size=True).file_data:
+            raise UserError(_("Please upload a file to import."))
+        attachment = self._get_file_attachment()
+        if not attachment:
+            attachment = self.env['ir.attachment'].new({'name': self.filename, 'raw': base64.b64decode(self.file_data)})
+        # Job sementara di memori, hanya dipakai untuk membaca dan mencocokkan file
+        job = self.env['sale.import.job'].new({
+            'name': self.filename or _('Preview'),
+            'attachment_id': attachment,
+            'file_type': self.file_type,
+            'marketplace_id': self.marketplace_id.id,
+            'profile_id': self.profile_id.id,
+            'parse_workers': self.parse_workers,
+            'load_mode': self.load_mode,
+        })
+        preview = job._preview()
+        self.write({
+            'preview_done': True,
+            'preview_row_count': preview['row_count'],
+            'preview_order_new_count': preview['order_new_count'],
+            'preview_order_existing_count': preview['order_existing_count'],
+            'preview_buyer_new_count': preview['buyer_new_count'],
+            'preview_product_new_count': preview['product_new_count'],
+            'preview_carrier_new_count': preview['carrier_new_count'],
+            'preview_error_count': preview['error_count'],
+            'preview_errors': '\n'.join(_("Row %s: %s") % (index, message) for index, message in preview['errors']),
+            'preview_duration': preview['duration'],
+        })
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Import Sale Orders'),
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
 
-    def _get_or_create_product(self, row):
-        """
-        Get or create product based on SKU
-        """
-        Product = self.env['product.product']
-        product = Product.search([('default_code', '=', row.get('Nomor Referensi SKU'))], limit=1)
-        if not product:
-            product = Product.create({
-                'name': row.get('Nama Produk'),
-                'default_code': row.get('Nomor Referensi SKU'),
-                'list_price': self._parse_float(row.get('Harga Awal')),
-                'weight': self._parse_float(row.get('Berat Produk')),
-            })
-        return product
-    
-    def _get_or_create_carrier(self, carrier_name):
-        """
-        Get or create delivery carrier based on name
-        """
-        Carrier = self.env['delivery.carrier']
-        
-        if not carrier_name:
-            return False
-        
-        carrier = Carrier.search([('name', '=', carrier_name)], limit=1)
-        if not carrier:
-            carrier_vals = {
-                'name': carrier_name,
-                'delivery_type': 'fixed',  # Anda bisa menyesuaikan tipe delivery sesuai kebutuhan
-                'product_id': self.env.ref('delivery.product_product_delivery').id,
-            }
-            carrier = Carrier.create(carrier_vals)
-        return carrier    
-    
-    def _create_sale_order(self, row):
+    def _create_import_job(self):
         """
-        Create or update sale order based on CSV row data
+        Create the import job that owns the uploaded file. The attachment of
+        the upload is handed over to the job instead of being copied
         """
-        SaleOrder = self.env['sale.order']
-        order = SaleOrder.search([('nomor_pesanan', '=', row.get('No. Pesanan'))], limit=1)
-
-        # Mendapatkan payment mode 'BC Online'
-        payment_mode = self.env['account.payment.mode'].search([('name', '=', 'BC Online')], limit=1)
-        if not payment_mode:
-            raise ValidationError(_("Payment mode 'BC Online' not found in the system."))
-        
-        # # Mendapatkan automatic workflow 'Automatic'
-        workflow = self.env['sale.workflow.process'].search([('name', '=', 'Automatic')], limit=1)
-        if not workflow:
-            raise ValidationError(_("Workflow 'Automatic' not found in the system."))
-
-        partner = self._get_or_create_partner(row)
-        carrier = self._get_or_create_carrier(row.get('Opsi Pengiriman'))
-        
-        order_vals = {
-            'partner_id': partner.id,
-            'nomor_pesanan': row.get('No. Pesanan'),
-            'order_status': row.get('Status Pesanan'),
-            'cancellation_return_status': row.get('Status Pembatalan/ Pengembalian'),
-            'tracking_number': row.get('No. Resi'),
-            'opsi_pengiriman': row.get('Opsi Pengiriman'),
-            'carrier_id': carrier.id if carrier else False,
-            'shipping_option': 'antar counter' if row.get('Antar ke counter/ pick-up') == 'Antar Ke Counter' else 'pickup',
-            'must_ship_before': self._parse_datetime(row.get('Pesanan Harus Dikirimkan Sebelum (Menghindari keterlambatan)')),
-            'order_creation_time': self._parse_datetime(row.get('Waktu Pesanan Dibuat')),
-            'payment_time': self._parse_datetime(row.get('Waktu Pembayaran Dilakukan')),
-            'payment_method': row.get('Metode Pembayaran'),
-            'platform_discount': self._parse_float(row.get('Diskon Dari Shopee')),
-            'cashback': self._parse_float(row.get('Cashback Koin')),
-            'voucher_platform': self._parse_float(row.get('Voucher Ditanggung Shopee')),
-            'package_discount': self._parse_float(row.get('Paket Diskon')),
-            'package_discount_platform': self._parse_float(row.get('Paket Diskon (Diskon dari Shopee)')),
-            'package_discount_seller': self._parse_float(row.get('Paket Diskon (Diskon dari Penjual)')),
-            'coin_discount': self._parse_float(row.get('Potongan Koin Shopee')),
-            'credit_card_discount': self._parse_float(row.get('Diskan Kartu Kredit')),
-            'shipping_fee_paid_by_buyer': self._parse_float(row.get('Ongkos Kirim Dibayar oleh Pembeli')),
-            'shipping_fee_discount': self._parse_float(row.get('Estimasi Potongan Biaya Pengiriman')),
-            'return_shipping_fee': self._parse_float(row.get('Ongkos Kirim Pengembalian Barang')),
-            'estimated_shipping_fee': self._parse_float(row.get('Perkiraan Ongkos Kirim')),
-            'buyer_note': row.get('Catatan dari Pembeli'),
-            'buyer_username': row.get('Username (Pembeli)'),
-            'receiver_name': row.get('Nama Penerima'),
-            'receiver_phone': row.get('No. Telepon'),
-            'shipping_address': row.get('Alamat Pengiriman'),
-            'city': row.get('Kota/Kabupaten'),
-            'province': row.get('Provinsi'),
-            'order_completion_time': self._parse_datetime(row.get('Waktu Pesanan Selesai')),
-            'sale_marketplace': self.marketplace_id.id,
-            # Menambahkan payment mode dan workflow
-            'payment_mode_id': payment_mode.id,
-            'workflow_process_id': workflow.id,
-        }
-
-        if order:
-            order.write(order_vals)
-        else:
-            order = SaleOrder.create(order_vals)
-
-        # Process order lines
-        product = self._get_or_create_product(row)
-        
-        # Parse values from CSV
-        original_price = self._parse_float(row.get('Harga Awal'))
-        discounted_price = self._parse_float(row.get('Harga Setelah Diskon'))
-        quantity = self._parse_float(row.get('Jumlah'))
-
-        # Calculate discount percentage
-        if original_price > 0:
-            discount_percentage = ((original_price - discounted_price) / original_price) * 100
-        else:
-            discount_percentage = 0.0
-        
-        line_vals = {
-            'order_id': order.id,
-            'product_id': product.id,
-            'parent_sku': row.get('SKU Induk'),
-            'sku_reference': row.get('Nomor Referensi SKU'),
-            'variation_name': row.get('Nama Variasi'),
-            'original_price': original_price,
-            'discounted_price': discounted_price,
-            'returned_quantity': self._parse_float(row.get('Returned quantity', '0')),
-            'product_uom_qty': quantity,
-            'product_weight': self._parse_float(row.get('Berat Produk')),
-            'total_weight': self._parse_float(row.get('Total Berat')),
-            'discount': discount_percentage,
-            'price_unit': original_price,
-        }
-        order.order_line = [(0, 0, line_vals)]
-        
-        return order
-        
-    def import_sales(self):
-        """Import sales from the uploaded CSV file."""
         self.ensure_one()
-        if not self.file_data:
+        if not self.with_context(bin_size=True).file_data:
             raise UserError(_("Please upload a file to import."))
-        rows = self._parse_file()
-        created_orders = self.env['sale.order']
-        errors = []
 
-        for index, row in enumerate(rows, start=1):
-            try:
-                order = self._create_sale_order(row)
-                created_orders |= order
-            except ValidationError as e:
-                errors.append(f"Row {index}: Validation error - {str(e)}")
-            except Exception as e:
-                errors.append(f"Row {index}: Unexpected error - {str(e)}")
-                _logger.exception("Error importing row %s: %s", index, str(e))
-        
-        if errors:
-            raise UserError("\n".join(errors))
-    
-        return {
-            'type': 'ir.actions.act_window',
-            'name': _('Imported Sales Orders'),
-            'res_model': 'sale.order',
-            'view_mode': 'list,form',
-            'domain': [('id', 'in', created_orders.ids)],
-            'context': {'create': False},
-        }
\ No newline at end of file
+        attachment = self._get_file_attachment()
+        raw = None if attachment else base64.b64decode(self.file_data)
+        return self.env['sale.import.job']._create_job({
+            'name': self.filename or _('Import %s', fields.Datetime.now()),
+            'file_type': self.file_type,
+            'marketplace_id': self.marketplace_id.id,
+            'profile_id': self.profile_id.id,
+            'chunk_size': self.chunk_size,
+            'parse_workers': self.parse_workers,
+            'partition_count': max(self.partition_count, 1),
+            'load_mode': self.load_mode,
+            'capture_profile': self.capture_profile,
+        }, attachment=attachment, raw=raw)
+
+    def import_sales(self):
+        """Import sales from the uploaded file right away."""
+        job = self._create_import_job()
+        if job.partition_count > 1:
+            # Partisi hanya berjalan paralel di cron
+            job.action_queue()
+            return job._get_form_action()
+        job._run()
+        if job.error_count:
+            return job._get_form_action()
+        return job.action_view_orders()
+
+    def action_import_background(self):
+        """Queue the import of the uploaded file as a background job."""
+        job = self._create_import_job()
+        job.action_queue()
+        return job._get_form_action()